@@ -0,0 +1,201 @@
+from general.agent import Agent
+from general.game import GameState
+from general.move import Move
+from general.enums import Piece
+from clobber.clobber import Clobber
+from clobber.endgame import ClobberEndgameSolver
+from clobber.symmetry import symmetry_hash
+from typing import Optional, Tuple
+import copy
+import time
+
+INF = 10 ** 9
+DEFAULT_TABLE_SIZE = 1 << 16
+MAX_TABLE_SIZE = 1 << 20
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class ProofTable:
+    def __init__(self, capacity: int = DEFAULT_TABLE_SIZE):
+        self.capacity = capacity
+        self.keys = [None] * capacity
+        self.phi = [1] * capacity
+        self.delta = [1] * capacity
+        self.work = [0] * capacity
+        self.stored = 0
+        self.overwrites = 0
+
+    def _slots(self, key: int) -> Tuple[int, int]:
+        slot = key % self.capacity
+        return slot, slot ^ 1 if slot ^ 1 < self.capacity else slot
+
+    def lookup(self, key: int) -> Tuple[int, int]:
+        for slot in self._slots(key):
+            if self.keys[slot] == key:
+                return self.phi[slot], self.delta[slot]
+        return 1, 1
+
+    def store(self, key: int, phi: int, delta: int, work: int):
+        first, second = self._slots(key)
+        if self.keys[first] == key or self.keys[first] is None:
+            slot = first
+        elif self.keys[second] == key or self.keys[second] is None:
+            slot = second
+        else:
+            slot = first if self.work[first] <= self.work[second] else second
+            self.overwrites += 1
+
+        if self.keys[slot] is None:
+            self.stored += 1
+        self.keys[slot] = key
+        self.phi[slot] = phi
+        self.delta[slot] = delta
+        self.work[slot] = work
+
+
+def state_key(state: GameState) -> int:
+    if isinstance(state, Clobber):
+        return symmetry_hash(state)
+    if hasattr(state, 'get_fen'):
+        return hash(state.get_fen())
+    return hash((str(state.get_board()), state.get_current_player()))
+
+
+class DFPN(Agent):
+    def __init__(self, player: Piece, table_size: Optional[int] = None, max_nodes: Optional[int] = None,
+                 endgame_solver=None):
+        if table_size is None:
+            # Kazdy odwiedzony wezel zapisuje co najwyzej jeden wpis, wiecej miejsca nie trzeba
+            table_size = DEFAULT_TABLE_SIZE if max_nodes is None else min(MAX_TABLE_SIZE, 1 << max_nodes.bit_length())
+        self.player = player
+        self.table_size = table_size
+        self.max_nodes = max_nodes
+        self.endgame_solver = endgame_solver
+        self.table = ProofTable(table_size)
+
+        self.nodes = 0
+        self.proof_time = 0.0
+        self.result = None
+        self.best_move: Optional[Move] = None
+
+    def choose_move(self, state: GameState) -> Optional[Move]:
+        self.solve(state)
+        if self.best_move is not None:
+            return self.best_move
+
+        if self.endgame_solver is not None and self.endgame_solver.can_solve(state):
+            return self.endgame_solver.solve(state)
+        moves = state.get_legal_moves()
+        return moves[0] if moves else None
+
+    def solve(self, state: GameState) -> str:
+        self.nodes = 0
+        self.best_move = None
+        start = time.time()
+        root = copy.deepcopy(state)
+
+        try:
+            self._mid(root, INF - 1, INF - 1, is_root=True)
+        except BudgetExceeded:
+            pass
+
+        self.proof_time = time.time() - start
+        phi, delta = self.table.lookup(state_key(root))
+        if phi == 0:
+            self.result = 'win'
+        elif delta == 0:
+            self.result = 'loss'
+        else:
+            self.result = 'unknown'
+        if self.result != 'win':
+            self.best_move = None
+        return self.result
+
+    def get_stats(self):
+        return {
+            "result": self.result,
+            "nodes": self.nodes,
+            "proof_time": self.proof_time,
+            "nodes_per_second": self.nodes / self.proof_time if self.proof_time > 0 else 0.0,
+            "table_entries": self.table.stored,
+            "table_overwrites": self.table.overwrites
+        }
+
+    def _mid(self, state: GameState, th_phi: int, th_delta: int, is_root: bool = False):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded()
+
+        key = state_key(state)
+        phi, delta = self.table.lookup(key)
+        if not is_root and (phi >= th_phi or delta >= th_delta):
+            return
+
+        if self.endgame_solver is not None and self.endgame_solver.can_solve(state):
+            if self.endgame_solver.is_win_for_mover(state):
+                self.table.store(key, 0, INF, self.nodes)
+            else:
+                self.table.store(key, INF, 0, self.nodes)
+            return
+
+        moves = state.get_legal_moves()
+        if not moves:
+            self.table.store(key, INF, 0, self.nodes)
+            return
+
+        children = []
+        for move in moves:
+            child = copy.deepcopy(state)
+            child.make_move(move)
+            children.append((child, state_key(child), move))
+
+        start_nodes = self.nodes
+        while True:
+            entries = [self.table.lookup(child_key) for _, child_key, _ in children]
+            phi = min(d for _, d in entries)
+            delta = min(INF, sum(p for p, _ in entries))
+
+            best = 0
+            second_delta = INF
+            for i in range(1, len(entries)):
+                if entries[i][1] < entries[best][1]:
+                    second_delta = entries[best][1]
+                    best = i
+                elif entries[i][1] < second_delta:
+                    second_delta = entries[i][1]
+
+            # Ruch korzenia zapamietujemy od razu, tablica moze pozniej wyrzucic wpisy dzieci
+            if is_root:
+                self.best_move = children[best][2]
+
+            if phi >= th_phi or delta >= th_delta:
+                self.table.store(key, phi, delta, self.nodes - start_nodes)
+                return
+
+            child_phi = entries[best][0]
+            child_th_phi = min(INF - 1, th_delta + child_phi - delta)
+            child_th_delta = min(th_phi, second_delta + 1)
+            self._mid(children[best][0], child_th_phi, child_th_delta)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Prove Clobber openings with df-pn")
+    parser.add_argument("sizes", nargs="*", default=["5x6", "6x6"], help="Board sizes as HxW")
+    parser.add_argument("--max-nodes", type=int, default=2_000_000, help="Node budget per proof")
+    parser.add_argument("--table-size", type=int, default=MAX_TABLE_SIZE, help="Proof table entries")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        height, width = map(int, size.split('x'))
+        game = Clobber(height, width)
+        agent = DFPN(game.current_player, table_size=args.table_size, max_nodes=args.max_nodes,
+                     endgame_solver=ClobberEndgameSolver())
+        result = agent.solve(game)
+        stats = agent.get_stats()
+        print(f"{height}x{width}: {result} nodes={stats['nodes']} time={stats['proof_time']:.2f}s "
+              f"nps={stats['nodes_per_second']:.0f} entries={stats['table_entries']}")
@@ -2,14 +2,25 @@ from general.agent import Agent
 from general.game import GameState
 from general.move import Move
 from general.enums import Piece
+from general.profiler import SearchStats, run_profiled
 from typing import Optional, Dict, List
 import random
 import math
 import copy
+import os
+import sys
 import time
 
+try:
+    import resource
+except ImportError:
+    resource = None
+
 class Node:
     def __init__(self, state: GameState, parent=None, move=None):
+        self.reset(state, parent, move)
+
+    def reset(self, state: GameState, parent=None, move=None):
         self.state = state
         self.parent = parent
         self.move = move  
@@ -24,20 +35,6 @@ class Node:
                    (child.wins / child.visits) + 
                    exploration_weight * math.sqrt(math.log(self.visits) / child.visits))
 
-    def expand(self):
-        if not self.untried_moves:
-            return None
-            
-        move = random.choice(self.untried_moves)
-        self.untried_moves.remove(move)
-        
-        new_state = copy.deepcopy(self.state)
-        new_state.make_move(move)
-        
-        child = Node(new_state, parent=self, move=move)
-        self.children.append(child)
-        return child
-
     def update(self, result):
         self.visits += 1
         self.wins += result
@@ -49,32 +46,193 @@ class Node:
         return self.state.is_terminal()
 
 
+# Pula odzyskuje tylko obiekty Node, kazde rozwiniecie nadal kopiuje stan (deepcopy)
+class NodePool:
+    def __init__(self, max_nodes: Optional[int] = None):
+        if max_nodes is not None and max_nodes < 2:
+            raise ValueError("max_nodes must be at least 2")
+        self.max_nodes = max_nodes
+        self.free: List[Node] = []
+        self.size = 0
+        self.peak = 0
+        self.pruned = 0
+        self.recycled = 0
+
+    def acquire(self, state: GameState, parent=None, move=None) -> Node:
+        if self.free:
+            node = self.free.pop()
+            node.reset(state, parent, move)
+            self.recycled += 1
+        else:
+            node = Node(state, parent, move)
+        self.size += 1
+        self.peak = max(self.peak, self.size)
+        return node
+
+    def release(self, node: Node):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            stack.extend(current.children)
+            current.state = None
+            current.parent = None
+            current.children = []
+            current.untried_moves = []
+            self.free.append(current)
+            self.size -= 1
+            self.pruned += 1
+
+    def is_full(self) -> bool:
+        return self.max_nodes is not None and self.size >= self.max_nodes
+
+
 class MCTS(Agent):
-    def __init__(self, player: Piece, simulation_time: float = 1.0, exploration_weight: float = 1.4):
+    def __init__(self, player: Piece, simulation_time: float = 1.0, exploration_weight: float = 1.4,
+                 max_nodes: Optional[int] = None, prune_fraction: float = 0.25, endgame_solver=None,
+                 tablebase=None, profile: bool = False, profile_dir: Optional[str] = None):
         self.player = player
         self.simulation_time = simulation_time 
         self.exploration_weight = exploration_weight
+        self.max_nodes = max_nodes
+        self.prune_fraction = prune_fraction
+        self.endgame_solver = endgame_solver
+        self.tablebase = tablebase
+        self.profile = profile or profile_dir is not None
+        self.profile_dir = profile_dir
+        self.profiled_moves = 0
+        self.last_stats: Optional[SearchStats] = None
+
+        self.pool = NodePool(max_nodes)
+        self.peak_nodes = 0
+        self.pruned_nodes = 0
+        self.simulations = 0
+        self.last_score = None
+        self.peak_rss_kb = 0
+
+    @property
+    def node_count(self) -> int:
+        return self.pool.size
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "nodes": self.node_count,
+            "simulations": self.simulations,
+            "peak_nodes": self.peak_nodes,
+            "pruned_nodes": self.pruned_nodes,
+            "recycled_nodes": self.pool.recycled,
+            "peak_rss_kb": self.peak_rss_kb
+        }
 
     def choose_move(self, state: GameState) -> Optional[Move]:
-        root = Node(copy.deepcopy(state))
+        if not self.profile:
+            return self._choose_move(state)
+
+        stats = SearchStats()
+        expand = self._expand
+
+        def counted_expand(node):
+            started = time.perf_counter()
+            child = expand(node)
+            stats.add("expand", time.perf_counter() - started)
+            depth = 0
+            while node is not None:
+                depth += 1
+                node = node.parent
+            stats.count_node(depth)
+            return child
+
+        self.profiled_moves += 1
+        dump = None
+        if self.profile_dir is not None:
+            dump = os.path.join(self.profile_dir, f"mcts-{self.profiled_moves}.pstats")
+
+        self._expand = counted_expand
+        try:
+            move = run_profiled(self, stats, self._choose_move, state,
+                                phases=('_select', '_simulate', '_backpropagate'), dump=dump)
+        finally:
+            del self._expand
+
+        stats.nodes_per_depth[0] = 1
+        stats.counters.update(simulations=self.simulations, peak_nodes=self.peak_nodes,
+                              pruned_nodes=self.pruned_nodes)
+        self.last_stats = stats
+        return move
+
+    def _choose_move(self, state: GameState) -> Optional[Move]:
+        if self.endgame_solver is not None and self.endgame_solver.can_solve(state):
+            move = self.endgame_solver.solve(state)
+            if move is not None:
+                self.last_score = 1.0
+                return move
+
+        self.pool = NodePool(self.max_nodes)
+        self.simulations = 0
+        self.last_score = None
+        root = self.pool.acquire(copy.deepcopy(state))
         end_time = time.time() + self.simulation_time
         
         while time.time() < end_time:
             node = self._select(root)
             
             if not node.is_terminal() and node.untried_moves:
-                node = node.expand()
+                if self.pool.is_full():
+                    self._prune(root, node)
+                if not self.pool.is_full():
+                    node = self._expand(node)
             
             result = self._simulate(node)
             
             self._backpropagate(node, result)
-        
+            self.simulations += 1
+
+        self._record_stats()
+
         if not root.children:
             return None
 
         best_child = max(root.children, key=lambda child: child.visits)
+        self.last_score = best_child.wins / best_child.visits if best_child.visits else None
         return best_child.move
 
+    def _expand(self, node: Node) -> Node:
+        move = random.choice(node.untried_moves)
+        node.untried_moves.remove(move)
+
+        new_state = copy.deepcopy(node.state)
+        new_state.make_move(move)
+
+        child = self.pool.acquire(new_state, parent=node, move=move)
+        node.children.append(child)
+        return child
+
+    def _prune(self, root: Node, keep: Node):
+        leaves = []
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            if current.children:
+                stack.extend(current.children)
+            elif current is not root and current is not keep:
+                leaves.append(current)
+
+        leaves.sort(key=lambda leaf: leaf.visits)
+        to_prune = max(1, int(self.pool.max_nodes * self.prune_fraction))
+
+        for leaf in leaves[:to_prune]:
+            parent = leaf.parent
+            parent.children.remove(leaf)
+            parent.untried_moves.append(leaf.move)
+            self.pool.release(leaf)
+
+    def _record_stats(self):
+        self.peak_nodes = self.pool.peak
+        self.pruned_nodes = self.pool.pruned
+        # Szczytowe RSS calego procesu, nie tylko tego wyszukiwania; na macOS ru_maxrss jest w bajtach
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak_rss_kb = peak // 1024 if sys.platform == 'darwin' else peak
+
     def _select(self, node):
         while not node.is_terminal() and node.is_fully_expanded():
             node = node.select_child(self.exploration_weight)
@@ -85,6 +243,12 @@ class MCTS(Agent):
         current_player = state.get_current_player()
         
         while not state.is_terminal():
+            if self.tablebase is not None:
+                mover_wins = self.tablebase.probe(state)
+                if mover_wins is not None:
+                    winner = state.get_current_player() if mover_wins else ~state.get_current_player()
+                    return 1 if winner == self.player else 0
+
             legal_moves = state.get_legal_moves()
             if not legal_moves:
                 break
@@ -3,38 +3,128 @@ from general.strategy import Strategy
 from general.game import GameState
 from general.move import Move
 from general.agent import Agent
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from general.enums import Piece
+from general.profiler import SearchStats, run_profiled
 import copy
+import os
+import time
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO,
-                    filename='minmax.log',
-                    format='[%(levelname)s] %(message)s')
+
+TABLEBASE_SCORE = 1_000_000
+KILLER_SLOTS = 2
+
+
+class SearchTimeout(Exception):
+    pass
 
 
 class MinMax(Agent):
-    def __init__(self, player: Piece, depth: int, strategy: Strategy):
+    def __init__(self, player: Piece, depth: int, strategy: Strategy, endgame_solver=None, tablebase=None,
+                 profile: bool = False, profile_dir: Optional[str] = None, time_limit: Optional[float] = None):
         self.player = player
         self.max_depth = depth
+        self.time_limit = time_limit
+        self.deadline: Optional[float] = None
+        self.root_depth = depth
+        self.root_move: Optional[int] = None
+        self.completed_depth = 0
         self.strategy = strategy
+        self.endgame_solver = endgame_solver
+        self.tablebase = tablebase
+        self.profile = profile or profile_dir is not None
+        self.profile_dir = profile_dir
+        self.profiled_moves = 0
+        self.last_stats: Optional[SearchStats] = None
 
         self.nodes_visited = 0
         self.alpha_beta_cuts = 0
+        self.tablebase_hits = 0
+        self.last_score = None
+        self.killers: Dict[int, List[int]] = {}
 
     def choose_move(self, state: GameState) -> Optional[Move]:
+        if not self.profile:
+            return self._choose_move(state)
+
+        stats = SearchStats()
+        search = self.minmax
+
+        def counted(node_state, depth, alpha, beta, maximizing):
+            stats.count_node(self.root_depth - depth)
+            return search(node_state, depth, alpha, beta, maximizing)
+
+        self.profiled_moves += 1
+        dump = None
+        if self.profile_dir is not None:
+            dump = os.path.join(self.profile_dir, f"minmax-{self.profiled_moves}.pstats")
+
+        self.minmax = counted
+        try:
+            move = run_profiled(self, stats, self._choose_move, state, dump=dump)
+        finally:
+            del self.minmax
+
+        stats.counters.update(nodes=self.nodes_visited, cutoffs=self.alpha_beta_cuts,
+                              tablebase_hits=self.tablebase_hits)
+        self.last_stats = stats
+        logger.info("Profil wyszukiwania: %s", stats)
+        return move
+
+    def _choose_move(self, state: GameState) -> Optional[Move]:
         self.nodes_visited = 0
         self.alpha_beta_cuts = 0
+        self.tablebase_hits = 0
+        self.killers = {}
+
+        if self.endgame_solver is not None and self.endgame_solver.can_solve(state):
+            move = self.endgame_solver.solve(state)
+            if move is not None:
+                logger.info("Ruch z solvera końcówek: %s", move)
+                self.last_score = TABLEBASE_SCORE
+                return move
 
         maximizing = (state.current_player == self.player)
-        score, best_move = self.minmax(state, self.max_depth, float('-inf'), float('inf'), maximizing)
+        if self.time_limit is None:
+            self.deadline = None
+            self.root_depth = self.max_depth
+            self.root_move = None
+            score, best_code = self.minmax(state, self.max_depth, float('-inf'), float('inf'), maximizing)
+            self.completed_depth = self.max_depth
+        else:
+            score, best_code = self._deepen(state, maximizing)
+        self.last_score = score
+        best_move = Move.from_packed(best_code) if best_code is not None else None
 
-        logger.info(f"Liczba odwiedzonych węzłów: {self.nodes_visited}")
-        logger.info(f"Liczba cięć alfa-beta: {self.alpha_beta_cuts}")
-        logger.info(f"Ostateczna ocena pozycji: {score}")
+        logger.info("Osiagnieta glebokosc: %s", self.completed_depth)
+        logger.info("Liczba odwiedzonych węzłów: %s", self.nodes_visited)
+        logger.info("Liczba cięć alfa-beta: %s", self.alpha_beta_cuts)
+        logger.info("Trafienia w bazie końcówek: %s", self.tablebase_hits)
+        logger.info("Ostateczna ocena pozycji: %s", score)
 
         return best_move
 
+    def _deepen(self, state: GameState, maximizing: bool) -> Tuple[Optional[float], Optional[int]]:
+        # Iteracyjne poglebianie: po przekroczeniu czasu zostaje wynik ostatniej pelnej iteracji
+        self.deadline = time.perf_counter() + self.time_limit
+        self.root_move = None
+        self.completed_depth = 0
+        score = None
+        try:
+            for depth in range(1, self.max_depth + 1):
+                self.root_depth = depth
+                score, self.root_move = self.minmax(state, depth, float('-inf'), float('inf'), maximizing)
+                self.completed_depth = depth
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+
+        if self.root_move is None:
+            self.root_move = next(iter(state.iter_move_codes()), None)
+        return score, self.root_move
+
     def minmax(
         self,
         state: GameState,
@@ -42,20 +132,31 @@ class MinMax(Agent):
         alpha: float,
         beta: float,
         maximizing: bool
-    ) -> Tuple[float, Optional[Move]]:
+    ) -> Tuple[float, Optional[int]]:
 
         self.nodes_visited += 1
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        if self.tablebase is not None and depth < self.root_depth:
+            mover_wins = self.tablebase.probe(state)
+            if mover_wins is not None:
+                self.tablebase_hits += 1
+                we_win = mover_wins == (state.get_current_player() == self.player)
+                return (TABLEBASE_SCORE if we_win else -TABLEBASE_SCORE), None
 
-        if depth == 0 or state.is_terminal():
+        if depth == 0 or state.is_drawn():
             value = self.strategy.evaluate(state)
             return value, None
 
-        legal_moves = state.get_legal_moves()
         best_move = None
+        hash_move = self.root_move if depth == self.root_depth else None
 
         if maximizing:
             max_eval = float('-inf')
-            for move in legal_moves:
+            for move in state.iter_move_codes(hash_move, self.killers.get(depth, ())):
+                if best_move is None:
+                    best_move = move
                 new_state = copy.deepcopy(state)
                 new_state.make_move(move)
                 eval_score, _ = self.minmax(new_state, depth - 1, alpha, beta, False)
@@ -67,11 +168,16 @@ class MinMax(Agent):
                 alpha = max(alpha, eval_score)
                 if beta <= alpha:
                     self.alpha_beta_cuts += 1
+                    self._store_killer(depth, move)
                     break
+            if best_move is None:
+                return self.strategy.evaluate(state), None
             return max_eval, best_move
         else:
             min_eval = float('inf')
-            for move in legal_moves:
+            for move in state.iter_move_codes(hash_move, self.killers.get(depth, ())):
+                if best_move is None:
+                    best_move = move
                 new_state = copy.deepcopy(state)
                 new_state.make_move(move)
                 eval_score, _ = self.minmax(new_state, depth - 1, alpha, beta, True)
@@ -83,5 +189,14 @@ class MinMax(Agent):
                 beta = min(beta, eval_score)
                 if beta <= alpha:
                     self.alpha_beta_cuts += 1
+                    self._store_killer(depth, move)
                     break
+            if best_move is None:
+                return self.strategy.evaluate(state), None
             return min_eval, best_move
+
+    def _store_killer(self, depth: int, move: int):
+        killers = self.killers.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLER_SLOTS:]
@@ -0,0 +1,184 @@
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Optional, Sequence, Tuple
+from api import engine_pool
+from clobber.clobber import check_board_size
+import asyncio
+import json
+
+CACHE_SIZE = 10000
+MAX_POSITIONS = 1000
+MAX_BUDGET = 60.0
+DEADLINE_GRACE = 1.0
+STATIC_ENGINE = "static"
+
+CacheKey = Tuple[str, str, str, float]
+
+
+class AnalysisCache:
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self.max_size = max_size
+        self.results: 'OrderedDict[CacheKey, dict]' = OrderedDict()
+        self.in_flight: Dict[CacheKey, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: CacheKey) -> Optional[dict]:
+        result = self.results.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.results.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: CacheKey, result: dict):
+        self.results[key] = result
+        self.results.move_to_end(key)
+        while len(self.results) > self.max_size:
+            self.results.popitem(last=False)
+
+
+cache = AnalysisCache()
+_slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+
+def search_slots() -> asyncio.Semaphore:
+    global _slots
+    loop = asyncio.get_running_loop()
+    if _slots is None or _slots[0] is not loop:
+        _slots = (loop, asyncio.Semaphore(engine_pool.POOL_SIZE))
+    return _slots[1]
+
+
+def validate_request(body, engines: Sequence[str], game_type: str = "chess") -> Optional[str]:
+    if not isinstance(body, dict):
+        return "Expected a JSON object"
+    positions = body.get("positions")
+    if not isinstance(positions, list) or not all(isinstance(position, str) for position in positions):
+        return "positions must be a list of strings"
+    if len(positions) > MAX_POSITIONS:
+        return f"At most {MAX_POSITIONS} positions per request"
+    if game_type != "chess":
+        for position in positions:
+            rows = position.strip().partition(" ")[0].split("/")
+            try:
+                check_board_size(len(rows), max(len(row) for row in rows))
+            except ValueError as e:
+                return str(e)
+    spec = body.get("engine", {})
+    if not isinstance(spec, dict) or spec.get("engine", "minmax") not in engines:
+        return f"engine.engine must be one of {', '.join(engines)}"
+    depth = spec.get("depth", 1)
+    if isinstance(depth, bool) or not isinstance(depth, int) or not 1 <= depth <= engine_pool.MAX_DEPTH:
+        return f"engine.depth must be between 1 and {engine_pool.MAX_DEPTH}"
+    budget = body.get("budget", 1.0)
+    if not isinstance(budget, (int, float)) or not 0 < budget <= MAX_BUDGET:
+        return f"budget must be between 0 and {MAX_BUDGET} seconds"
+    return None
+
+
+def position_key(game_type: str, position: str) -> str:
+    if game_type != "chess":
+        board, _, player = position.strip().partition(" ")
+        rows = board.split("/")
+        if player not in ("B", "W") or len({len(row) for row in rows}) != 1 or set("".join(rows)) - set("WB_"):
+            raise ValueError(f"Invalid Clobber position: {position}")
+        check_board_size(len(rows), len(rows[0]))
+    normalized = engine_pool.encode_state(game_type, engine_pool.decode_state(game_type, position))
+    if game_type == "chess":
+        return " ".join(normalized.split(" ")[:5])
+    return normalized
+
+
+async def _search(game_type: str, position: str, spec: dict, budget: float) -> dict:
+    # Najwyzej tyle zadan co procesow w puli, zeby czas w kolejce nie zjadal budzetu
+    async with search_slots():
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(engine_pool.get_executor(), engine_pool.analyse_position, game_type, position,
+                                      spec, budget * engine_pool.THINK_TIME_SHARE)
+        return await asyncio.wait_for(future, timeout=budget + DEADLINE_GRACE)
+
+
+async def _analyse(index: int, position: str, job: asyncio.Future) -> dict:
+    try:
+        result = dict(await asyncio.shield(job))
+    except asyncio.TimeoutError:
+        return {"index": index, "position": position, "error": "Budget exceeded"}
+    except Exception as e:
+        return {"index": index, "position": position, "error": str(e)}
+    return {"index": index, "position": position, "cached": False, **result}
+
+
+def _finished(key: CacheKey, job: asyncio.Future):
+    if cache.in_flight.get(key) is job:
+        del cache.in_flight[key]
+    if not job.cancelled() and job.exception() is None:
+        cache.put(key, job.result())
+
+
+async def _static_batch(game_type: str, positions: Sequence[str], spec_key: str) -> AsyncIterator[str]:
+    pending = []
+    for index, position in enumerate(positions):
+        try:
+            key = (game_type, position_key(game_type, position), spec_key, 0.0)
+        except Exception:
+            yield json.dumps({"index": index, "position": position, "error": "Invalid position"}) + "\n"
+            continue
+        result = cache.get(key)
+        if result is not None:
+            yield json.dumps({"index": index, "position": position, "cached": True, **result}) + "\n"
+        else:
+            pending.append((index, position, key))
+
+    if not pending:
+        return
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(engine_pool.get_executor(), engine_pool.evaluate_positions, game_type,
+                                  [position for _, position, _ in pending])
+    try:
+        results = await asyncio.wait_for(future, timeout=MAX_BUDGET)
+    except asyncio.TimeoutError:
+        results = [{"error": "Budget exceeded"}] * len(pending)
+    except Exception as e:
+        results = [{"error": str(e)}] * len(pending)
+
+    for (index, position, key), result in zip(pending, results):
+        if "error" in result:
+            yield json.dumps({"index": index, "position": position, **result}) + "\n"
+            continue
+        cache.put(key, result)
+        yield json.dumps({"index": index, "position": position, "cached": False, **result}) + "\n"
+
+
+async def analyse_batch(game_type: str, positions: Sequence[str], spec: dict,
+                        budget: float) -> AsyncIterator[str]:
+    spec_key = json.dumps(spec, sort_keys=True)
+    if spec.get("engine") == STATIC_ENGINE:
+        async for line in _static_batch(game_type, positions, spec_key):
+            yield line
+        return
+
+    jobs = []
+
+    for index, position in enumerate(positions):
+        try:
+            normalized = position_key(game_type, position)
+        except Exception:
+            yield json.dumps({"index": index, "position": position, "error": "Invalid position"}) + "\n"
+            continue
+
+        key = (game_type, normalized, spec_key, float(budget))
+        result = cache.get(key)
+        if result is not None:
+            yield json.dumps({"index": index, "position": position, "cached": True, **result}) + "\n"
+            continue
+
+        job = cache.in_flight.get(key)
+        if job is None:
+            job = asyncio.ensure_future(_search(game_type, position, spec, budget))
+            job.add_done_callback(lambda done, key=key: _finished(key, done))
+            cache.in_flight[key] = job
+        jobs.append(_analyse(index, position, job))
+
+    for next_done in asyncio.as_completed(jobs):
+        yield json.dumps(await next_done) + "\n"
@@ -0,0 +1,96 @@
+from typing import Callable, Iterable, Optional, Union
+from api import metrics
+import asyncio
+import logging
+
+SEND_TIMEOUT = 5.0
+SPECTATOR_QUEUE_SIZE = 4
+MAX_COALESCED = 50
+
+logger = logging.getLogger(__name__)
+
+Frame = Union[str, bytes]
+
+
+class SpectatorQueue:
+    def __init__(self, websocket, max_size: int = SPECTATOR_QUEUE_SIZE, max_coalesced: int = MAX_COALESCED):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.max_coalesced = max_coalesced
+        self.coalesced = 0
+        self.lagged = 0
+        self.closed = False
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._pump())
+
+    def offer(self, message: Frame) -> bool:
+        if self.closed:
+            return False
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.coalesced += 1
+            self.lagged += 1
+            if self.lagged > self.max_coalesced:
+                self.close()
+                return False
+        self.queue.put_nowait(message)
+        return True
+
+    async def _pump(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                await asyncio.wait_for(send_frame(self.websocket, message), timeout=SEND_TIMEOUT)
+                self.lagged = 0
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.close()
+
+    def stop(self):
+        self.closed = True
+        if self.task is not None and self.task is not asyncio.current_task():
+            self.task.cancel()
+
+    def close(self):
+        if self.closed:
+            return
+        self.stop()
+        asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
+
+def send_frame(websocket, message: Frame):
+    if isinstance(message, bytes):
+        return websocket.send_bytes(message)
+    return websocket.send_text(message)
+
+
+async def _send(websocket, message: Frame) -> Optional[Exception]:
+    try:
+        await asyncio.wait_for(send_frame(websocket, message), timeout=SEND_TIMEOUT)
+    except Exception as e:
+        return e
+    return None
+
+
+async def broadcast(players: Iterable, spectators: Iterable[SpectatorQueue],
+                    message: Union[Frame, Callable[[object], Frame]]):
+    frame_for = message if callable(message) else lambda conn: message
+    for spectator in list(spectators):
+        spectator.offer(frame_for(spectator.websocket))
+
+    players = [conn for conn in players if conn]
+    errors = await asyncio.gather(*(_send(conn, frame_for(conn)) for conn in players))
+    for conn, error in zip(players, errors):
+        if error is not None:
+            metrics.ERRORS.inc("broadcast")
+            logger.warning("Error sending update to player: %s", error)
@@ -1,10 +1,20 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from clobber.clobber import Clobber
+from clobber.sparse import new_clobber
 from general.enums import Piece
-from general.move import Move
+from general.move import Move, from_algebraic, to_algebraic
+from api import analysis, engine_pool, metrics, wire
+from api.broadcast import SpectatorQueue, broadcast, send_frame
+from api.game_store import GameStore
+from api.room_bus import create_room_bus
+from api.snapshots import SnapshotCache
+from typing import Optional
+import asyncio
+import logging
 import json
+import os
 import uuid
 
 app = FastAPI()
@@ -17,9 +27,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-in_memory_storage = {}
 active_connections = {}
 game_rooms = {}
+ai_opponents = {}
+ai_tasks = {}
+spectators = {}
+wire_formats = {}
+room_cleanups = set()
+frames = wire.FrameCache()
+
+metrics.ACTIVE_ROOMS.set_function(lambda: len(game_rooms), "clobber")
+metrics.ACTIVE_CONNECTIONS.set_function(lambda: len(active_connections), "clobber")
+metrics.BROADCAST_QUEUE_DEPTH.set_function(
+    lambda: sum(spectator.queue.qsize() for watchers in spectators.values() for spectator in watchers), "clobber")
+
+logger = logging.getLogger(__name__)
+
+AI_ENGINES = ("minmax", "mcts")
+ANALYSIS_ENGINES = AI_ENGINES + (analysis.STATIC_ENGINE,)
+MAX_BOARD_SIZE = 26
+
+GAME_DB = 'clobber_games.sqlite3'
+MAX_RESIDENT_GAMES = 1000
+IDLE_TTL = 1800.0
+EVICTION_INTERVAL = 60.0
+
+WORKER_ID = uuid.uuid4().hex
+room_bus = create_room_bus(os.environ.get("CLOBBER_ROOM_BUS"), prefix="clobber")
 
 
 def initialize_game() -> Clobber:
@@ -28,220 +62,462 @@ def initialize_game() -> Clobber:
     return game
 
 
+def is_game_active(game_id: str) -> bool:
+    room = game_rooms.get(game_id)
+    if room is not None and (room["black"] or room["white"]):
+        return True
+    task = ai_tasks.get(game_id)
+    return bool(spectators.get(game_id)) or (task is not None and not task.done())
+
+
+def room_keys(game_id: str):
+    return f"{game_id}:state", f"{game_id}:ai"
+
+
+def evict_game(game_id: str) -> dict:
+    game_rooms.pop(game_id, None)
+    room_bus.unsubscribe(game_id)
+    cleanup = asyncio.create_task(room_bus.delete(*room_keys(game_id)))
+    room_cleanups.add(cleanup)
+    cleanup.add_done_callback(room_cleanups.discard)
+    snapshots.discard(game_id)
+    frames.discard(game_id)
+    cancel_ai_move(game_id)
+    ai = ai_opponents.pop(game_id, None)
+    return {"ai": ai} if ai is not None else {}
+
+
+def load_game(game_id: str, meta: dict):
+    if "ai" in meta:
+        ai_opponents[game_id] = meta["ai"]
+
+
+game_store = GameStore("clobber", initialize_game, GAME_DB, MAX_RESIDENT_GAMES, IDLE_TTL,
+                       is_active=is_game_active, on_evict=evict_game, on_load=load_game)
+
+
 async def get_or_create_game(game_id: str):
-    game_data_key = f"game:{game_id}"
-    clobber_game = in_memory_storage.get(game_data_key)
-    if clobber_game:
-        return clobber_game
-    else:
-        clobber_game = initialize_game()
-        in_memory_storage[game_data_key] = clobber_game
-        return clobber_game
+    return await game_store.fetch_or_create(game_id)
 
 
-def format_legal_moves(moves):
-    formatted_moves = []
-    for move in moves:
-        from_pos = move.from_pos
-        to_pos = move.to_pos
+def dump_game(game_id: str, clobber_game) -> str:
+    state = {"position": engine_pool.encode_state("clobber", clobber_game), "moves": game_store.moves.get(game_id, [])}
+    return f"{game_store.sequence(game_id)}|{json.dumps(state)}"
 
-        def coords_to_algebraic(x, y):
-            col = chr(ord('a') + x)
-            row = str(6 - y)
-            return col + row
 
-        formatted_move = {
-            "from": coords_to_algebraic(from_pos[0], from_pos[1]),
-            "to": coords_to_algebraic(to_pos[0], to_pos[1])
-        }
-        formatted_moves.append(formatted_move)
+async def load_game_dump(game_id: str, dump: str):
+    seq, state = dump.split("|", 1)
+    if await game_store.fetch(game_id) is None or game_store.sequence(game_id) < int(seq):
+        state = json.loads(state)
+        game_store.replace(game_id, engine_pool.decode_state("clobber", state["position"]), state["moves"])
+        snapshots.invalidate(game_id)
+
+
+async def sync_game(game_id: str):
+    dump = await room_bus.get(f"{game_id}:state")
+    if dump is not None:
+        await load_game_dump(game_id, dump)
+    return await get_or_create_game(game_id)
+
+
+def format_legal_moves(moves, height: int = 6):
+    return [to_algebraic(move.packed, height, row_major=False) for move in moves]
+
 
-    return formatted_moves
+def build_game_state(clobber_game) -> dict:
+    legal_moves = clobber_game.legal_move_index().values()
+    return {
+        "board": [[piece.value for piece in row] for row in clobber_game.get_board()],
+        "turn": "black" if clobber_game.current_player == Piece.BLACK else "white",
+        "legalMoves": format_legal_moves(legal_moves, clobber_game.height),
+        "isTerminal": len(legal_moves) == 0
+    }
+
+
+snapshots = SnapshotCache(build_game_state)
+
+
+def apply_move(game_id: str, clobber_game, move: Move):
+    clobber_game.make_move(move)
+    snapshots.invalidate(game_id)
+    game_store.record_move(game_id, move)
 
 
 async def update_game_state(game_id: str, clobber_game):
-    board = clobber_game.get_board()
+    dump = dump_game(game_id, clobber_game)
+    await room_bus.set(f"{game_id}:state", dump)
+    await room_bus.publish(game_id, json.dumps({"origin": WORKER_ID, "type": "state", "state": dump}))
+    await broadcast_game_state(game_id, clobber_game)
+    if clobber_game.is_terminal():
+        await room_bus.delete(*room_keys(game_id))
+
+
+async def broadcast_game_state(game_id: str, clobber_game):
+    if game_id not in game_rooms:
+        return
+
+    turn = "black" if clobber_game.current_player == Piece.BLACK else "white"
+    game_rooms[game_id]["current_turn"] = turn
+    moves = game_store.moves.get(game_id)
+    delta = {}
+
+    def frame_for(conn):
+        encoding = wire_formats.get(conn)
+        if encoding is None:
+            frame = snapshots.get(game_id, clobber_game).encode(status="move made")
+        elif moves:
+            if not delta:
+                delta.update(wire.delta_message(len(moves), moves[-1], turn, game_status(clobber_game)))
+            frame = frames.get(game_id, delta, encoding)
+        else:
+            frame = full_state_frame(game_id, clobber_game, conn)
+        frames.count(encoding or "legacy", frame)
+        return frame
+
+    room = game_rooms[game_id]
+    await broadcast([room["black"], room["white"]], spectators.get(game_id, ()), frame_for)
+
+
+def game_status(clobber_game) -> str:
+    return "terminal" if clobber_game.is_terminal() else "ongoing"
+
+
+def full_state_frame(game_id: str, clobber_game, websocket, **extra):
+    encoding = wire_formats.get(websocket)
+    if encoding is None:
+        return snapshots.get(game_id, clobber_game).encode(**extra)
+    turn = "black" if clobber_game.current_player == Piece.BLACK else "white"
+    message = wire.full_message(game_store.sequence(game_id), engine_pool.encode_state("clobber", clobber_game),
+                                turn, game_status(clobber_game))
+    return frames.get(game_id, message, encoding)
+
+
+async def notify(game_id: str, color: str, payload: dict):
+    socket = game_rooms.get(game_id, {}).get(color)
+    if socket:
+        await socket.send_text(json.dumps(payload))
+    else:
+        await room_bus.publish(game_id, json.dumps({
+            "origin": WORKER_ID, "type": "notice", "color": color, "payload": payload
+        }))
+
+
+async def on_room_message(game_id: str, data: str):
+    event = json.loads(data)
+    if event["origin"] == WORKER_ID:
+        return
+    if event["type"] == "state":
+        await load_game_dump(game_id, event["state"])
+        await broadcast_game_state(game_id, await get_or_create_game(game_id))
+    elif event["type"] == "notice":
+        socket = game_rooms.get(game_id, {}).get(event["color"])
+        if socket:
+            await socket.send_text(json.dumps(event["payload"]))
+
+
+async def open_room(game_id: str):
+    clobber_game = await sync_game(game_id)
+    if game_id not in ai_opponents:
+        ai = await room_bus.get(f"{game_id}:ai")
+        if ai is not None:
+            ai_opponents[game_id] = json.loads(ai)
+
     current_turn = "black" if clobber_game.current_player == Piece.BLACK else "white"
-    legal_moves = format_legal_moves(clobber_game.get_legal_moves())
-    is_terminal = clobber_game.is_terminal()
+    game_rooms[game_id] = {"black": None, "white": None, "current_turn": current_turn}
+    room_bus.subscribe(game_id, lambda data: on_room_message(game_id, data))
 
-    if game_id in game_rooms:
-        game_rooms[game_id]["current_turn"] = current_turn
 
+async def claim_seat(game_id: str, color: str, websocket: WebSocket) -> bool:
+    if game_rooms[game_id][color] is not None or ai_opponents.get(game_id, {}).get("color") == color:
+        return False
+    if not await room_bus.claim(f"{game_id}:seat:{color}", WORKER_ID):
+        return False
+    game_rooms[game_id][color] = websocket
+    return True
+
+
+async def release_seat(game_id: str, color: str):
     if game_id in game_rooms:
-        for role, conn in game_rooms[game_id].items():
-            if role != "current_turn" and conn:
-                try:
-                    game_state = {
-                        "board": [[piece.value for piece in row] for row in board],
-                        "turn": current_turn,
-                        "legalMoves": legal_moves,
-                        "isTerminal": is_terminal,
-                        "status": "move made"
-                    }
-                    await conn.send_text(json.dumps(game_state))
-                except Exception as e:
-                    print(f"Error sending update to {role} player: {e}")
+        game_rooms[game_id][color] = None
+    await room_bus.release(f"{game_id}:seat:{color}")
 
 
-def parse_move(move_data):
-    from_pos = move_data.get("from")
-    to_pos = move_data.get("to")
+async def play_ai_move(game_id: str):
+    clobber_game = await sync_game(game_id)
+    ai = ai_opponents[game_id]
+    ai_piece = Piece.BLACK if ai["color"] == "black" else Piece.WHITE
 
-    if not from_pos or not to_pos:
-        return None
+    if clobber_game.current_player != ai_piece or clobber_game.is_terminal():
+        return
 
-    def algebraic_to_coords(algebraic):
-        col = ord(algebraic[0]) - ord('a')
-        row = 5 - (int(algebraic[1]) - 1)
-        return (col, row)
+    move = await engine_pool.compute_move("clobber", clobber_game, ai["spec"], ai["deadline"])
+    if move is not None and clobber_game.find_legal_move(move) is not None:
+        apply_move(game_id, clobber_game, move)
+        await update_game_state(game_id, clobber_game)
 
-    from_coords = algebraic_to_coords(from_pos)
-    to_coords = algebraic_to_coords(to_pos)
 
-    return Move(from_coords, to_coords)
+def schedule_ai_move(game_id: str):
+    if game_id not in ai_opponents:
+        return
+    task = ai_tasks.get(game_id)
+    if task is None or task.done():
+        ai_tasks[game_id] = asyncio.create_task(play_ai_move(game_id))
+
+
+def cancel_ai_move(game_id: str):
+    task = ai_tasks.pop(game_id, None)
+    if task is not None:
+        task.cancel()
+
+
+def parse_move(move_data, height: int = 6):
+    code = from_algebraic(move_data, height, row_major=False)
+    return Move.from_packed(code) if code is not None else None
+
+
+async def watch_game(websocket: WebSocket, game_id: str):
+    if websocket in wire_formats:
+        await websocket.send_text(wire.hello(wire_formats[websocket], "spectator"))
+    spectator = SpectatorQueue(websocket)
+    spectator.start()
+    spectators.setdefault(game_id, set()).add(spectator)
+
+    try:
+        clobber_game = await sync_game(game_id)
+        spectator.offer(full_state_frame(game_id, clobber_game, websocket, color="spectator"))
+
+        while True:
+            message = json.loads(await websocket.receive_text())
+            if message.get('action') in ('get_board', 'resync'):
+                clobber_game = await sync_game(game_id)
+                spectator.offer(full_state_frame(game_id, clobber_game, websocket))
+            else:
+                spectator.offer(json.dumps({"error": "Spectators cannot make moves"}))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        metrics.ERRORS.inc("spectator")
+        logger.warning("Error in spectator connection: %s", e)
+    finally:
+        spectator.stop()
+        wire_formats.pop(websocket, None)
+        watchers = spectators.get(game_id)
+        if watchers is not None:
+            watchers.discard(spectator)
+            if not watchers:
+                del spectators[game_id]
 
 
 @app.websocket("/ws/{game_id}")
-async def websocket_endpoint(websocket: WebSocket, game_id: str):
+async def websocket_endpoint(websocket: WebSocket, game_id: str, role: Optional[str] = None,
+                             protocol: Optional[int] = None, encoding: Optional[str] = None):
     await websocket.accept()
+    metrics.CONNECTIONS.inc("clobber", "spectator" if role == "spectator" else "player")
+    negotiated = wire.negotiate(protocol, encoding)
+    if negotiated is not None:
+        wire_formats[websocket] = negotiated
 
     if game_id not in game_rooms:
-        game_rooms[game_id] = {"black": None, "white": None, "current_turn": "black"}
+        await open_room(game_id)
+
+    if role == "spectator":
+        await watch_game(websocket, game_id)
+        return
 
     player_color = None
-    if game_rooms[game_id]["black"] is None:
-        game_rooms[game_id]["black"] = websocket
+    if await claim_seat(game_id, "black", websocket):
         player_color = "black"
-    elif game_rooms[game_id]["white"] is None:
-        game_rooms[game_id]["white"] = websocket
+    elif await claim_seat(game_id, "white", websocket):
         player_color = "white"
     else:
-        await websocket.send_text(json.dumps({"error": "Game room is full"}))
-        await websocket.close()
+        await watch_game(websocket, game_id)
         return
 
     active_connections[websocket] = {"game_id": game_id, "color": player_color}
 
     try:
-        clobber_game = await get_or_create_game(game_id)
+        clobber_game = await sync_game(game_id)
         current_turn = game_rooms[game_id]["current_turn"]
-        clobber_game.current_player = Piece.BLACK if current_turn == "black" else Piece.WHITE
-        legal_moves = format_legal_moves(clobber_game.get_legal_moves())
-        board = clobber_game.get_board()
-
-        await websocket.send_text(json.dumps({
-            "board": [[piece.value for piece in row] for row in board],
-            "turn": current_turn,
-            "color": player_color,
-            "legalMoves": legal_moves,
-            "isTerminal": clobber_game.is_terminal()
-        }))
+        room_player = Piece.BLACK if current_turn == "black" else Piece.WHITE
+        if clobber_game.current_player != room_player:
+            clobber_game.current_player = room_player
+            snapshots.invalidate(game_id)
+
+        if websocket in wire_formats:
+            await websocket.send_text(wire.hello(wire_formats[websocket], player_color))
+        await send_frame(websocket, full_state_frame(game_id, clobber_game, websocket, color=player_color))
+        schedule_ai_move(game_id)
 
         while True:
             data = await websocket.receive_text()
             message = json.loads(data)
+            await room_bus.touch(f"{game_id}:seat:{player_color}", *room_keys(game_id))
 
-            if message['action'] == 'get_board':
-                clobber_game = await get_or_create_game(game_id)
-                current_turn = "black" if clobber_game.current_player == Piece.BLACK else "white"
-                legal_moves = format_legal_moves(clobber_game.get_legal_moves())
-                board = clobber_game.get_board()
-
-                await websocket.send_text(json.dumps({
-                    "board": [[piece.value for piece in row] for row in board],
-                    "turn": current_turn,
-                    "legalMoves": legal_moves,
-                    "isTerminal": clobber_game.is_terminal()
-                }))
+            action = metrics.action_label(message.get('action'))
+            metrics.MESSAGES.inc("clobber", action)
+            with metrics.MESSAGE_LATENCY.time("clobber", action):
+                if message['action'] in ('get_board', 'resync'):
+                    clobber_game = await sync_game(game_id)
+                    await send_frame(websocket, full_state_frame(game_id, clobber_game, websocket))
 
-            elif message['action'] == 'make_move':
-                clobber_game = await get_or_create_game(game_id)
-                current_turn = "black" if clobber_game.current_player == Piece.BLACK else "white"
+                elif message['action'] == 'make_move':
+                    clobber_game = await sync_game(game_id)
+                    current_turn = "black" if clobber_game.current_player == Piece.BLACK else "white"
 
-                player_piece = Piece.BLACK if player_color == "black" else Piece.WHITE
+                    player_piece = Piece.BLACK if player_color == "black" else Piece.WHITE
 
-                if clobber_game.current_player == player_piece:
-                    move_data = message.get("move")
-                    move = parse_move(move_data)
+                    if clobber_game.current_player == player_piece:
+                        move_data = message.get("move")
+                        move = parse_move(move_data, clobber_game.height)
 
-                    if not move:
-                        await websocket.send_text(json.dumps({
-                            "error": "Invalid move format",
-                            "board": [[piece.value for piece in row] for row in clobber_game.get_board()],
-                            "turn": current_turn
-                        }))
-                        continue
+                        if not move:
+                            await websocket.send_text(json.dumps({
+                                "error": "Invalid move format",
+                                "board": [[piece.value for piece in row] for row in clobber_game.get_board()],
+                                "turn": current_turn
+                            }))
+                            continue
 
-                    legal_moves = clobber_game.get_legal_moves()
-                    is_legal = False
+                        legal_move = clobber_game.find_legal_move(move)
 
-                    for legal_move in legal_moves:
-                        if legal_move.from_pos == move.from_pos and legal_move.to_pos == move.to_pos:
-                            is_legal = True
+                        if legal_move is not None:
                             move = legal_move
-                            break
-
-                    if is_legal:
-                        clobber_game.make_move(move)
-                        await update_game_state(game_id, clobber_game)
+                            apply_move(game_id, clobber_game, move)
+                            await update_game_state(game_id, clobber_game)
+                            schedule_ai_move(game_id)
+                        else:
+                            await websocket.send_text(json.dumps({
+                                "error": "Illegal move",
+                                "board": [[piece.value for piece in row] for row in clobber_game.get_board()],
+                                "turn": current_turn
+                            }))
                     else:
                         await websocket.send_text(json.dumps({
-                            "error": "Illegal move",
+                            "error": "Not your turn",
                             "board": [[piece.value for piece in row] for row in clobber_game.get_board()],
                             "turn": current_turn
                         }))
-                else:
-                    await websocket.send_text(json.dumps({
-                        "error": "Not your turn",
-                        "board": [[piece.value for piece in row] for row in clobber_game.get_board()],
-                        "turn": current_turn
-                    }))
-
-            elif message['action'] == 'join_game':
-                opponent_color = "black" if player_color == "white" else "white"
-                opponent_socket = game_rooms[game_id].get(opponent_color)
-
-                if opponent_socket:
-                    await opponent_socket.send_text(json.dumps({
+
+                elif message['action'] == 'join_game':
+                    opponent_color = "black" if player_color == "white" else "white"
+                    await notify(game_id, opponent_color, {
                         "status": f"Player {player_color} joined the game",
                         "opponent_joined": True
-                    }))
+                    })
 
     except WebSocketDisconnect:
+        metrics.DISCONNECTIONS.inc("clobber")
+        cancel_ai_move(game_id)
         if websocket in active_connections:
             game_info = active_connections[websocket]
-            if game_info["game_id"] in game_rooms:
-                game_rooms[game_info["game_id"]][game_info["color"]] = None
-
-                opponent_color = "black" if player_color == "white" else "white"
-                opponent_socket = game_rooms[game_id].get(opponent_color)
+            await release_seat(game_info["game_id"], game_info["color"])
 
-                if opponent_socket:
-                    try:
-                        await opponent_socket.send_text(json.dumps({
-                            "status": f"Player {player_color} disconnected",
-                            "opponent_disconnected": True
-                        }))
-                    except Exception:
-                        pass
+            opponent_color = "black" if player_color == "white" else "white"
+            try:
+                await notify(game_id, opponent_color, {
+                    "status": f"Player {player_color} disconnected",
+                    "opponent_disconnected": True
+                })
+            except Exception:
+                pass
 
             del active_connections[websocket]
+        wire_formats.pop(websocket, None)
     except Exception as e:
+        metrics.ERRORS.inc("player")
+        logger.warning("Error in WebSocket connection: %s", e)
+        cancel_ai_move(game_id)
         if websocket in active_connections:
             game_info = active_connections[websocket]
-            if game_info["game_id"] in game_rooms:
-                game_rooms[game_info["game_id"]][game_info["color"]] = None
+            await release_seat(game_info["game_id"], game_info["color"])
             del active_connections[websocket]
+        wire_formats.pop(websocket, None)
 
 
 @app.get("/new_game/")
-async def new_game():
+async def new_game(ai: Optional[str] = None, ai_color: str = "white", depth: int = 3,
+                   think_time: float = 1.0, deadline: float = 10.0, height: int = 6, width: int = 6):
+    if ai is not None and ai not in AI_ENGINES:
+        return JSONResponse(status_code=400, content={"error": f"Unknown engine: {ai}"})
+    if ai_color not in ("black", "white"):
+        return JSONResponse(status_code=400, content={"error": f"Unknown color: {ai_color}"})
+    if not 1 <= depth <= engine_pool.MAX_DEPTH:
+        return JSONResponse(status_code=400, content={"error": f"depth must be between 1 and {engine_pool.MAX_DEPTH}"})
+    if not 0 < think_time <= engine_pool.MAX_THINK_TIME:
+        return JSONResponse(status_code=400,
+                            content={"error": f"think_time must be between 0 and {engine_pool.MAX_THINK_TIME} seconds"})
+    if not 0 < deadline <= engine_pool.MAX_DEADLINE:
+        return JSONResponse(status_code=400,
+                            content={"error": f"deadline must be between 0 and {engine_pool.MAX_DEADLINE} seconds"})
+    if not (1 <= height <= MAX_BOARD_SIZE and 1 <= width <= MAX_BOARD_SIZE):
+        return JSONResponse(status_code=400, content={"error": f"Board size must be between 1 and {MAX_BOARD_SIZE}"})
+
     game_id = str(uuid.uuid4())
-    await get_or_create_game(game_id)
+    game_store.replace(game_id, new_clobber(height, width), [])
+
+    if ai is not None:
+        ai_opponents[game_id] = {
+            "color": ai_color,
+            "spec": {"engine": ai, "depth": depth, "think_time": think_time},
+            "deadline": deadline
+        }
+        await room_bus.set(f"{game_id}:ai", json.dumps(ai_opponents[game_id]))
     return JSONResponse(content={"game_id": game_id})
 
 
+async def evict_idle_games():
+    while True:
+        await asyncio.sleep(EVICTION_INTERVAL)
+        game_store.evict_idle()
+
+
+@app.on_event("startup")
+async def startup():
+    metrics.enable_from_env()
+    await room_bus.connect()
+    asyncio.create_task(evict_idle_games())
+
+
+@app.post("/analyse/")
+async def analyse(request: Request):
+    try:
+        body = await request.json()
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "Invalid JSON"})
+
+    error = analysis.validate_request(body, ANALYSIS_ENGINES, "clobber")
+    if error is not None:
+        return JSONResponse(status_code=400, content={"error": error})
+
+    lines = analysis.analyse_batch("clobber", body["positions"], body.get("engine", {}), body.get("budget", 1.0))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    for game_id in list(ai_tasks):
+        cancel_ai_move(game_id)
+    engine_pool.shutdown()
+    game_store.close()
+    await asyncio.gather(*room_cleanups, return_exceptions=True)
+    await room_bus.close()
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/stats/")
+async def stats():
+    return {
+        "games": await game_store.fetch_metrics(),
+        "rooms": len(game_rooms),
+        "connections": len(active_connections),
+        "bytes_sent": frames.bytes_sent
+    }
+
+
 @app.get("/")
 async def root():
     return {"message": "Clobber API is running"} 
@@ -0,0 +1,158 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+from agents.mcts import MCTS
+from agents.minmax import MinMax
+from chess.chess_state import Chess
+from chess.chess_strategy import AdaptiveChessStrategy
+from clobber.sparse import clobber_from_canonical
+from clobber.clobber_strategy import NaiveStrategy
+from general.agent import Agent
+from general.enums import Piece
+from general.game import GameState
+from general.move import Move
+from api import metrics
+import asyncio
+import logging
+import math
+import os
+import random
+import time
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+POOL_SIZE = os.cpu_count() or 1
+THINK_TIME_SHARE = 0.8
+MAX_DEPTH = 8
+MAX_THINK_TIME = 30.0
+MAX_DEADLINE = 60.0
+
+logger = logging.getLogger(__name__)
+
+MoveTuple = Tuple[Tuple[int, int], Tuple[int, int], Optional[str]]
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=POOL_SIZE, initializer=metrics.set_enabled,
+                                        initargs=(False,))
+    return _executor
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def encode_state(game_type: str, state: GameState) -> str:
+    if game_type == "chess":
+        return state.get_fen()
+    return state.to_canonical()
+
+
+def decode_state(game_type: str, position: str) -> GameState:
+    if game_type == "chess":
+        return Chess(position)
+    return clobber_from_canonical(position)
+
+
+def build_agent(game_type: str, spec: dict, player: Piece, think_time: Optional[float]) -> Agent:
+    engine = spec.get("engine", "minmax")
+
+    if engine == "mcts":
+        simulation_time = spec.get("think_time", 1.0)
+        if think_time is not None:
+            simulation_time = min(simulation_time, think_time)
+        return MCTS(player, simulation_time=simulation_time)
+
+    if engine == "minmax":
+        if game_type == "chess":
+            strategy = AdaptiveChessStrategy()
+        else:
+            strategy = NaiveStrategy()
+        return MinMax(player, min(spec.get("depth", 3), MAX_DEPTH), strategy, time_limit=think_time)
+
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+def search_nodes(agent: Agent) -> int:
+    if isinstance(agent, MinMax):
+        return agent.nodes_visited
+    if isinstance(agent, MCTS):
+        return agent.simulations
+    return 0
+
+
+def _choose_move(game_type: str, position: str, spec: dict,
+                 think_time: float) -> Tuple[Optional[MoveTuple], int, float]:
+    state = decode_state(game_type, position)
+    agent = build_agent(game_type, spec, state.get_current_player(), think_time)
+    started = time.perf_counter()
+    move = agent.choose_move(state)
+    elapsed = time.perf_counter() - started
+    if move is None:
+        return None, search_nodes(agent), elapsed
+    return (move.from_pos, move.to_pos, move.prom), search_nodes(agent), elapsed
+
+
+def analyse_position(game_type: str, position: str, spec: dict, think_time: float) -> dict:
+    state = decode_state(game_type, position)
+    agent = build_agent(game_type, spec, state.get_current_player(), think_time)
+    started = time.perf_counter()
+    move = agent.choose_move(state)
+    elapsed = time.perf_counter() - started
+
+    score = getattr(agent, "last_score", None)
+    return {
+        "best_move": None if move is None else {"from": move.from_pos, "to": move.to_pos, "promotion": move.prom},
+        "score": score if score is not None and math.isfinite(score) else None,
+        "nodes": search_nodes(agent),
+        "time": round(elapsed, 4)
+    }
+
+
+def evaluate_positions(game_type: str, positions: Sequence[str]) -> List[dict]:
+    strategy = AdaptiveChessStrategy() if game_type == "chess" else NaiveStrategy()
+    started = time.perf_counter()
+    scores = strategy.evaluate_batch([decode_state(game_type, position) for position in positions])
+    elapsed = (time.perf_counter() - started) / max(len(positions), 1)
+    return [{"best_move": None, "score": score if math.isfinite(score) else None, "nodes": 1,
+             "time": round(elapsed, 6)} for score in scores]
+
+
+def _random_move(state: GameState) -> Optional[MoveTuple]:
+    legal_moves = state.get_legal_moves()
+    if not legal_moves:
+        return None
+    move = random.choice(legal_moves)
+    return move.from_pos, move.to_pos, move.prom
+
+
+async def compute_move(game_type: str, state: GameState, spec: dict, deadline: float) -> Optional[Move]:
+    loop = asyncio.get_running_loop()
+    engine = spec.get("engine", "minmax")
+    started = time.perf_counter()
+    position = encode_state(game_type, state)
+    future = loop.run_in_executor(get_executor(), _choose_move, game_type, position, spec,
+                                  deadline * THINK_TIME_SHARE)
+
+    try:
+        result, nodes, elapsed = await asyncio.wait_for(future, timeout=deadline)
+        if elapsed > 0:
+            metrics.ENGINE_NODES_PER_SECOND.set(nodes / elapsed, game_type, engine)
+    except asyncio.TimeoutError:
+        logger.warning("Engine %s missed the %ss deadline, playing a random move", engine, deadline)
+        metrics.ENGINE_FALLBACKS.inc(game_type, engine)
+        result = _random_move(state)
+    except Exception as e:
+        logger.warning("Engine %s failed: %s", engine, e)
+        metrics.ENGINE_FALLBACKS.inc(game_type, engine)
+        result = _random_move(state)
+    metrics.ENGINE_THINK_TIME.observe(time.perf_counter() - started, game_type, engine)
+
+    if result is None:
+        return None
+    from_pos, to_pos, prom = result
+    return Move(tuple(from_pos), tuple(to_pos), prom)
@@ -0,0 +1,187 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from general.game import GameState
+from general.move import Move
+from api.engine_pool import decode_state, encode_state
+import asyncio
+import json
+import sqlite3
+import time
+
+
+class GameStore:
+    def __init__(self, game_type: str, factory: Callable[[], GameState], db_path: str = 'games.sqlite3',
+                 max_resident: int = 1000, idle_ttl: float = 1800.0,
+                 is_active: Callable[[str], bool] = lambda game_id: False,
+                 on_evict: Optional[Callable[[str], dict]] = None,
+                 on_load: Optional[Callable[[str, dict], None]] = None):
+        self.game_type = game_type
+        self.factory = factory
+        self.max_resident = max_resident
+        self.idle_ttl = idle_ttl
+        self.is_active = is_active
+        self.on_evict = on_evict
+        self.on_load = on_load
+
+        self.games: 'OrderedDict[str, GameState]' = OrderedDict()
+        self.last_access: Dict[str, float] = {}
+        self.moves: Dict[str, List[list]] = {}
+
+        self.evictions = 0
+        self.rehydrations = 0
+
+        # Cala praca na sqlite idzie przez jeden watek: petla zdarzen nie czeka na dysk,
+        # a zapisy i odczyty wykonuja sie w kolejnosci zlecenia
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{game_type}-store")
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self._call(self._create_table)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self.games or self._call(self._load_row, game_id) is not None
+
+    def get(self, game_id: str) -> Optional[GameState]:
+        if game_id not in self.games:
+            return self._rehydrate(game_id, self._call(self._take_row, game_id))
+        self._touch(game_id)
+        return self.games[game_id]
+
+    async def fetch(self, game_id: str) -> Optional[GameState]:
+        if game_id not in self.games:
+            row = await asyncio.wrap_future(self.executor.submit(self._take_row, game_id))
+            if game_id not in self.games:
+                return self._rehydrate(game_id, row)
+        self._touch(game_id)
+        return self.games[game_id]
+
+    def get_or_create(self, game_id: str) -> GameState:
+        game = self.get(game_id)
+        return game if game is not None else self._create(game_id)
+
+    async def fetch_or_create(self, game_id: str) -> GameState:
+        game = await self.fetch(game_id)
+        return game if game is not None else self._create(game_id)
+
+    def replace(self, game_id: str, game: GameState, moves: List[list]):
+        self.games[game_id] = game
+        self.moves[game_id] = moves
+        self._touch(game_id)
+        self._enforce_capacity()
+
+    def sequence(self, game_id: str) -> int:
+        return len(self.moves.get(game_id, ()))
+
+    def record_move(self, game_id: str, move: Move):
+        self.moves.setdefault(game_id, []).append([list(move.from_pos), list(move.to_pos), move.prom])
+        self._touch(game_id)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        idle = [game_id for game_id, seen in self.last_access.items()
+                if now - seen > self.idle_ttl and not self.is_active(game_id)]
+        for game_id in idle:
+            self.evict(game_id)
+        return len(idle)
+
+    def evict(self, game_id: str):
+        game = self.games.pop(game_id, None)
+        if game is None:
+            return
+        meta = self.on_evict(game_id) if self.on_evict is not None else {}
+        row = (game_id, self.game_type, encode_state(self.game_type, game),
+               json.dumps(self.moves.pop(game_id, [])), json.dumps(meta or {}), time.time())
+        self.executor.submit(self._store_row, row)
+        self.last_access.pop(game_id, None)
+        self.evictions += 1
+
+    def metrics(self) -> dict:
+        return self._metrics(self._call(self._count_rows))
+
+    async def fetch_metrics(self) -> dict:
+        return self._metrics(await asyncio.wrap_future(self.executor.submit(self._count_rows)))
+
+    def close(self):
+        # Przy zamykaniu celowo wyrzucamy wszystkie gry, a nie tylko je zapisujemy: on_evict zbiera
+        # metadane (np. przeciwnika AI), ktore musza trafic do bazy, a pokoje i tak sa zamykane.
+        # Po restarcie lub w innym workerze gry wracaja z bazy przy pierwszym dostepie.
+        for game_id in list(self.games):
+            self.evict(game_id)
+        self.executor.shutdown(wait=True)
+        self.db.close()
+
+    def _metrics(self, persisted: int) -> dict:
+        return {
+            "resident": len(self.games),
+            "persisted": persisted,
+            "evictions": self.evictions,
+            "rehydrations": self.rehydrations,
+            "max_resident": self.max_resident
+        }
+
+    def _call(self, fn: Callable, *args):
+        return self.executor.submit(fn, *args).result()
+
+    def _create(self, game_id: str) -> GameState:
+        game = self.factory()
+        self.games[game_id] = game
+        self.moves[game_id] = []
+        self._touch(game_id)
+        self._enforce_capacity()
+        return game
+
+    def _touch(self, game_id: str):
+        self.last_access[game_id] = time.monotonic()
+        self.games.move_to_end(game_id)
+
+    def _enforce_capacity(self):
+        if len(self.games) <= self.max_resident:
+            return
+        for game_id in list(self.games)[:-1]:
+            if len(self.games) <= self.max_resident:
+                break
+            if not self.is_active(game_id):
+                self.evict(game_id)
+
+    def _create_table(self):
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            "game_id TEXT PRIMARY KEY, game_type TEXT NOT NULL, position TEXT NOT NULL, "
+            "moves TEXT NOT NULL, meta TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def _store_row(self, row: tuple):
+        self.db.execute(
+            "INSERT OR REPLACE INTO games (game_id, game_type, position, moves, meta, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?)", row
+        )
+        self.db.commit()
+
+    def _count_rows(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM games WHERE game_type = ?", (self.game_type,)).fetchone()[0]
+
+    def _load_row(self, game_id: str):
+        return self.db.execute("SELECT position, moves, meta FROM games WHERE game_id = ? AND game_type = ?",
+                               (game_id, self.game_type)).fetchone()
+
+    def _take_row(self, game_id: str):
+        row = self._load_row(game_id)
+        if row is not None:
+            self.db.execute("DELETE FROM games WHERE game_id = ?", (game_id,))
+            self.db.commit()
+        return row
+
+    def _rehydrate(self, game_id: str, row) -> Optional[GameState]:
+        if row is None:
+            return None
+        position, moves, meta = row
+        game = decode_state(self.game_type, position)
+
+        self.games[game_id] = game
+        self.moves[game_id] = json.loads(moves)
+        self.rehydrations += 1
+        if self.on_load is not None:
+            self.on_load(game_id, json.loads(meta))
+        self._touch(game_id)
+        self._enforce_capacity()
+        return game
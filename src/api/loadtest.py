@@ -0,0 +1,219 @@
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+from urllib.request import urlopen
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "clobber": {"game": "clobber", "pairs": 50, "spectators": 0, "params": {}},
+    "clobber-large": {"game": "clobber", "pairs": 20, "spectators": 0, "params": {"height": 20, "width": 20}},
+    "chess": {"game": "chess", "pairs": 50, "spectators": 0, "params": {}},
+    "spectators": {"game": "clobber", "pairs": 5, "spectators": 50, "params": {}},
+}
+
+MAX_PLIES = 200
+MEMORY_SAMPLE_INTERVAL = 0.5
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_memory_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def start_server(game: str, port: int, workdir: str) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', f'api.{game}_api:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=workdir, env=env
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float = 30.0):
+    end_time = time.time() + timeout
+    while time.time() < end_time:
+        try:
+            with urlopen(f"{base_url}/", timeout=1.0):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server at {base_url} did not start in {timeout}s")
+
+
+def new_game(base_url: str, params: dict) -> str:
+    with urlopen(f"{base_url}/new_game/?{urlencode(params)}") as response:
+        return json.loads(response.read())["game_id"]
+
+
+class LoadStats:
+    def __init__(self):
+        self.round_trips: List[float] = []
+        self.moves = 0
+        self.messages = 0
+        self.errors = 0
+        self.games_finished = 0
+        self.spectator_frames = 0
+        self.peak_memory_kb = 0
+
+    def summary(self, duration: float) -> Dict[str, float]:
+        return {
+            "duration_s": round(duration, 2),
+            "games_finished": self.games_finished,
+            "moves": self.moves,
+            "moves_per_s": round(self.moves / duration, 1) if duration > 0 else 0.0,
+            "messages_per_s": round(self.messages / duration, 1) if duration > 0 else 0.0,
+            "rtt_p50_ms": round(percentile(self.round_trips, 0.5) * 1000, 2),
+            "rtt_p99_ms": round(percentile(self.round_trips, 0.99) * 1000, 2),
+            "errors": self.errors,
+            "spectator_frames": self.spectator_frames,
+            "peak_server_rss_kb": self.peak_memory_kb
+        }
+
+
+def is_finished(state: dict) -> bool:
+    return bool(state.get("isTerminal")) or state.get("gameState") in ("checkmate", "stalemate")
+
+
+async def play(ws_url: str, stats: LoadStats, rng: random.Random):
+    async with websockets.connect(ws_url) as ws:
+        state = json.loads(await ws.recv())
+        color = state.get("color")
+        sent_at = None
+        plies = 0
+
+        while not is_finished(state) and plies < MAX_PLIES:
+            if state.get("turn") == color and state.get("legalMoves") and sent_at is None:
+                sent_at = time.perf_counter()
+                await ws.send(json.dumps({"action": "make_move", "move": rng.choice(state["legalMoves"])}))
+
+            message = json.loads(await ws.recv())
+            stats.messages += 1
+            if "error" in message:
+                stats.errors += 1
+                sent_at = None
+                await ws.send(json.dumps({"action": "get_board"}))
+                continue
+            if "legalMoves" not in message:
+                continue
+
+            state = message
+            if message.get("status") == "move made":
+                plies += 1
+                if sent_at is not None:
+                    stats.round_trips.append(time.perf_counter() - sent_at)
+                    stats.moves += 1
+                    sent_at = None
+
+        if color == "black":
+            stats.games_finished += 1
+
+
+async def watch(ws_url: str, stats: LoadStats):
+    async with websockets.connect(ws_url) as ws:
+        async for _ in ws:
+            stats.spectator_frames += 1
+
+
+async def sample_memory(pid: int, stats: LoadStats):
+    while True:
+        memory = server_memory_kb(pid)
+        if memory is not None:
+            stats.peak_memory_kb = max(stats.peak_memory_kb, memory)
+        await asyncio.sleep(MEMORY_SAMPLE_INTERVAL)
+
+
+async def run_load(base_url: str, scenario: dict, pid: Optional[int] = None, seed: int = 0) -> Dict[str, float]:
+    loop = asyncio.get_running_loop()
+    stats = LoadStats()
+    rng = random.Random(seed)
+    ws_base = base_url.replace("http://", "ws://", 1)
+
+    game_ids = [await loop.run_in_executor(None, new_game, base_url, scenario["params"])
+                for _ in range(scenario["pairs"])]
+
+    watchers = [asyncio.create_task(watch(f"{ws_base}/ws/{game_id}?role=spectator", stats))
+                for game_id in game_ids for _ in range(scenario["spectators"])]
+    sampler = asyncio.create_task(sample_memory(pid, stats)) if pid is not None else None
+
+    started = time.perf_counter()
+    await asyncio.gather(*(play(f"{ws_base}/ws/{game_id}", stats, random.Random(rng.random()))
+                           for game_id in game_ids for _ in range(2)))
+    duration = time.perf_counter() - started
+
+    for task in watchers + ([sampler] if sampler is not None else []):
+        task.cancel()
+    await asyncio.gather(*watchers, return_exceptions=True)
+    return stats.summary(duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated-player load test for the game APIs")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--pairs", type=int)
+    parser.add_argument("--spectators", type=int)
+    parser.add_argument("--url", help="Use a running server instead of starting one")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if websockets is None:
+        raise SystemExit("The load test needs the 'websockets' package")
+
+    scenario = dict(SCENARIOS[args.scenario])
+    if args.pairs is not None:
+        scenario["pairs"] = args.pairs
+    if args.spectators is not None:
+        scenario["spectators"] = args.spectators
+
+    server = None
+    base_url = args.url
+    with tempfile.TemporaryDirectory() as workdir:
+        if base_url is None:
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = start_server(scenario["game"], port, workdir)
+        try:
+            wait_until_ready(base_url)
+            result = asyncio.run(run_load(base_url, scenario, server.pid if server else None, args.seed))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    print(json.dumps({"scenario": args.scenario, **scenario, **result}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+from general.metrics import Counter, Gauge, Histogram, render, set_enabled
+import os
+
+ACTIONS = ("get_board", "resync", "make_move", "join_game")
+
+MESSAGE_LATENCY = Histogram('api_message_handling_seconds', 'Time spent handling one WebSocket message',
+                            ('game', 'action'))
+MESSAGES = Counter('api_messages_total', 'WebSocket messages received', ('game', 'action'))
+CONNECTIONS = Counter('api_connections_total', 'WebSocket connections accepted', ('game', 'role'))
+DISCONNECTIONS = Counter('api_disconnections_total', 'WebSocket connections closed', ('game',))
+
+ACTIVE_ROOMS = Gauge('api_active_rooms', 'Rooms held by this worker', ('game',))
+ACTIVE_CONNECTIONS = Gauge('api_active_connections', 'Seated player connections', ('game',))
+BROADCAST_QUEUE_DEPTH = Gauge('api_broadcast_queue_depth', 'Frames waiting in spectator queues', ('game',))
+
+ENGINE_THINK_TIME = Histogram('engine_think_seconds', 'Wall time until an engine move was available',
+                              ('game', 'engine'), buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+ENGINE_FALLBACKS = Counter('engine_fallbacks_total', 'Engine moves replaced by a random move', ('game', 'engine'))
+ERRORS = Counter('api_errors_total', 'Exceptions caught on connection, broadcast and room bus paths', ('source',))
+ENGINE_NODES_PER_SECOND = Gauge('engine_nodes_per_second', 'Search speed of the last engine move',
+                                ('game', 'engine'))
+
+
+def action_label(action) -> str:
+    return action if action in ACTIONS else "other"
+
+
+def enable_from_env():
+    set_enabled(os.environ.get("API_METRICS", "1") != "0")
@@ -0,0 +1,228 @@
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import urlparse
+from api import metrics
+import asyncio
+import logging
+
+Handler = Callable[[str], Awaitable[None]]
+
+KEY_TTL = 3600
+
+logger = logging.getLogger(__name__)
+
+
+class RoomBus(ABC):
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: str):
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: str):
+        pass
+
+    @abstractmethod
+    async def touch(self, *keys: str):
+        pass
+
+    @abstractmethod
+    async def claim(self, key: str, owner: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def release(self, key: str):
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        pass
+
+    @abstractmethod
+    def subscribe(self, channel: str, handler: Handler):
+        pass
+
+    @abstractmethod
+    def unsubscribe(self, channel: str):
+        pass
+
+
+class LocalRoomBus(RoomBus):
+    def __init__(self):
+        self.values: Dict[str, str] = {}
+        self.handlers: Dict[str, Handler] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: str):
+        self.values[key] = value
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.values.pop(key, None)
+
+    async def touch(self, *keys: str):
+        pass
+
+    async def claim(self, key: str, owner: str) -> bool:
+        if key in self.values:
+            return False
+        self.values[key] = owner
+        return True
+
+    async def release(self, key: str):
+        self.values.pop(key, None)
+
+    async def publish(self, channel: str, message: str):
+        handler = self.handlers.get(channel)
+        if handler is not None:
+            await handler(message)
+
+    def subscribe(self, channel: str, handler: Handler):
+        self.handlers[channel] = handler
+
+    def unsubscribe(self, channel: str):
+        self.handlers.pop(channel, None)
+
+
+class RedisError(Exception):
+    pass
+
+
+def encode_command(*args) -> bytes:
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+    return b''.join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Redis connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b'+':
+        return rest.decode()
+    if kind == b'-':
+        raise RedisError(rest.decode())
+    if kind == b':':
+        return int(rest)
+    if kind == b'$':
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b'*':
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RedisError(f"Unexpected reply: {line!r}")
+
+
+class RedisRoomBus(RoomBus):
+    def __init__(self, host: str = 'localhost', port: int = 6379, prefix: str = 'rooms', ttl: int = KEY_TTL):
+        self.host = host
+        self.port = port
+        self.prefix = prefix
+        self.ttl = ttl
+        self.handlers: Dict[str, Handler] = {}
+
+        self.lock = asyncio.Lock()
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.sub_writer: Optional[asyncio.StreamWriter] = None
+        self.listener: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        sub_reader, self.sub_writer = await asyncio.open_connection(self.host, self.port)
+        self.listener = asyncio.create_task(self._listen(sub_reader))
+        for channel in self.handlers:
+            self.sub_writer.write(encode_command('SUBSCRIBE', self._key(channel)))
+
+    async def close(self):
+        if self.listener is not None:
+            self.listener.cancel()
+        for writer in (self.writer, self.sub_writer):
+            if writer is not None:
+                writer.close()
+        self.writer = self.sub_writer = self.listener = None
+
+    async def execute(self, *args):
+        async with self.lock:
+            self.writer.write(encode_command(*args))
+            await self.writer.drain()
+            return await read_reply(self.reader)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.execute('GET', self._key(key))
+        return value.decode() if value is not None else None
+
+    async def set(self, key: str, value: str):
+        await self.execute('SET', self._key(key), value, 'EX', self.ttl)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.execute('DEL', *(self._key(key) for key in keys))
+
+    async def touch(self, *keys: str):
+        for key in keys:
+            await self.execute('EXPIRE', self._key(key), self.ttl)
+
+    async def claim(self, key: str, owner: str) -> bool:
+        return await self.execute('SET', self._key(key), owner, 'NX', 'EX', self.ttl) is not None
+
+    async def release(self, key: str):
+        await self.execute('DEL', self._key(key))
+
+    async def publish(self, channel: str, message: str):
+        await self.execute('PUBLISH', self._key(channel), message)
+
+    def subscribe(self, channel: str, handler: Handler):
+        if channel not in self.handlers and self.sub_writer is not None:
+            self.sub_writer.write(encode_command('SUBSCRIBE', self._key(channel)))
+        self.handlers[channel] = handler
+
+    def unsubscribe(self, channel: str):
+        if self.handlers.pop(channel, None) is not None and self.sub_writer is not None:
+            self.sub_writer.write(encode_command('UNSUBSCRIBE', self._key(channel)))
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    async def _listen(self, reader: asyncio.StreamReader):
+        offset = len(self.prefix) + 1
+        while True:
+            reply = await read_reply(reader)
+            if not isinstance(reply, list) or reply[0] != b'message':
+                continue
+            handler = self.handlers.get(reply[1].decode()[offset:])
+            if handler is None:
+                continue
+            try:
+                await handler(reply[2].decode())
+            except Exception as e:
+                metrics.ERRORS.inc("room_bus")
+                logger.warning("Error handling room message: %s", e)
+
+
+def create_room_bus(url: Optional[str] = None, prefix: str = 'rooms', ttl: int = KEY_TTL) -> RoomBus:
+    if not url or url == 'memory://':
+        return LocalRoomBus()
+    parsed = urlparse(url)
+    if parsed.scheme != 'redis':
+        raise ValueError(f"Unsupported room bus: {url}")
+    return RedisRoomBus(parsed.hostname or 'localhost', parsed.port or 6379, prefix, ttl)
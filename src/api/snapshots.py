@@ -0,0 +1,46 @@
+from typing import Callable, Dict
+from general.game import GameState
+import json
+
+
+class Snapshot:
+    def __init__(self, version: int, payload: dict):
+        self.version = version
+        self.payload = payload
+        self._encoded: Dict[tuple, str] = {}
+
+    def encode(self, **extra) -> str:
+        key = tuple(sorted(extra.items()))
+        text = self._encoded.get(key)
+        if text is None:
+            text = json.dumps({**self.payload, **extra})
+            self._encoded[key] = text
+        return text
+
+
+class SnapshotCache:
+    def __init__(self, build: Callable[[GameState], dict]):
+        self.build = build
+        self.versions: Dict[str, int] = {}
+        self.snapshots: Dict[str, Snapshot] = {}
+        self.builds = 0
+
+    def get(self, game_id: str, game: GameState) -> Snapshot:
+        version = self.versions.get(game_id, 0)
+        snapshot = self.snapshots.get(game_id)
+        if snapshot is None or snapshot.version != version:
+            snapshot = Snapshot(version, self.build(game))
+            self.snapshots[game_id] = snapshot
+            self.builds += 1
+        return snapshot
+
+    def version(self, game_id: str) -> int:
+        return self.versions.get(game_id, 0)
+
+    def invalidate(self, game_id: str):
+        self.versions[game_id] = self.versions.get(game_id, 0) + 1
+        self.snapshots.pop(game_id, None)
+
+    def discard(self, game_id: str):
+        self.versions.pop(game_id, None)
+        self.snapshots.pop(game_id, None)
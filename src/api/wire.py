@@ -0,0 +1,96 @@
+from typing import Dict, Optional, Tuple, Union
+import json
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PROTOCOL_VERSION = 2
+ENCODINGS = ("json", "msgpack", "packed")
+
+FULL = 1
+DELTA = 2
+
+PROMOTIONS = (None, 'Q', 'R', 'B', 'N')
+STATUSES = ("ongoing", "check", "checkmate", "stalemate", "terminal")
+TURNS = ("white", "black")
+
+DELTA_FORMAT = struct.Struct('<BIBBBBBBB')
+FULL_HEADER = struct.Struct('<BIBB')
+
+Frame = Union[str, bytes]
+
+
+def negotiate(protocol: Optional[int], encoding: Optional[str]) -> Optional[str]:
+    if protocol != PROTOCOL_VERSION:
+        return None
+    if encoding == "msgpack" and msgpack is None:
+        return "packed"
+    return encoding if encoding in ENCODINGS else "json"
+
+
+def hello(encoding: str, color: str) -> str:
+    return json.dumps({"protocol": PROTOCOL_VERSION, "encoding": encoding, "color": color})
+
+
+def full_message(seq: int, position: str, turn: str, status: str) -> dict:
+    return {"type": "full", "seq": seq, "position": position, "turn": turn, "status": status}
+
+
+def delta_message(seq: int, move: list, turn: str, status: str) -> dict:
+    (from_x, from_y), (to_x, to_y), prom = move
+    return {"type": "delta", "seq": seq, "move": [from_x, from_y, to_x, to_y, prom], "turn": turn, "status": status}
+
+
+def encode(message: dict, encoding: str) -> Frame:
+    if encoding == "json":
+        return json.dumps(message, separators=(',', ':'))
+    if encoding == "msgpack":
+        return msgpack.packb(message)
+
+    turn = TURNS.index(message["turn"])
+    status = STATUSES.index(message["status"])
+    if message["type"] == "delta":
+        from_x, from_y, to_x, to_y, prom = message["move"]
+        return DELTA_FORMAT.pack(DELTA, message["seq"], from_x, from_y, to_x, to_y,
+                                 PROMOTIONS.index(prom), turn, status)
+    return FULL_HEADER.pack(FULL, message["seq"], turn, status) + message["position"].encode()
+
+
+def decode(frame: Frame) -> dict:
+    if isinstance(frame, str):
+        return json.loads(frame)
+    if frame[0] == DELTA:
+        _, seq, from_x, from_y, to_x, to_y, prom, turn, status = DELTA_FORMAT.unpack(frame)
+        return delta_message(seq, [(from_x, from_y), (to_x, to_y), PROMOTIONS[prom]], TURNS[turn], STATUSES[status])
+    if frame[0] == FULL:
+        _, seq, turn, status = FULL_HEADER.unpack_from(frame)
+        return full_message(seq, frame[FULL_HEADER.size:].decode(), TURNS[turn], STATUSES[status])
+    return msgpack.unpackb(frame)
+
+
+class FrameCache:
+    def __init__(self):
+        self.frames: Dict[str, Tuple[int, Dict[Tuple[str, str], Frame]]] = {}
+        self.bytes_sent: Dict[str, int] = {}
+
+    def get(self, game_id: str, message: dict, encoding: str) -> Frame:
+        seq, frames = self.frames.get(game_id, (None, None))
+        if seq != message["seq"]:
+            frames = {}
+            self.frames[game_id] = (message["seq"], frames)
+        key = (message["type"], encoding)
+        frame = frames.get(key)
+        if frame is None:
+            frame = encode(message, encoding)
+            frames[key] = frame
+        return frame
+
+    def count(self, encoding: str, frame: Frame):
+        size = len(frame) if isinstance(frame, bytes) else len(frame.encode())
+        self.bytes_sent[encoding] = self.bytes_sent.get(encoding, 0) + size
+
+    def discard(self, game_id: str):
+        self.frames.pop(game_id, None)
@@ -0,0 +1,250 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+from api.engine_pool import build_agent, search_nodes
+from chess.chess_state import Chess
+from clobber.sparse import new_clobber
+from general.enums import Piece
+from general.game import GameState
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+
+MAX_PLIES = 300
+OPENING_PLIES = 4
+
+
+def new_game(game_type: str, height: int = 5, width: int = 5) -> GameState:
+    if game_type == "chess":
+        return Chess()
+    return new_clobber(height, width)
+
+
+def play_opening(state: GameState, plies: int, rng: random.Random):
+    for _ in range(plies):
+        legal_moves = state.get_legal_moves()
+        if not legal_moves or state.is_terminal():
+            return
+        state.make_move(rng.choice(legal_moves))
+
+
+def winner(state: GameState) -> Optional[Piece]:
+    if isinstance(state, Chess):
+        return ~state.current_player if state.is_checkmate() else None
+    return ~state.get_current_player() if state.is_terminal() else None
+
+
+def play_game(game_type: str, specs: Tuple[dict, dict], first: int, seed: int,
+              height: int = 5, width: int = 5, opening_plies: int = OPENING_PLIES) -> dict:
+    rng = random.Random(seed)
+    random.seed(seed)
+    state = new_game(game_type, height, width)
+    play_opening(state, opening_plies, rng)
+
+    to_move = state.get_current_player()
+    seats = {to_move: first, ~to_move: 1 - first}
+    agents = {color: build_agent(game_type, specs[index], color, specs[index].get("think_time"))
+              for color, index in seats.items()}
+    think_time = [0.0, 0.0]
+    nodes = [0, 0]
+    moves = [0, 0]
+
+    plies = 0
+    won = None
+    while not state.is_terminal() and plies < MAX_PLIES:
+        color = state.get_current_player()
+        index = seats[color]
+        started = time.perf_counter()
+        move = agents[color].choose_move(state)
+        think_time[index] += time.perf_counter() - started
+        nodes[index] += search_nodes(agents[color])
+        moves[index] += 1
+        if move is None:
+            won = ~color
+            break
+        state.make_move(move)
+        plies += 1
+    else:
+        won = winner(state)
+
+    score = 0.5 if won is None else (1.0 if seats[won] == 0 else 0.0)
+    return {"score": score, "plies": plies, "think_time": think_time, "nodes": nodes, "moves": moves}
+
+
+class MatchStats:
+    def __init__(self):
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.think_time = [0.0, 0.0]
+        self.nodes = [0, 0]
+        self.moves = [0, 0]
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    def add(self, result: dict):
+        if result["score"] == 1.0:
+            self.wins += 1
+        elif result["score"] == 0.0:
+            self.losses += 1
+        else:
+            self.draws += 1
+        for side in (0, 1):
+            self.think_time[side] += result["think_time"][side]
+            self.nodes[side] += result["nodes"][side]
+            self.moves[side] += result["moves"][side]
+
+    def score(self) -> float:
+        return (self.wins + 0.5 * self.draws) / self.games if self.games else 0.5
+
+    def variance(self) -> float:
+        if not self.games:
+            return 0.0
+        s = self.score()
+        return (self.wins * (1 - s) ** 2 + self.draws * (0.5 - s) ** 2 + self.losses * s ** 2) / self.games
+
+    def elo(self) -> Tuple[float, float, float]:
+        if not self.games:
+            return 0.0, 0.0, 0.0
+        margin = 1.96 * math.sqrt(self.variance() / self.games)
+        s = self.score()
+        return score_to_elo(s), score_to_elo(s - margin), score_to_elo(s + margin)
+
+    def llr(self, elo0: float, elo1: float) -> float:
+        variance = self.variance()
+        if not self.games or variance == 0:
+            return 0.0
+        s0, s1 = elo_to_score(elo0), elo_to_score(elo1)
+        return self.games * (s1 - s0) * (2 * self.score() - s0 - s1) / (2 * variance)
+
+
+def elo_to_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score: float) -> float:
+    score = min(max(score, 1e-3), 1 - 1e-3)
+    return -400 * math.log10(1 / score - 1)
+
+
+def sprt_bounds(alpha: float, beta: float) -> Tuple[float, float]:
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def run_match(game_type: str, specs: List[dict], games: int, height: int = 5, width: int = 5,
+              sprt: Optional[Tuple[float, float, float, float]] = None, workers: Optional[int] = None,
+              seed: int = 0, opening_plies: int = OPENING_PLIES) -> Dict[Tuple[int, int], MatchStats]:
+    pairs = [(0, 1)] if sprt is not None else list(itertools.combinations(range(len(specs)), 2))
+    stats = {pair: MatchStats() for pair in pairs}
+    decided = set()
+
+    jobs = []
+    for pair in pairs:
+        for game in range(games):
+            opening_seed = seed * 1_000_003 + pair[0] * 1009 + pair[1] * 101 + game // 2
+            jobs.append((pair, game % 2, opening_seed))
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        pending = {}
+        queue = iter(jobs)
+
+        def submit():
+            for pair, first, opening_seed in queue:
+                if pair in decided:
+                    continue
+                future = executor.submit(play_game, game_type, (specs[pair[0]], specs[pair[1]]), first,
+                                         opening_seed, height, width, opening_plies)
+                pending[future] = pair
+                return
+
+        for _ in range((workers or os.cpu_count()) * 2):
+            submit()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pair = pending.pop(future)
+                stats[pair].add(future.result())
+                if sprt is not None and sprt_decision(stats[pair], sprt) is not None:
+                    decided.add(pair)
+                    for other in [f for f, p in pending.items() if p == pair]:
+                        other.cancel()
+                        del pending[other]
+                submit()
+
+    return stats
+
+
+def sprt_decision(stats: MatchStats, sprt: Tuple[float, float, float, float]) -> Optional[str]:
+    elo0, elo1, alpha, beta = sprt
+    lower, upper = sprt_bounds(alpha, beta)
+    llr = stats.llr(elo0, elo1)
+    if llr >= upper:
+        return "H1"
+    if llr <= lower:
+        return "H0"
+    return None
+
+
+def report(specs: List[dict], stats: Dict[Tuple[int, int], MatchStats],
+           sprt: Optional[Tuple[float, float, float, float]] = None):
+    names = [spec.get("name", f"agent{index}") for index, spec in enumerate(specs)]
+    totals = {index: [0.0, 0, 0.0, 0, 0] for index in range(len(specs))}
+
+    for (a, b), match in stats.items():
+        elo, low, high = match.elo()
+        print(f"{names[a]} vs {names[b]}: +{match.wins} ={match.draws} -{match.losses} "
+              f"score {match.score():.3f} elo {elo:+.1f} [{low:+.1f}, {high:+.1f}]")
+        if sprt is not None:
+            decision = sprt_decision(match, sprt) or "undecided"
+            lower, upper = sprt_bounds(sprt[2], sprt[3])
+            print(f"  SPRT elo0={sprt[0]} elo1={sprt[1]}: LLR {match.llr(sprt[0], sprt[1]):.2f} "
+                  f"({lower:.2f}, {upper:.2f}) -> {decision}")
+        for side, index in enumerate((a, b)):
+            score = match.wins + 0.5 * match.draws if side == 0 else match.losses + 0.5 * match.draws
+            totals[index][0] += score
+            totals[index][1] += match.games
+            totals[index][2] += match.think_time[side]
+            totals[index][3] += match.nodes[side]
+            totals[index][4] += match.moves[side]
+
+    for index, (score, games, think_time, nodes, moves) in totals.items():
+        win_rate = score / games if games else 0.0
+        per_move = think_time / moves if moves else 0.0
+        nps = nodes / think_time if think_time > 0 else 0.0
+        print(f"{names[index]}: games {games} score {win_rate:.3f} "
+              f"think {per_move * 1000:.1f} ms/move {nps:.0f} nodes/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless arena for MinMax/MCTS agent specs")
+    parser.add_argument("agents", nargs="+", type=json.loads,
+                        help='Agent specs as JSON, e.g. \'{"name": "mm3", "engine": "minmax", "depth": 3}\'')
+    parser.add_argument("--game", choices=("clobber", "chess"), default="clobber")
+    parser.add_argument("--height", type=int, default=5)
+    parser.add_argument("--width", type=int, default=5)
+    parser.add_argument("--games", type=int, default=100, help="Games per pairing (maximum for SPRT)")
+    parser.add_argument("--openings", type=int, default=OPENING_PLIES, help="Random opening plies")
+    parser.add_argument("--sprt", nargs=2, type=float, metavar=("ELO0", "ELO1"))
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if len(args.agents) < 2 or (args.sprt and len(args.agents) != 2):
+        parser.error("Need at least two agents, and exactly two for SPRT")
+    sprt = (args.sprt[0], args.sprt[1], args.alpha, args.beta) if args.sprt else None
+
+    stats = run_match(args.game, args.agents, args.games, args.height, args.width, sprt, args.workers,
+                      args.seed, args.openings)
+    report(args.agents, stats, sprt)
+
+
+if __name__ == '__main__':
+    main()
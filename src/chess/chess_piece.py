@@ -32,3 +32,19 @@ class ChessPiece(Enum):
             if piece.value[0] == char:
                 return piece
         return ChessPiece.EMPTY
+
+
+PIECES = tuple(ChessPiece)
+PIECE_CODES = {piece: code for code, piece in enumerate(PIECES)}
+EMPTY = PIECE_CODES[ChessPiece.EMPTY]
+
+WHITE, BLACK, NO_COLOR = Piece.WHITE.value, Piece.BLACK.value, Piece.EMPTY.value
+PAWN, ROOK, KNIGHT, BISHOP, KING, QUEEN, NO_TYPE = range(7)
+TYPE_LETTERS = 'PRNBKQ.'
+
+PIECE_COLOR = tuple(piece.color.value for piece in PIECES)
+PIECE_TYPE = tuple(TYPE_LETTERS.index(piece.value[0].upper()) for piece in PIECES)
+PIECE_BY_COLOR = tuple(tuple(PIECE_CODES[ChessPiece.from_fen(letter if color == WHITE else letter.lower())]
+                             for letter in TYPE_LETTERS[:NO_TYPE])
+                       for color in (WHITE, BLACK))
+PROMOTION_TYPES = {'Q': QUEEN, 'R': ROOK, 'B': BISHOP, 'N': KNIGHT}
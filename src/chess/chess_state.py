@@ -1,9 +1,10 @@
 from chess.move_generator import MoveGenerator
 from general.game import GameState
-from general.move import Move
+from general.move import Move, move_from, move_promotion, move_to
 from general.enums import Piece
-from typing import List, Tuple, Optional
-from chess.chess_piece import ChessPiece
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+from chess.chess_piece import BISHOP, EMPTY, KING, KNIGHT, PAWN, PIECE_BY_COLOR, PIECE_CODES, PIECE_COLOR, \
+    PIECE_TYPE, PIECES, PROMOTION_TYPES, ROOK, WHITE, ChessPiece
 
 
 class Chess(GameState):
@@ -20,9 +21,20 @@ class Chess(GameState):
         self.halfmove = 0
         self.fullmove = 0
         self.board = []
+        self._board_view = None
         self.move_generator = None
+        self._legal_moves = None
         self.initialize(fen_notation)
 
+    def __deepcopy__(self, memo):
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        obj.board = [row[:] for row in self.board]
+        obj._board_view = None
+        obj._legal_moves = None
+        obj._init_move_generator()
+        return obj
+
     def initialize(self, fen_notation: str):
         board_str, player, castle, enpassant, halfmove, fullmove = fen_notation.split(' ')
         self.current_player = Piece.WHITE if player == 'w' else Piece.BLACK
@@ -40,11 +52,12 @@ class Chess(GameState):
             current_row = []
             for char in row:
                 if char.isdigit():
-                    current_row.extend([ChessPiece.EMPTY] * int(char))
+                    current_row.extend([EMPTY] * int(char))
                 else:
-                    current_row.append(ChessPiece.from_fen(char))
+                    current_row.append(PIECE_CODES[ChessPiece.from_fen(char)])
             board.append(current_row)
         self.board = board
+        self._board_view = None
 
         self._init_move_generator()
 
@@ -60,16 +73,32 @@ class Chess(GameState):
         )
 
     def get_legal_moves(self) -> List[Move]:
+        return list(self.legal_move_index().values())
+
+    def generate_move_codes(self) -> List[int]:
         self._init_move_generator()
-        return self.move_generator.get_legal_moves()
+        return self.move_generator.get_legal_move_codes()
 
-    def make_move(self, move: Move):
-        from_row, from_col = move.from_pos
-        to_row, to_col = move.to_pos
-        src_piece = self.board[from_row][from_col]
+    def iter_move_codes(self, hash_move: Optional[int] = None, killers: Sequence[int] = ()) -> Iterator[int]:
+        if self._cached_moves() is not None:
+            return super().iter_move_codes(hash_move, killers)
+        self._init_move_generator()
+        return self.move_generator.iter_legal_move_codes(hash_move, killers)
 
-        if src_piece in [ChessPiece.WHITE_PAWN, ChessPiece.BLACK_PAWN] or self.board[to_row][
-            to_col] != ChessPiece.EMPTY:
+    def make_move(self, move: Union[Move, int]):
+        if isinstance(move, int):
+            from_row, from_col = move_from(move)
+            to_row, to_col = move_to(move)
+            prom = move_promotion(move)
+        else:
+            from_row, from_col = move.from_pos
+            to_row, to_col = move.to_pos
+            prom = move.prom
+        board = self.board
+        src_piece = board[from_row][from_col]
+        color, kind = PIECE_COLOR[src_piece], PIECE_TYPE[src_piece]
+
+        if kind == PAWN or board[to_row][to_col] != EMPTY:
             self.halfmove = 0
         else:
             self.halfmove += 1
@@ -77,94 +106,74 @@ class Chess(GameState):
         if self.current_player == Piece.BLACK:
             self.fullmove += 1
 
-        if src_piece in [ChessPiece.WHITE_PAWN, ChessPiece.BLACK_PAWN] and (from_col != to_col) and self.board[to_row][
-            to_col] == ChessPiece.EMPTY:
+        if kind == PAWN and from_col != to_col and board[to_row][to_col] == EMPTY:
             if self.enpassant_square == (to_row, to_col):
-                self.board[from_row][to_col] = ChessPiece.EMPTY
+                board[from_row][to_col] = EMPTY
 
         self.enpassant_square = None
-        if src_piece in [ChessPiece.WHITE_PAWN, ChessPiece.BLACK_PAWN] and abs(from_row - to_row) == 2:
+        if kind == PAWN and abs(from_row - to_row) == 2:
             middle_row = (from_row + to_row) // 2
             self.enpassant_square = (middle_row, from_col)
 
-        if src_piece in [ChessPiece.WHITE_KING, ChessPiece.BLACK_KING] and abs(from_col - to_col) == 2:
+        if kind == KING and abs(from_col - to_col) == 2:
             king_row = from_row
             if to_col > from_col:
                 rook_src_col = 7
                 rook_dest_col = 5
-                self.board[king_row][rook_dest_col] = self.board[king_row][rook_src_col]
-                self.board[king_row][rook_src_col] = ChessPiece.EMPTY
             else:
                 rook_src_col = 0
                 rook_dest_col = 3
-                self.board[king_row][rook_dest_col] = self.board[king_row][rook_src_col]
-                self.board[king_row][rook_src_col] = ChessPiece.EMPTY
-
-        if src_piece == ChessPiece.WHITE_KING:
-            self.white_castle_king_side = False
-            self.white_castle_queen_side = False
-        elif src_piece == ChessPiece.BLACK_KING:
-            self.black_castle_king_side = False
-            self.black_castle_queen_side = False
-        elif src_piece == ChessPiece.WHITE_ROOK:
-            if from_row == 7 and from_col == 0:
-                self.white_castle_queen_side = False
-            elif from_row == 7 and from_col == 7:
+            board[king_row][rook_dest_col] = board[king_row][rook_src_col]
+            board[king_row][rook_src_col] = EMPTY
+
+        if kind == KING:
+            if color == WHITE:
                 self.white_castle_king_side = False
-        elif src_piece == ChessPiece.BLACK_ROOK:
-            if from_row == 0 and from_col == 0:
-                self.black_castle_queen_side = False
-            elif from_row == 0 and from_col == 7:
+                self.white_castle_queen_side = False
+            else:
                 self.black_castle_king_side = False
-
-        if move.prom:
-            promoted_piece = None
-            if self.current_player == Piece.WHITE:
-                if move.prom == 'Q':
-                    promoted_piece = ChessPiece.WHITE_QUEEN
-                elif move.prom == 'R':
-                    promoted_piece = ChessPiece.WHITE_ROOK
-                elif move.prom == 'B':
-                    promoted_piece = ChessPiece.WHITE_BISHOP
-                elif move.prom == 'N':
-                    promoted_piece = ChessPiece.WHITE_KNIGHT
+                self.black_castle_queen_side = False
+        elif kind == ROOK:
+            if color == WHITE:
+                if from_row == 7 and from_col == 0:
+                    self.white_castle_queen_side = False
+                elif from_row == 7 and from_col == 7:
+                    self.white_castle_king_side = False
             else:
-                if move.prom == 'Q':
-                    promoted_piece = ChessPiece.BLACK_QUEEN
-                elif move.prom == 'R':
-                    promoted_piece = ChessPiece.BLACK_ROOK
-                elif move.prom == 'B':
-                    promoted_piece = ChessPiece.BLACK_BISHOP
-                elif move.prom == 'N':
-                    promoted_piece = ChessPiece.BLACK_KNIGHT
-
-            self.board[to_row][to_col] = promoted_piece
+                if from_row == 0 and from_col == 0:
+                    self.black_castle_queen_side = False
+                elif from_row == 0 and from_col == 7:
+                    self.black_castle_king_side = False
+
+        if prom:
+            board[to_row][to_col] = PIECE_BY_COLOR[self.current_player.value][PROMOTION_TYPES[prom]]
         else:
-            self.board[to_row][to_col] = src_piece
+            board[to_row][to_col] = src_piece
 
-        self.board[from_row][from_col] = ChessPiece.EMPTY
+        board[from_row][from_col] = EMPTY
 
-        self.current_player = Piece.BLACK if self.current_player == Piece.WHITE else Piece.WHITE
+        self.current_player = ~self.current_player
+        self._board_view = None
+        self._legal_moves = None
 
         self._init_move_generator()
 
     def is_terminal(self) -> bool:
-        if not self.get_legal_moves():
+        if not self.legal_move_codes():
             return True
 
-        if self._has_insufficient_material():
-            return True
+        return self.is_drawn()
 
-        if self.halfmove >= 100:
-            return True
-
-        return False
+    def is_drawn(self) -> bool:
+        return self.halfmove >= 100 or self._has_insufficient_material()
 
     def get_initial_state(self):
         return Chess()
 
-    def get_board(self):
-        return self.board
+    def get_board(self) -> List[List[ChessPiece]]:
+        if self._board_view is None:
+            self._board_view = [[PIECES[piece] for piece in row] for row in self.board]
+        return self._board_view
 
     def get_current_player(self):
         return self.current_player
@@ -176,13 +185,13 @@ class Chess(GameState):
         if not self.move_generator.is_in_check(self.current_player):
             return False
 
-        return len(self.get_legal_moves()) == 0
+        return len(self.legal_move_codes()) == 0
 
     def is_stalemate(self) -> bool:
         if self.move_generator.is_in_check(self.current_player):
             return False
 
-        return len(self.get_legal_moves()) == 0
+        return len(self.legal_move_codes()) == 0
 
     def get_game_state(self) -> str:
         if self.is_checkmate():
@@ -195,69 +204,35 @@ class Chess(GameState):
             return "ongoing"
 
     def _has_insufficient_material(self) -> bool:
-        pieces = {
-            Piece.WHITE: {'pawn': 0, 'knight': 0, 'bishop': 0, 'rook': 0, 'queen': 0, 'king': 0},
-            Piece.BLACK: {'pawn': 0, 'knight': 0, 'bishop': 0, 'rook': 0, 'queen': 0, 'king': 0}
-        }
+        counts = [[0] * 6, [0] * 6]
+        bishops = [None, None]
 
         for row in range(8):
             for col in range(8):
                 piece = self.board[row][col]
-                if piece != ChessPiece.EMPTY:
-                    if piece == ChessPiece.WHITE_PAWN:
-                        pieces[Piece.WHITE]['pawn'] += 1
-                    elif piece == ChessPiece.WHITE_KNIGHT:
-                        pieces[Piece.WHITE]['knight'] += 1
-                    elif piece == ChessPiece.WHITE_BISHOP:
-                        pieces[Piece.WHITE]['bishop'] += 1
-                    elif piece == ChessPiece.WHITE_ROOK:
-                        pieces[Piece.WHITE]['rook'] += 1
-                    elif piece == ChessPiece.WHITE_QUEEN:
-                        pieces[Piece.WHITE]['queen'] += 1
-                    elif piece == ChessPiece.WHITE_KING:
-                        pieces[Piece.WHITE]['king'] += 1
-                    elif piece == ChessPiece.BLACK_PAWN:
-                        pieces[Piece.BLACK]['pawn'] += 1
-                    elif piece == ChessPiece.BLACK_KNIGHT:
-                        pieces[Piece.BLACK]['knight'] += 1
-                    elif piece == ChessPiece.BLACK_BISHOP:
-                        pieces[Piece.BLACK]['bishop'] += 1
-                    elif piece == ChessPiece.BLACK_ROOK:
-                        pieces[Piece.BLACK]['rook'] += 1
-                    elif piece == ChessPiece.BLACK_QUEEN:
-                        pieces[Piece.BLACK]['queen'] += 1
-                    elif piece == ChessPiece.BLACK_KING:
-                        pieces[Piece.BLACK]['king'] += 1
-
-        white_material = sum(pieces[Piece.WHITE].values()) - pieces[Piece.WHITE]['king']
-        black_material = sum(pieces[Piece.BLACK].values()) - pieces[Piece.BLACK]['king']
+                if piece != EMPTY:
+                    color, kind = PIECE_COLOR[piece], PIECE_TYPE[piece]
+                    counts[color][kind] += 1
+                    if kind == BISHOP:
+                        bishops[color] = (row, col)
+
+        white, black = counts
+        white_material = sum(white) - white[KING]
+        black_material = sum(black) - black[KING]
 
         if white_material == 0 and black_material == 0:
             return True
 
-        if (white_material == 0 and black_material == 1 and
-                (pieces[Piece.BLACK]['knight'] == 1 or pieces[Piece.BLACK]['bishop'] == 1)):
+        if white_material == 0 and black_material == 1 and (black[KNIGHT] == 1 or black[BISHOP] == 1):
             return True
 
-        if (black_material == 0 and white_material == 1 and
-                (pieces[Piece.WHITE]['knight'] == 1 or pieces[Piece.WHITE]['bishop'] == 1)):
+        if black_material == 0 and white_material == 1 and (white[KNIGHT] == 1 or white[BISHOP] == 1):
             return True
 
-        if (pieces[Piece.WHITE]['bishop'] == 1 and pieces[Piece.BLACK]['bishop'] == 1 and
-                white_material == 1 and black_material == 1):
-            white_bishop_pos = None
-            black_bishop_pos = None
-
-            for row in range(8):
-                for col in range(8):
-                    if self.board[row][col] == ChessPiece.WHITE_BISHOP:
-                        white_bishop_pos = (row, col)
-                    elif self.board[row][col] == ChessPiece.BLACK_BISHOP:
-                        black_bishop_pos = (row, col)
-
-            if white_bishop_pos and black_bishop_pos:
-                if (white_bishop_pos[0] + white_bishop_pos[1]) % 2 == (black_bishop_pos[0] + black_bishop_pos[1]) % 2:
-                    return True
+        if white[BISHOP] == 1 and black[BISHOP] == 1 and white_material == 1 and black_material == 1:
+            white_bishop_pos, black_bishop_pos = bishops
+            if (white_bishop_pos[0] + white_bishop_pos[1]) % 2 == (black_bishop_pos[0] + black_bishop_pos[1]) % 2:
+                return True
 
         return False
 
@@ -266,13 +241,13 @@ class Chess(GameState):
         for row in self.board:
             empty_count = 0
             for piece in row:
-                if piece == ChessPiece.EMPTY:
+                if piece == EMPTY:
                     empty_count += 1
                 else:
                     if empty_count > 0:
                         board_str += str(empty_count)
                         empty_count = 0
-                    board_str += str(piece)
+                    board_str += str(PIECES[piece])
             if empty_count > 0:
                 board_str += str(empty_count)
             board_str += '/'
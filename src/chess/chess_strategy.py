@@ -1,12 +1,24 @@
 from general.enums import Piece
 from general.strategy import Strategy
 from general.game import GameState
-from chess.chess_piece import ChessPiece
+from chess.chess_piece import PIECE_CODES, ChessPiece
 from chess.chess_state import Chess
-from chess.constants import *
+from chess import constants as default_constants
+from typing import List, Sequence
 import copy
 import random
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CENTER_SQUARES = [(3, 3), (3, 4), (4, 3), (4, 4)]
+EXTENDED_CENTER = [(2, 2), (2, 3), (2, 4), (2, 5),
+                   (3, 2), (3, 5), (4, 2), (4, 5),
+                   (5, 2), (5, 3), (5, 4), (5, 5)]
+PHASE_MATERIAL = {'Q': 9, 'R': 5, 'B': 3, 'N': 3}
+
 
 class NaiveChessStrategy(Strategy):
 
@@ -21,8 +33,22 @@ class NaiveChessStrategy(Strategy):
 class AdaptiveChessStrategy(Strategy):
 
 
-    def __init__(self):
+    def __init__(self, constants=default_constants):
         self.game_phase = 'opening'
+        self.piece_values = constants.piece_values
+        self.pawn_table = constants.pawn_table
+        self.knight_table = constants.knight_table
+        self.bishop_table = constants.bishop_table
+        self.rook_table = constants.rook_table
+        self.queen_table = constants.queen_table
+        self.king_middle_table = constants.king_middle_table
+        self.king_endgame_table = constants.king_endgame_table
+        self.mobility_weight = constants.mobility_weight
+        self.king_safety_weight = constants.king_safety_weight
+        self.pawn_structure_weight = constants.pawn_structure_weight
+        self.development_weight = constants.development_weight
+        self.center_control_weight = constants.center_control_weight
+        self._batch_tables = None
 
     def evaluate(self, game: Chess) -> float:
 
@@ -53,15 +79,103 @@ class AdaptiveChessStrategy(Strategy):
         total_score = (
                 material_score +
                 positional_score +
-                mobility_score * 0.1 +
-                king_safety_score +
-                pawn_structure_score +
-                development_score +
-                center_control_score
+                mobility_score * self.mobility_weight +
+                king_safety_score * self.king_safety_weight +
+                pawn_structure_score * self.pawn_structure_weight +
+                development_score * self.development_weight +
+                center_control_score * self.center_control_weight
         )
 
         return total_score if game.current_player == Piece.WHITE else -total_score
 
+    def evaluate_batch(self, games: Sequence[Chess]) -> List[float]:
+        if np is None:
+            return super().evaluate_batch(games)
+
+        material_lookup, middle_lookup, endgame_lookup, center_lookup, phase_lookup, queen_lookup = \
+            self._build_batch_tables()
+        codes = np.array([game.board for game in games], dtype=np.intp).reshape(len(games), 64)
+        squares = np.arange(64)
+
+        material = material_lookup[codes].sum(axis=1)
+        middle = middle_lookup[codes, squares].sum(axis=1)
+        endgame = endgame_lookup[codes, squares].sum(axis=1)
+        center = center_lookup[codes, squares].sum(axis=1)
+        phase_material = phase_lookup[codes].sum(axis=1)
+        queens = queen_lookup[codes].sum(axis=1)
+
+        scores = []
+        for i, game in enumerate(games):
+            state = game.get_game_state()
+            if state == 'checkmate':
+                scores.append(float('-inf') if game.current_player == Piece.WHITE else float('inf'))
+                continue
+            elif state == 'stalemate':
+                scores.append(0)
+                continue
+
+            if phase_material[i] >= 30:
+                self.game_phase = 'opening'
+            elif queens[i] == 0 or phase_material[i] <= 12:
+                self.game_phase = 'endgame'
+            else:
+                self.game_phase = 'middlegame'
+
+            development_score = self.calculate_development(game) if self.game_phase == 'opening' else 0
+            total_score = (
+                    float(material[i]) +
+                    float(endgame[i] if self.game_phase == 'endgame' else middle[i]) +
+                    self.calculate_mobility(game) * self.mobility_weight +
+                    self.calculate_king_safety(game) * self.king_safety_weight +
+                    self.calculate_pawn_structure(game) * self.pawn_structure_weight +
+                    development_score * self.development_weight +
+                    float(center[i]) * self.center_control_weight
+            )
+            scores.append(total_score if game.current_player == Piece.WHITE else -total_score)
+        return scores
+
+    def _build_batch_tables(self):
+        if self._batch_tables is not None:
+            return self._batch_tables
+
+        tables = {'P': self.pawn_table, 'N': self.knight_table, 'B': self.bishop_table, 'R': self.rook_table,
+                  'Q': self.queen_table}
+        material = np.zeros(len(PIECE_CODES))
+        middle = np.zeros((len(PIECE_CODES), 64))
+        endgame = np.zeros((len(PIECE_CODES), 64))
+        center = np.zeros((len(PIECE_CODES), 64))
+        phase = np.zeros(len(PIECE_CODES))
+        queens = np.zeros(len(PIECE_CODES))
+
+        for piece, code in PIECE_CODES.items():
+            if piece == ChessPiece.EMPTY:
+                continue
+            kind = piece.value[0].upper()
+            sign = 1 if piece.color == Piece.WHITE else -1
+            material[code] = self.piece_values[piece]
+            phase[code] = PHASE_MATERIAL.get(kind, 0)
+            queens[code] = kind == 'Q'
+
+            for row in range(8):
+                for col in range(8):
+                    table_row = row if sign > 0 else 7 - row
+                    if kind == 'K':
+                        middle[code, row * 8 + col] = sign * self.king_middle_table[table_row][col]
+                        endgame[code, row * 8 + col] = sign * self.king_endgame_table[table_row][col]
+                    else:
+                        middle[code, row * 8 + col] = endgame[code, row * 8 + col] = \
+                            sign * tables[kind][table_row][col]
+
+            for squares, pawn_bonus, minor_bonus in ((CENTER_SQUARES, 20, 15), (EXTENDED_CENTER, 10, 5)):
+                for row, col in squares:
+                    if kind == 'P':
+                        center[code, row * 8 + col] = sign * pawn_bonus
+                    elif kind in ('N', 'B'):
+                        center[code, row * 8 + col] = sign * minor_bonus
+
+        self._batch_tables = material, middle, endgame, center, phase, queens
+        return self._batch_tables
+
     def calculate_material_score(self, game: GameState) -> float:
         material_score = 0
         board = game.get_board()
@@ -298,12 +412,7 @@ class AdaptiveChessStrategy(Strategy):
         score = 0
         board = game.get_board()
 
-        center_squares = [(3, 3), (3, 4), (4, 3), (4, 4)]
-        extended_center = [(2, 2), (2, 3), (2, 4), (2, 5),
-                           (3, 2), (3, 5), (4, 2), (4, 5),
-                           (5, 2), (5, 3), (5, 4), (5, 5)]
-
-        for row, col in center_squares:
+        for row, col in CENTER_SQUARES:
             piece = board[row][col]
             if piece == ChessPiece.WHITE_PAWN:
                 score += 20
@@ -314,7 +423,7 @@ class AdaptiveChessStrategy(Strategy):
             elif piece in [ChessPiece.BLACK_KNIGHT, ChessPiece.BLACK_BISHOP]:
                 score -= 15
 
-        for row, col in extended_center:
+        for row, col in EXTENDED_CENTER:
             piece = board[row][col]
             if piece == ChessPiece.WHITE_PAWN:
                 score += 10
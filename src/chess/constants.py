@@ -16,6 +16,12 @@ piece_values = {
         ChessPiece.BLACK_KING: -20000
     }
 
+mobility_weight = 0.1
+king_safety_weight = 1.0
+pawn_structure_weight = 1.0
+development_weight = 1.0
+center_control_weight = 1.0
+
 pawn_table = [
     [0, 0, 0, 0, 0, 0, 0, 0],
     [50, 50, 50, 50, 50, 50, 50, 50],
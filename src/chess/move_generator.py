@@ -1,8 +1,16 @@
-from general.game import GameState
-from general.move import Move
-from general.enums import Piece
-from typing import List, Tuple, Optional
-from chess.chess_piece import ChessPiece
+from general.move import FLAG_CAPTURE, FLAG_CASTLE, FLAG_DOUBLE_PUSH, FLAG_EN_PASSANT, MOVE_MASK, PROMOTION_CODES, \
+    Move, pack_move
+from general.enums import OPPONENT_CODE, Piece
+from typing import Iterator, List, Tuple, Optional, Sequence
+from chess.chess_piece import BISHOP, BLACK, EMPTY, KING, KNIGHT, PAWN, PIECE_BY_COLOR, PIECE_COLOR, PIECE_TYPE, \
+    QUEEN, ROOK, WHITE
+
+PROMOTION_MOVES = [PROMOTION_CODES[prom] for prom in ('Q', 'R', 'B', 'N')]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+CAPTURE_VALUES = (1, 5, 3, 3, 100, 9, 1)
 
 
 class MoveGenerator:
@@ -10,6 +18,7 @@ class MoveGenerator:
                  black_castle_king_side, black_castle_queen_side, enpassant_square):
         self.board = board
         self.current_player = current_player
+        self.player = current_player.value
         self.white_castle_king_side = white_castle_king_side
         self.white_castle_queen_side = white_castle_queen_side
         self.black_castle_king_side = black_castle_king_side
@@ -17,100 +26,162 @@ class MoveGenerator:
         self.enpassant_square = enpassant_square
 
     def get_legal_moves(self) -> List[Move]:
+        return [Move.from_packed(code) for code in self.get_legal_move_codes()]
+
+    def get_legal_move_codes(self) -> List[int]:
         legal_moves = []
+        player = self.player
 
         for row in range(8):
+            board_row = self.board[row]
             for col in range(8):
-                piece = self.board[row][col]
-                if piece != ChessPiece.EMPTY and piece.color == self.current_player:
-                    piece_moves = self._get_piece_moves(row, col, piece)
-                    legal_moves.extend(piece_moves)
+                piece = board_row[col]
+                if PIECE_COLOR[piece] == player:
+                    legal_moves.extend(self._get_piece_moves(row, col, piece))
 
         return legal_moves
 
-    def _get_piece_moves(self, row: int, col: int, piece: ChessPiece) -> List[Move]:
-        moves = []
-
-        if piece in [ChessPiece.WHITE_PAWN, ChessPiece.BLACK_PAWN]:
-            moves.extend(self._get_pawn_moves(row, col, piece))
-        elif piece in [ChessPiece.WHITE_KNIGHT, ChessPiece.BLACK_KNIGHT]:
-            moves.extend(self._get_knight_moves(row, col, piece))
-        elif piece in [ChessPiece.WHITE_BISHOP, ChessPiece.BLACK_BISHOP]:
-            moves.extend(self._get_bishop_moves(row, col, piece))
-        elif piece in [ChessPiece.WHITE_ROOK, ChessPiece.BLACK_ROOK]:
-            moves.extend(self._get_rook_moves(row, col, piece))
-        elif piece in [ChessPiece.WHITE_QUEEN, ChessPiece.BLACK_QUEEN]:
-            moves.extend(self._get_queen_moves(row, col, piece))
-        elif piece in [ChessPiece.WHITE_KING, ChessPiece.BLACK_KING]:
-            moves.extend(self._get_king_moves(row, col, piece))
-
-        filtered_moves = []
-        for move in moves:
-            if not self._would_be_in_check_after_move(move):
-                filtered_moves.append(move)
-
-        return filtered_moves
-
-    def _get_pawn_moves(self, row: int, col: int, piece: ChessPiece) -> List[Move]:
+    def iter_legal_move_codes(self, hash_move: Optional[int] = None, killers: Sequence[int] = ()) -> Iterator[int]:
+        tried = set()
+        if hash_move is not None:
+            code = self._find_pseudo_move(hash_move)
+            if code is not None and not self._would_be_in_check_after_move(code):
+                tried.add(code & MOVE_MASK)
+                yield code
+
+        captures = []
+        quiets = []
+        player = self.player
+        for row in range(8):
+            board_row = self.board[row]
+            for col in range(8):
+                piece = board_row[col]
+                if PIECE_COLOR[piece] == player:
+                    for code in self._get_pseudo_moves(row, col, piece):
+                        if code & FLAG_CAPTURE:
+                            captures.append(code)
+                        else:
+                            quiets.append(code)
+
+        captures.sort(key=self._capture_order)
+        for code in captures:
+            if code & MOVE_MASK not in tried and not self._would_be_in_check_after_move(code):
+                yield code
+
+        quiet_index = {code & MOVE_MASK: code for code in quiets}
+        for killer in killers:
+            code = quiet_index.get(killer & MOVE_MASK)
+            if code is not None and code & MOVE_MASK not in tried:
+                tried.add(code & MOVE_MASK)
+                if not self._would_be_in_check_after_move(code):
+                    yield code
+
+        for code in quiets:
+            if code & MOVE_MASK not in tried and not self._would_be_in_check_after_move(code):
+                yield code
+
+    def _find_pseudo_move(self, move: int) -> Optional[int]:
+        from_row, from_col = move >> 27 & 0xFF, move >> 19 & 0xFF
+        if from_row >= 8 or from_col >= 8:
+            return None
+        piece = self.board[from_row][from_col]
+        if PIECE_COLOR[piece] != self.player:
+            return None
+        for code in self._get_pseudo_moves(from_row, from_col, piece):
+            if code & MOVE_MASK == move & MOVE_MASK:
+                return code
+        return None
+
+    def _capture_order(self, code: int) -> int:
+        attacker = self.board[code >> 27 & 0xFF][code >> 19 & 0xFF]
+        victim = self.board[code >> 11 & 0xFF][code >> 3 & 0xFF]
+        return CAPTURE_VALUES[PIECE_TYPE[attacker]] - 16 * CAPTURE_VALUES[PIECE_TYPE[victim]]
+
+    def _get_piece_moves(self, row: int, col: int, piece: int) -> List[int]:
+        return [move for move in self._get_pseudo_moves(row, col, piece)
+                if not self._would_be_in_check_after_move(move)]
+
+    def _get_pseudo_moves(self, row: int, col: int, piece: int) -> List[int]:
+        kind = PIECE_TYPE[piece]
+
+        if kind == PAWN:
+            return self._get_pawn_moves(row, col, piece)
+        elif kind == KNIGHT:
+            return self._get_knight_moves(row, col, piece)
+        elif kind == BISHOP:
+            return self._get_bishop_moves(row, col, piece)
+        elif kind == ROOK:
+            return self._get_rook_moves(row, col, piece)
+        elif kind == QUEEN:
+            return self._get_queen_moves(row, col, piece)
+        return self._get_king_moves(row, col, piece)
+
+    def _get_pawn_moves(self, row: int, col: int, piece: int) -> List[int]:
         moves = []
-        color = piece.color
-        direction = -1 if color == Piece.WHITE else 1
-        start_row = 6 if color == Piece.WHITE else 1
-
-        if 0 <= row + direction < 8 and self.board[row + direction][col] == ChessPiece.EMPTY:
-            if (color == Piece.WHITE and row + direction == 0) or (color == Piece.BLACK and row + direction == 7):
-                for prom in ['Q', 'R', 'B', 'N']:
-                    moves.append(Move((row, col), (row + direction, col), prom))
+        color = PIECE_COLOR[piece]
+        opponent = OPPONENT_CODE[color]
+        direction = -1 if color == WHITE else 1
+        start_row = 6 if color == WHITE else 1
+        origin = row << 27 | col << 19
+        promotes = (color == WHITE and row + direction == 0) or (color == BLACK and row + direction == 7)
+
+        if 0 <= row + direction < 8 and self.board[row + direction][col] == EMPTY:
+            target = origin | (row + direction) << 11 | col << 3
+            if promotes:
+                for prom in PROMOTION_MOVES:
+                    moves.append(target | prom)
             else:
-                moves.append(Move((row, col), (row + direction, col)))
+                moves.append(target)
 
-            if row == start_row and self.board[row + 2 * direction][col] == ChessPiece.EMPTY:
-                moves.append(Move((row, col), (row + 2 * direction, col)))
+            if row == start_row and self.board[row + 2 * direction][col] == EMPTY:
+                moves.append(origin | (row + 2 * direction) << 11 | col << 3 | FLAG_DOUBLE_PUSH)
 
         for col_offset in [-1, 1]:
             if 0 <= row + direction < 8 and 0 <= col + col_offset < 8:
                 target = self.board[row + direction][col + col_offset]
-                if target != ChessPiece.EMPTY and target.color != color:
-                    if (color == Piece.WHITE and row + direction == 0) or (
-                            color == Piece.BLACK and row + direction == 7):
-                        for prom in ['Q', 'R', 'B', 'N']:
-                            moves.append(Move((row, col), (row + direction, col + col_offset), prom))
+                code = origin | (row + direction) << 11 | (col + col_offset) << 3
+                if PIECE_COLOR[target] == opponent:
+                    if promotes:
+                        for prom in PROMOTION_MOVES:
+                            moves.append(code | prom | FLAG_CAPTURE)
                     else:
-                        moves.append(Move((row, col), (row + direction, col + col_offset)))
+                        moves.append(code | FLAG_CAPTURE)
 
                 elif self.enpassant_square == (row + direction, col + col_offset):
-                    moves.append(Move((row, col), (row + direction, col + col_offset)))
+                    moves.append(code | FLAG_CAPTURE | FLAG_EN_PASSANT)
 
         return moves
 
-    def _get_knight_moves(self, row: int, col: int, piece: ChessPiece) -> List[Move]:
+    def _get_knight_moves(self, row: int, col: int, piece: int) -> List[int]:
         moves = []
-        color = piece.color
-        offsets = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+        opponent = OPPONENT_CODE[PIECE_COLOR[piece]]
+        origin = row << 27 | col << 19
 
-        for row_offset, col_offset in offsets:
+        for row_offset, col_offset in KNIGHT_OFFSETS:
             new_row, new_col = row + row_offset, col + col_offset
             if 0 <= new_row < 8 and 0 <= new_col < 8:
                 target = self.board[new_row][new_col]
-                if target == ChessPiece.EMPTY or target.color != color:
-                    moves.append(Move((row, col), (new_row, new_col)))
+                if target == EMPTY:
+                    moves.append(origin | new_row << 11 | new_col << 3)
+                elif PIECE_COLOR[target] == opponent:
+                    moves.append(origin | new_row << 11 | new_col << 3 | FLAG_CAPTURE)
 
         return moves
 
-    def _get_bishop_moves(self, row: int, col: int, piece: ChessPiece) -> List[Move]:
+    def _get_sliding_moves(self, row: int, col: int, piece: int, directions) -> List[int]:
         moves = []
-        color = piece.color
-        directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+        opponent = OPPONENT_CODE[PIECE_COLOR[piece]]
+        origin = row << 27 | col << 19
 
         for row_dir, col_dir in directions:
             for distance in range(1, 8):
                 new_row, new_col = row + row_dir * distance, col + col_dir * distance
                 if 0 <= new_row < 8 and 0 <= new_col < 8:
                     target = self.board[new_row][new_col]
-                    if target == ChessPiece.EMPTY:
-                        moves.append(Move((row, col), (new_row, new_col)))
-                    elif target.color != color:
-                        moves.append(Move((row, col), (new_row, new_col)))
+                    if target == EMPTY:
+                        moves.append(origin | new_row << 11 | new_col << 3)
+                    elif PIECE_COLOR[target] == opponent:
+                        moves.append(origin | new_row << 11 | new_col << 3 | FLAG_CAPTURE)
                         break
                     else:
                         break
@@ -119,159 +190,126 @@ class MoveGenerator:
 
         return moves
 
-    def _get_rook_moves(self, row: int, col: int, piece: ChessPiece) -> List[Move]:
-        moves = []
-        color = piece.color
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    def _get_bishop_moves(self, row: int, col: int, piece: int) -> List[int]:
+        return self._get_sliding_moves(row, col, piece, BISHOP_DIRECTIONS)
 
-        for row_dir, col_dir in directions:
-            for distance in range(1, 8):
-                new_row, new_col = row + row_dir * distance, col + col_dir * distance
-                if 0 <= new_row < 8 and 0 <= new_col < 8:
-                    target = self.board[new_row][new_col]
-                    if target == ChessPiece.EMPTY:
-                        moves.append(Move((row, col), (new_row, new_col)))
-                    elif target.color != color:
-                        moves.append(Move((row, col), (new_row, new_col)))
-                        break
-                    else:
-                        break
-                else:
-                    break
-
-        return moves
+    def _get_rook_moves(self, row: int, col: int, piece: int) -> List[int]:
+        return self._get_sliding_moves(row, col, piece, ROOK_DIRECTIONS)
 
-    def _get_queen_moves(self, row: int, col: int, piece: ChessPiece) -> List[Move]:
+    def _get_queen_moves(self, row: int, col: int, piece: int) -> List[int]:
         bishop_moves = self._get_bishop_moves(row, col, piece)
         rook_moves = self._get_rook_moves(row, col, piece)
         return bishop_moves + rook_moves
 
-    def _get_king_moves(self, row: int, col: int, piece: ChessPiece) -> List[Move]:
+    def _get_king_moves(self, row: int, col: int, piece: int) -> List[int]:
         moves = []
-        color = piece.color
+        color = PIECE_COLOR[piece]
+        opponent = OPPONENT_CODE[color]
+        origin = row << 27 | col << 19
 
-        for row_offset in [-1, 0, 1]:
-            for col_offset in [-1, 0, 1]:
-                if row_offset == 0 and col_offset == 0:
-                    continue
+        for row_offset, col_offset in KING_OFFSETS:
+            new_row = row + row_offset
+            new_col = col + col_offset
 
-                new_row = row + row_offset
-                new_col = col + col_offset
-
-                if 0 <= new_row < 8 and 0 <= new_col < 8:
-                    target = self.board[new_row][new_col]
-                    if target == ChessPiece.EMPTY or target.color != color:
-                        moves.append(Move((row, col), (new_row, new_col)))
+            if 0 <= new_row < 8 and 0 <= new_col < 8:
+                target = self.board[new_row][new_col]
+                if target == EMPTY:
+                    moves.append(origin | new_row << 11 | new_col << 3)
+                elif PIECE_COLOR[target] == opponent:
+                    moves.append(origin | new_row << 11 | new_col << 3 | FLAG_CAPTURE)
 
-        if color == Piece.WHITE and row == 7 and col == 4:
+        if color == WHITE and row == 7 and col == 4:
             if self.white_castle_king_side and \
-                    self.board[7][5] == ChessPiece.EMPTY and \
-                    self.board[7][6] == ChessPiece.EMPTY and \
-                    not self._is_square_attacked(7, 4, Piece.BLACK) and \
-                    not self._is_square_attacked(7, 5, Piece.BLACK) and \
-                    not self._is_square_attacked(7, 6, Piece.BLACK):
-                moves.append(Move((7, 4), (7, 6)))
+                    self.board[7][5] == EMPTY and \
+                    self.board[7][6] == EMPTY and \
+                    not self._is_square_attacked(7, 4, BLACK) and \
+                    not self._is_square_attacked(7, 5, BLACK) and \
+                    not self._is_square_attacked(7, 6, BLACK):
+                moves.append(pack_move((7, 4), (7, 6), flags=FLAG_CASTLE))
 
             if self.white_castle_queen_side and \
-                    all(self.board[7][i] == ChessPiece.EMPTY for i in range(1, 4)) and \
-                    not self._is_square_attacked(7, 4, Piece.BLACK) and \
-                    not self._is_square_attacked(7, 3, Piece.BLACK) and \
-                    not self._is_square_attacked(7, 2, Piece.BLACK):
-                moves.append(Move((7, 4), (7, 2)))
+                    all(self.board[7][i] == EMPTY for i in range(1, 4)) and \
+                    not self._is_square_attacked(7, 4, BLACK) and \
+                    not self._is_square_attacked(7, 3, BLACK) and \
+                    not self._is_square_attacked(7, 2, BLACK):
+                moves.append(pack_move((7, 4), (7, 2), flags=FLAG_CASTLE))
 
-        elif color == Piece.BLACK and row == 0 and col == 4:
+        elif color == BLACK and row == 0 and col == 4:
             if self.black_castle_king_side and \
-                    self.board[0][5] == ChessPiece.EMPTY and \
-                    self.board[0][6] == ChessPiece.EMPTY and \
-                    not self._is_square_attacked(0, 4, Piece.WHITE) and \
-                    not self._is_square_attacked(0, 5, Piece.WHITE) and \
-                    not self._is_square_attacked(0, 6, Piece.WHITE):
-                moves.append(Move((0, 4), (0, 6)))
+                    self.board[0][5] == EMPTY and \
+                    self.board[0][6] == EMPTY and \
+                    not self._is_square_attacked(0, 4, WHITE) and \
+                    not self._is_square_attacked(0, 5, WHITE) and \
+                    not self._is_square_attacked(0, 6, WHITE):
+                moves.append(pack_move((0, 4), (0, 6), flags=FLAG_CASTLE))
 
             if self.black_castle_queen_side and \
-                    all(self.board[0][i] == ChessPiece.EMPTY for i in range(1, 4)) and \
-                    not self._is_square_attacked(0, 4, Piece.WHITE) and \
-                    not self._is_square_attacked(0, 3, Piece.WHITE) and \
-                    not self._is_square_attacked(0, 2, Piece.WHITE):
-                moves.append(Move((0, 4), (0, 2)))
+                    all(self.board[0][i] == EMPTY for i in range(1, 4)) and \
+                    not self._is_square_attacked(0, 4, WHITE) and \
+                    not self._is_square_attacked(0, 3, WHITE) and \
+                    not self._is_square_attacked(0, 2, WHITE):
+                moves.append(pack_move((0, 4), (0, 2), flags=FLAG_CASTLE))
 
         return moves
 
-    def _is_square_attacked(self, row: int, col: int, attacker_color: Piece) -> bool:
-        pawn_directions = [[-1, -1], [-1, 1]] if attacker_color == Piece.BLACK else [[1, -1], [1, 1]]
-        for d_row, d_col in pawn_directions:
-            r, c = row + d_row, col + d_col
-            if 0 <= r < 8 and 0 <= c < 8:
-                piece = self.board[r][c]
-                if (attacker_color == Piece.WHITE and piece == ChessPiece.WHITE_PAWN) or \
-                        (attacker_color == Piece.BLACK and piece == ChessPiece.BLACK_PAWN):
-                    return True
-
-        knight_moves = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
-        for d_row, d_col in knight_moves:
-            r, c = row + d_row, col + d_col
-            if 0 <= r < 8 and 0 <= c < 8:
-                piece = self.board[r][c]
-                if (attacker_color == Piece.WHITE and piece == ChessPiece.WHITE_KNIGHT) or \
-                        (attacker_color == Piece.BLACK and piece == ChessPiece.BLACK_KNIGHT):
-                    return True
-
-        rook_directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        for d_row, d_col in rook_directions:
-            for dist in range(1, 8):
-                r, c = row + d_row * dist, col + d_col * dist
-                if not (0 <= r < 8 and 0 <= c < 8):
-                    break
-                piece = self.board[r][c]
-                if piece != ChessPiece.EMPTY:
-                    if (attacker_color == Piece.WHITE and (
-                            piece == ChessPiece.WHITE_ROOK or piece == ChessPiece.WHITE_QUEEN)) or \
-                            (attacker_color == Piece.BLACK and (
-                                    piece == ChessPiece.BLACK_ROOK or piece == ChessPiece.BLACK_QUEEN)):
-                        return True
-                    break
+    def _is_square_attacked(self, row: int, col: int, attacker_color: int) -> bool:
+        board = self.board
+        pieces = PIECE_BY_COLOR[attacker_color]
 
-        bishop_directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        for d_row, d_col in bishop_directions:
-            for dist in range(1, 8):
-                r, c = row + d_row * dist, col + d_col * dist
-                if not (0 <= r < 8 and 0 <= c < 8):
-                    break
-                piece = self.board[r][c]
-                if piece != ChessPiece.EMPTY:
-                    if (attacker_color == Piece.WHITE and (
-                            piece == ChessPiece.WHITE_BISHOP or piece == ChessPiece.WHITE_QUEEN)) or \
-                            (attacker_color == Piece.BLACK and (
-                                    piece == ChessPiece.BLACK_BISHOP or piece == ChessPiece.BLACK_QUEEN)):
-                        return True
-                    break
+        pawn = pieces[PAWN]
+        r = row + 1 if attacker_color == WHITE else row - 1
+        if 0 <= r < 8:
+            if (col > 0 and board[r][col - 1] == pawn) or (col < 7 and board[r][col + 1] == pawn):
+                return True
+
+        knight = pieces[KNIGHT]
+        for d_row, d_col in KNIGHT_OFFSETS:
+            r, c = row + d_row, col + d_col
+            if 0 <= r < 8 and 0 <= c < 8 and board[r][c] == knight:
+                return True
+
+        for directions, slider in ((ROOK_DIRECTIONS, pieces[ROOK]), (BISHOP_DIRECTIONS, pieces[BISHOP])):
+            queen = pieces[QUEEN]
+            for d_row, d_col in directions:
+                r, c = row + d_row, col + d_col
+                while 0 <= r < 8 and 0 <= c < 8:
+                    piece = board[r][c]
+                    if piece != EMPTY:
+                        if piece == slider or piece == queen:
+                            return True
+                        break
+                    r += d_row
+                    c += d_col
 
-        king_moves = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-        for d_row, d_col in king_moves:
+        king = pieces[KING]
+        for d_row, d_col in KING_OFFSETS:
             r, c = row + d_row, col + d_col
-            if 0 <= r < 8 and 0 <= c < 8:
-                piece = self.board[r][c]
-                if (attacker_color == Piece.WHITE and piece == ChessPiece.WHITE_KING) or \
-                        (attacker_color == Piece.BLACK and piece == ChessPiece.BLACK_KING):
-                    return True
+            if 0 <= r < 8 and 0 <= c < 8 and board[r][c] == king:
+                return True
 
         return False
 
-    def _would_be_in_check_after_move(self, move: Move) -> bool:
-        from_row, from_col = move.from_pos
-        to_row, to_col = move.to_pos
+    def _find_king(self, color: int) -> Optional[Tuple[int, int]]:
+        king = PIECE_BY_COLOR[color][KING]
+        for r in range(8):
+            if king in self.board[r]:
+                return r, self.board[r].index(king)
+        return None
+
+    def _would_be_in_check_after_move(self, move: int) -> bool:
+        from_row, from_col = move >> 27 & 0xFF, move >> 19 & 0xFF
+        to_row, to_col = move >> 11 & 0xFF, move >> 3 & 0xFF
         src_piece = self.board[from_row][from_col]
         dest_piece = self.board[to_row][to_col]
 
         self.board[to_row][to_col] = src_piece
-        self.board[from_row][from_col] = ChessPiece.EMPTY
+        self.board[from_row][from_col] = EMPTY
 
-        is_castling = False
+        is_castling = bool(move & FLAG_CASTLE)
         rook_src_pos = None
         rook_dest_pos = None
 
-        if src_piece in [ChessPiece.WHITE_KING, ChessPiece.BLACK_KING] and abs(from_col - to_col) == 2:
-            is_castling = True
+        if is_castling:
             king_row = from_row
             if to_col > from_col:
                 rook_src_pos = (king_row, 7)
@@ -280,36 +318,20 @@ class MoveGenerator:
                 rook_src_pos = (king_row, 0)
                 rook_dest_pos = (king_row, 3)
 
-            if is_castling:
-                rook_piece = self.board[rook_src_pos[0]][rook_src_pos[1]]
-                self.board[rook_dest_pos[0]][rook_dest_pos[1]] = rook_piece
-                self.board[rook_src_pos[0]][rook_src_pos[1]] = ChessPiece.EMPTY
+            rook_piece = self.board[rook_src_pos[0]][rook_src_pos[1]]
+            self.board[rook_dest_pos[0]][rook_dest_pos[1]] = rook_piece
+            self.board[rook_src_pos[0]][rook_src_pos[1]] = EMPTY
 
         captured_en_passant = None
-        if src_piece in [ChessPiece.WHITE_PAWN, ChessPiece.BLACK_PAWN] and (
-                from_col != to_col) and dest_piece == ChessPiece.EMPTY:
-            if self.enpassant_square == (to_row, to_col):
-                captured_en_passant = (from_row, to_col)
-                self.board[captured_en_passant[0]][captured_en_passant[1]] = ChessPiece.EMPTY
+        if move & FLAG_EN_PASSANT:
+            captured_en_passant = (from_row, to_col)
+            self.board[captured_en_passant[0]][captured_en_passant[1]] = EMPTY
 
-        king_position = None
-        for r in range(8):
-            for c in range(8):
-                piece = self.board[r][c]
-                if piece != ChessPiece.EMPTY and piece.color == self.current_player:
-                    if piece == ChessPiece.WHITE_KING and self.current_player == Piece.WHITE:
-                        king_position = (r, c)
-                        break
-                    elif piece == ChessPiece.BLACK_KING and self.current_player == Piece.BLACK:
-                        king_position = (r, c)
-                        break
-            if king_position:
-                break
+        king_position = self._find_king(self.player)
 
         is_in_check = False
         if king_position:
-            opponent = Piece.BLACK if self.current_player == Piece.WHITE else Piece.WHITE
-            is_in_check = self._is_square_attacked(king_position[0], king_position[1], opponent)
+            is_in_check = self._is_square_attacked(king_position[0], king_position[1], OPPONENT_CODE[self.player])
 
         self.board[from_row][from_col] = src_piece
         self.board[to_row][to_col] = dest_piece
@@ -317,28 +339,16 @@ class MoveGenerator:
         if is_castling and rook_src_pos and rook_dest_pos:
             rook_piece = self.board[rook_dest_pos[0]][rook_dest_pos[1]]
             self.board[rook_src_pos[0]][rook_src_pos[1]] = rook_piece
-            self.board[rook_dest_pos[0]][rook_dest_pos[1]] = ChessPiece.EMPTY
+            self.board[rook_dest_pos[0]][rook_dest_pos[1]] = EMPTY
 
         if captured_en_passant:
-            opponent_color = Piece.BLACK if self.current_player == Piece.WHITE else Piece.WHITE
-            pawn_piece = ChessPiece.BLACK_PAWN if opponent_color == Piece.BLACK else ChessPiece.WHITE_PAWN
-            self.board[captured_en_passant[0]][captured_en_passant[1]] = pawn_piece
+            self.board[captured_en_passant[0]][captured_en_passant[1]] = PIECE_BY_COLOR[OPPONENT_CODE[self.player]][PAWN]
 
         return is_in_check
 
     def is_in_check(self, color: Piece) -> bool:
-        king_position = None
-        for r in range(8):
-            for c in range(8):
-                piece = self.board[r][c]
-                if piece == (ChessPiece.WHITE_KING if color == Piece.WHITE else ChessPiece.BLACK_KING):
-                    king_position = (r, c)
-                    break
-            if king_position:
-                break
-
+        king_position = self._find_king(color.value)
         if not king_position:
             return False
 
-        opponent_color = Piece.BLACK if color == Piece.WHITE else Piece.WHITE
-        return self._is_square_attacked(king_position[0], king_position[1], opponent_color)
\ No newline at end of file
+        return self._is_square_attacked(king_position[0], king_position[1], OPPONENT_CODE[color.value])
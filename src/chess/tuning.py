@@ -0,0 +1,228 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple
+from chess.chess_piece import ChessPiece
+from chess.chess_state import Chess
+from chess.chess_strategy import AdaptiveChessStrategy
+from chess import constants as default_constants
+from general.records import MAGIC, read_header, read_samples
+import argparse
+import importlib.util
+import math
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MATERIAL = ('P', 'N', 'B', 'R', 'Q')
+TABLES = ('pawn_table', 'knight_table', 'bishop_table', 'rook_table', 'queen_table',
+          'king_middle_table', 'king_endgame_table')
+TERMS = ('mobility_weight', 'king_safety_weight', 'pawn_structure_weight', 'development_weight',
+         'center_control_weight')
+
+PST_OFFSET = len(MATERIAL)
+TERM_OFFSET = PST_OFFSET + len(TABLES) * 64
+FEATURE_COUNT = TERM_OFFSET + len(TERMS)
+
+KING_MIDDLE = TABLES.index('king_middle_table')
+KING_ENDGAME = TABLES.index('king_endgame_table')
+
+
+def _piece_features():
+    features = {}
+    for piece in ChessPiece:
+        if piece == ChessPiece.EMPTY:
+            continue
+        kind = piece.value[0].upper()
+        sign = 1 if piece.value[0].isupper() else -1
+        material = MATERIAL.index(kind) if kind in MATERIAL else None
+        features[piece] = (sign, material, KING_MIDDLE if kind == 'K' else MATERIAL.index(kind))
+    return features
+
+
+PIECE_FEATURES = _piece_features()
+
+CHUNK_SIZE = 2048
+TERM_LEARNING_RATE = 0.001
+RESULTS = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+
+def extract_features(strategy: AdaptiveChessStrategy, game: Chess) -> Optional[List[float]]:
+    if game.get_game_state() in ('checkmate', 'stalemate'):
+        return None
+
+    strategy._update_game_phase(game)
+    features = [0.0] * FEATURE_COUNT
+    board = game.get_board()
+
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece == ChessPiece.EMPTY:
+                continue
+            sign, material, table = PIECE_FEATURES[piece]
+            if material is not None:
+                features[material] += sign
+            if table == KING_MIDDLE and strategy.game_phase == 'endgame':
+                table = KING_ENDGAME
+            square = row * 8 + col if sign > 0 else (7 - row) * 8 + col
+            features[PST_OFFSET + table * 64 + square] += sign
+
+    features[TERM_OFFSET] = strategy.calculate_mobility(game)
+    features[TERM_OFFSET + 1] = strategy.calculate_king_safety(game)
+    features[TERM_OFFSET + 2] = strategy.calculate_pawn_structure(game)
+    if strategy.game_phase == 'opening':
+        features[TERM_OFFSET + 3] = strategy.calculate_development(game)
+    features[TERM_OFFSET + 4] = strategy.calculate_center_control(game)
+    return features
+
+
+def initial_weights(constants=default_constants) -> List[float]:
+    weights = [float(constants.piece_values[ChessPiece.from_fen(kind)]) for kind in MATERIAL]
+    for name in TABLES:
+        weights.extend(float(value) for row in getattr(constants, name) for value in row)
+    weights.extend(float(getattr(constants, name)) for name in TERMS)
+    return weights
+
+
+def _extract_chunk(chunk: Sequence[Tuple[str, float]]):
+    strategy = AdaptiveChessStrategy()
+    rows = []
+    labels = []
+    for fen, result in chunk:
+        features = extract_features(strategy, Chess(fen))
+        if features is not None:
+            rows.append(features)
+            labels.append(result)
+    return np.array(rows, dtype=np.float32).reshape(-1, FEATURE_COUNT), np.array(labels, dtype=np.float32)
+
+
+def extract_matrix(positions: Sequence[Tuple[str, float]], workers: Optional[int] = None):
+    chunks = [positions[i:i + CHUNK_SIZE] for i in range(0, len(positions), CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        parts = list(executor.map(_extract_chunk, chunks))
+    if not parts:
+        return np.zeros((0, FEATURE_COUNT), dtype=np.float32), np.zeros(0, dtype=np.float32)
+    return np.concatenate([x for x, _ in parts]), np.concatenate([y for _, y in parts])
+
+
+def read_positions(path: str, min_ply: int = 0) -> Iterator[Tuple[str, float]]:
+    with open(path, 'rb') as f:
+        is_record = f.read(len(MAGIC)) == MAGIC
+        if is_record:
+            f.seek(0)
+            if read_header(f) != "chess":
+                raise ValueError(f"{path} does not hold chess games")
+
+    if is_record:
+        for sample in read_samples(path):
+            if sample.ply >= min_ply:
+                yield sample.position, (sample.result + 1) / 2
+        return
+
+    with open(path) as f:
+        for line in f:
+            fen, _, result = line.strip().rpartition(';')
+            result = result.strip()
+            if fen:
+                yield fen.strip(), RESULTS[result] if result in RESULTS else float(result)
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-np.clip(x, -50, 50)))
+
+
+def loss(X, y, weights, scale: float) -> float:
+    p = np.clip(_sigmoid(scale * (X @ weights)), 1e-7, 1 - 1e-7)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def fit_scale(X, y, weights, candidates: Sequence[float] = tuple(k / 10 for k in range(1, 31))) -> float:
+    best = min(candidates, key=lambda k: loss(X, y, weights, k * math.log(10) / 400))
+    return best * math.log(10) / 400
+
+
+def fit(X, y, weights, scale: float, epochs: int = 500, learning_rate: float = 1.0,
+        beta1: float = 0.9, beta2: float = 0.999, log_every: int = 50):
+    weights = np.array(weights, dtype=np.float64)
+    rates = np.full_like(weights, learning_rate)
+    rates[TERM_OFFSET:] = learning_rate * TERM_LEARNING_RATE
+    m = np.zeros_like(weights)
+    v = np.zeros_like(weights)
+    for epoch in range(1, epochs + 1):
+        error = _sigmoid(scale * (X @ weights)) - y
+        gradient = scale * (X.T @ error) / len(y)
+        m = beta1 * m + (1 - beta1) * gradient
+        v = beta2 * v + (1 - beta2) * gradient ** 2
+        weights -= rates * (m / (1 - beta1 ** epoch)) / (np.sqrt(v / (1 - beta2 ** epoch)) + 1e-8)
+        if log_every and epoch % log_every == 0:
+            print(f"epoch {epoch}: loss {loss(X, y, weights, scale):.6f}")
+    return weights
+
+
+def format_constants(weights: Sequence[float]) -> str:
+    lines = ["from chess.chess_piece import ChessPiece", "", "", "piece_values = {"]
+    names = {'P': 'PAWN', 'N': 'KNIGHT', 'B': 'BISHOP', 'R': 'ROOK', 'Q': 'QUEEN'}
+    for index, kind in enumerate(MATERIAL):
+        value = int(round(weights[index]))
+        lines.append(f"        ChessPiece.WHITE_{names[kind]}: {value},")
+        lines.append(f"        ChessPiece.BLACK_{names[kind]}: {-value},")
+    lines += ["        ChessPiece.WHITE_KING: 20000,", "        ChessPiece.BLACK_KING: -20000", "    }", ""]
+
+    for index, name in enumerate(TERMS):
+        lines.append(f"{name} = {round(float(weights[TERM_OFFSET + index]), 3)}")
+
+    for index, name in enumerate(TABLES):
+        start = PST_OFFSET + index * 64
+        rows = [", ".join(str(int(round(weights[start + row * 8 + col]))) for col in range(8)) for row in range(8)]
+        lines += ["", f"{name} = ["]
+        lines += [f"    [{row}]," for row in rows[:-1]] + [f"    [{rows[-1]}]", "]"]
+    return "\n".join(lines) + "\n"
+
+
+def load_constants(path: str):
+    spec = importlib.util.spec_from_file_location("tuned_constants", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Texel tuning of AdaptiveChessStrategy weights")
+    parser.add_argument("data", nargs="+", help="Self-play record files or 'FEN;result' text files")
+    parser.add_argument("--output", default="tuned_constants.py")
+    parser.add_argument("--limit", type=int, help="Maximum number of positions")
+    parser.add_argument("--min-ply", type=int, default=8, help="Skip early plies of self-play games")
+    parser.add_argument("--epochs", type=int, default=500)
+    parser.add_argument("--learning-rate", type=float, default=1.0)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    if np is None:
+        raise SystemExit("Tuning needs the 'numpy' package")
+
+    positions = []
+    for path in args.data:
+        for position in read_positions(path, args.min_ply):
+            if args.limit is not None and len(positions) >= args.limit:
+                break
+            positions.append(position)
+
+    started = time.time()
+    X, y = extract_matrix(positions, args.workers)
+    print(f"{len(y)} positions, {FEATURE_COUNT} features, extracted in {time.time() - started:.1f}s")
+
+    weights = np.array(initial_weights(), dtype=np.float64)
+    scale = fit_scale(X, y, weights)
+    print(f"K = {scale * 400 / math.log(10):.2f}, initial loss {loss(X, y, weights, scale):.6f}")
+
+    weights = fit(X, y, weights, scale, args.epochs, args.learning_rate)
+    with open(args.output, 'w') as f:
+        f.write(format_constants(weights))
+    print(f"final loss {loss(X, y, weights, scale):.6f}, constants written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
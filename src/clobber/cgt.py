@@ -0,0 +1,135 @@
+from typing import Dict, FrozenSet, Iterable, Set, Tuple
+
+
+class Game:
+    __slots__ = ('left', 'right')
+
+    def __init__(self, left: FrozenSet['Game'], right: FrozenSet['Game']):
+        self.left = left
+        self.right = right
+
+    def __repr__(self):
+        if self is ZERO:
+            return '0'
+        if self is STAR:
+            return '*'
+        left = ','.join(sorted(repr(g) for g in self.left))
+        right = ','.join(sorted(repr(g) for g in self.right))
+        return f"{{{left}|{right}}}"
+
+
+_games: Dict[Tuple[FrozenSet[Game], FrozenSet[Game]], Game] = {}
+_le_cache: Dict[Tuple[Game, Game], bool] = {}
+_sum_cache: Dict[Tuple[Game, Game], Game] = {}
+_neg_cache: Dict[Game, Game] = {}
+
+
+def _intern(left: Iterable[Game], right: Iterable[Game]) -> Game:
+    key = (frozenset(left), frozenset(right))
+    game = _games.get(key)
+    if game is None:
+        game = Game(*key)
+        _games[key] = game
+    return game
+
+
+ZERO = _intern((), ())
+STAR = _intern((ZERO,), (ZERO,))
+
+
+def le(g: Game, h: Game) -> bool:
+    key = (g, h)
+    result = _le_cache.get(key)
+    if result is None:
+        result = (not any(le(h, gl) for gl in g.left) and
+                  not any(le(hr, g) for hr in h.right))
+        _le_cache[key] = result
+    return result
+
+
+def _maximal(options: Set[Game]) -> Set[Game]:
+    return {g for g in options if not any(h is not g and le(g, h) for h in options)}
+
+
+def _minimal(options: Set[Game]) -> Set[Game]:
+    return {g for g in options if not any(h is not g and le(h, g) for h in options)}
+
+
+def canonical(left: Iterable[Game], right: Iterable[Game]) -> Game:
+    left = set(left)
+    right = set(right)
+
+    while True:
+        left = _maximal(left)
+        right = _minimal(right)
+        game = _intern(left, right)
+
+        reversed_option = False
+        for gl in left:
+            for glr in gl.right:
+                if le(glr, game):
+                    left.remove(gl)
+                    left.update(glr.left)
+                    reversed_option = True
+                    break
+            if reversed_option:
+                break
+        if reversed_option:
+            continue
+
+        for gr in right:
+            for grl in gr.left:
+                if le(game, grl):
+                    right.remove(gr)
+                    right.update(grl.right)
+                    reversed_option = True
+                    break
+            if reversed_option:
+                break
+        if not reversed_option:
+            return game
+
+
+def add(g: Game, h: Game) -> Game:
+    if g is ZERO:
+        return h
+    if h is ZERO:
+        return g
+
+    key = (g, h)
+    result = _sum_cache.get(key)
+    if result is None:
+        left = [add(gl, h) for gl in g.left] + [add(g, hl) for hl in h.left]
+        right = [add(gr, h) for gr in g.right] + [add(g, hr) for hr in h.right]
+        result = canonical(left, right)
+        _sum_cache[key] = result
+        _sum_cache[(h, g)] = result
+    return result
+
+
+def neg(g: Game) -> Game:
+    result = _neg_cache.get(g)
+    if result is None:
+        result = _intern((neg(gr) for gr in g.right), (neg(gl) for gl in g.left))
+        _neg_cache[g] = result
+    return result
+
+
+def outcome(g: Game) -> str:
+    non_negative = le(ZERO, g)
+    non_positive = le(g, ZERO)
+    if non_negative and non_positive:
+        return 'P'
+    if non_negative:
+        return 'L'
+    if non_positive:
+        return 'R'
+    return 'N'
+
+
+def clear_caches():
+    # Tablicy _games nie czyscimy: zywe obiekty Game musza zostac jedynymi reprezentantami swoich
+    # wartosci, bo _maximal i _minimal porownuja je przez tozsamosc
+    _le_cache.clear()
+    _sum_cache.clear()
+    _neg_cache.clear()
@@ -1,15 +1,30 @@
-from typing import List, Tuple
-from general.enums import Piece
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+from general.enums import OPPOSITE, Piece
 from general.game import GameState
-from general.move import Move
+from general.move import FLAG_CAPTURE, MAX_COORDINATE, MOVE_MASK, Move
+
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def check_board_size(height: int, width: int):
+    if not (0 < height <= MAX_COORDINATE + 1 and 0 < width <= MAX_COORDINATE + 1):
+        raise ValueError(f"Board size must be between 1 and {MAX_COORDINATE + 1}")
 
 
 class Clobber(GameState):
 
     def __init__(self, height: int, width: int):
+        check_board_size(height, width)
         self.height = height
         self.width = width
         self.board, self.current_player = self.initialize_board()
+        self._legal_moves = None
+
+    def __deepcopy__(self, memo):
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        obj.board = [row[:] for row in self.board]
+        return obj
 
     @classmethod
     def from_canonical(cls, canonical_form: str) -> 'Clobber':
@@ -36,8 +51,16 @@ class Clobber(GameState):
                 else:
                     bord_row.append(Piece.EMPTY)
             board.append(bord_row)
+        check_board_size(len(board), len(board[0]))
         return board, player
 
+    def to_canonical(self) -> str:
+        rows = []
+        for row in self.board:
+            rows.append(''.join('W' if piece == Piece.WHITE else 'B' if piece == Piece.BLACK else '_' for piece in row))
+        player = 'B' if self.current_player == Piece.BLACK else 'W'
+        return f"{'/'.join(rows)} {player}"
+
     def initialize_board(self) -> Tuple[List[List[Piece]], Piece]:
         board = []
         for x in range(self.height):
@@ -48,33 +71,75 @@ class Clobber(GameState):
         return board, Piece.BLACK
 
     def get_legal_moves(self) -> List[Move]:
-        directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-        legal_moves = []
-
-        for y in range(self.height):
-            for x in range(self.width):
-                if self.board[y][x] == self.current_player:
-                    for dx, dy in directions:
+        return list(self.legal_move_index().values())
+
+    def generate_move_codes(self) -> List[int]:
+        player = self.current_player
+        opponent = OPPOSITE[player]
+        board = self.board
+        height, width = self.height, self.width
+        codes = []
+
+        for y in range(height):
+            for x in range(width):
+                if board[y][x] == player:
+                    origin = x << 27 | y << 19 | FLAG_CAPTURE
+                    for dx, dy in DIRECTIONS:
                         nx, ny = x + dx, y + dy
-                        if 0 <= nx < self.width and 0 <= ny < self.height:
-                            target_piece = self.board[ny][nx]
-                            if target_piece == ~self.board[y][x]:
-                                legal_moves.append(Move(from_pos=(x, y), to_pos=(nx, ny)))
-
-        return legal_moves
-
-    def make_move(self, move: Move):
-
-        fx, fy = move.from_pos
-        tx, ty = move.to_pos
+                        if 0 <= nx < width and 0 <= ny < height and board[ny][nx] == opponent:
+                            codes.append(origin | nx << 11 | ny << 3)
+
+        return codes
+
+    def iter_move_codes(self, hash_move: Optional[int] = None, killers: Sequence[int] = ()) -> Iterator[int]:
+        if self._cached_moves() is not None:
+            yield from super().iter_move_codes(hash_move, killers)
+            return
+
+        player = self.current_player
+        opponent = OPPOSITE[player]
+        board = self.board
+        height, width = self.height, self.width
+        tried = set()
+
+        for move in (hash_move, *killers):
+            if move is None:
+                continue
+            code = move & MOVE_MASK | FLAG_CAPTURE
+            fx, fy = code >> 27 & 0xFF, code >> 19 & 0xFF
+            tx, ty = code >> 11 & 0xFF, code >> 3 & 0xFF
+            if code not in tried and abs(fx - tx) + abs(fy - ty) == 1 and fy < height and fx < width \
+                    and ty < height and tx < width and board[fy][fx] == player and board[ty][tx] == opponent:
+                tried.add(code)
+                yield code
+
+        for y in range(height):
+            for x in range(width):
+                if board[y][x] == player:
+                    origin = x << 27 | y << 19 | FLAG_CAPTURE
+                    for dx, dy in DIRECTIONS:
+                        nx, ny = x + dx, y + dy
+                        if 0 <= nx < width and 0 <= ny < height and board[ny][nx] == opponent:
+                            code = origin | nx << 11 | ny << 3
+                            if code not in tried:
+                                yield code
+
+    def make_move(self, move: Union[Move, int]):
+        if isinstance(move, int):
+            fx, fy = move >> 27 & 0xFF, move >> 19 & 0xFF
+            tx, ty = move >> 11 & 0xFF, move >> 3 & 0xFF
+        else:
+            fx, fy = move.from_pos
+            tx, ty = move.to_pos
 
         self.board[ty][tx] = self.board[fy][fx]
         self.board[fy][fx] = Piece.EMPTY
-        self.current_player = ~self.current_player
+        self.current_player = OPPOSITE[self.current_player]
+        self._legal_moves = None
 
     def is_terminal(self) -> bool:
 
-        return len(self.get_legal_moves()) == 0
+        return len(self.legal_move_codes()) == 0
 
     def get_board(self):
         return self.board
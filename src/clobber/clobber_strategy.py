@@ -1,9 +1,25 @@
+from typing import List, Sequence
 from general.strategy import Strategy
 from general.game import GameState
 import copy
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _adjacent_pairs(pieces, targets):
+    return ((pieces[:, :, :-1] & targets[:, :, 1:]).sum(axis=(1, 2)) +
+            (pieces[:, :, 1:] & targets[:, :, :-1]).sum(axis=(1, 2)) +
+            (pieces[:, :-1, :] & targets[:, 1:, :]).sum(axis=(1, 2)) +
+            (pieces[:, 1:, :] & targets[:, :-1, :]).sum(axis=(1, 2)))
+
 
 class NaiveStrategy(Strategy):
+    move_diff_weight = 2.0
+    mobility_weight = 1.0
+
     def evaluate(self, game: GameState):
         game_copy = copy.deepcopy(game)
         current_player = game_copy.get_current_player()
@@ -11,32 +27,40 @@ class NaiveStrategy(Strategy):
         if game_copy.is_terminal():
             return float('-inf')
             
-        my_moves = len(game_copy.get_legal_moves())
+        my_moves = len(game_copy.legal_move_codes())
         
         game_copy.current_player = ~current_player
-        opponent_moves = len(game_copy.get_legal_moves())
-        
-        board = game_copy.get_board()
-        mobility_score = 0
-        
-        for y in range(game_copy.height):
-            for x in range(game_copy.width):
-                if board[y][x] == current_player:
-                    directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-                    piece_mobility = 0
-                    
-                    for dx, dy in directions:
-                        nx, ny = x + dx, y + dy
-                        if (0 <= nx < game_copy.width and 0 <= ny < game_copy.height and 
-                            board[ny][nx] == ~current_player):
-                            piece_mobility += 1
-                            
-                    mobility_score += piece_mobility
+        opponent_moves = len(game_copy.legal_move_codes())
         
-        move_diff_weight = 2.0
-        mobility_weight = 1.0
+        # każde bicie to para sąsiadujących pionów, więc mobilność równa się liczbie ruchów
+        mobility_score = my_moves
         
-        score = (move_diff_weight * (my_moves - opponent_moves) +
-                 mobility_weight * mobility_score)
+        score = (self.move_diff_weight * (my_moves - opponent_moves) +
+                 self.mobility_weight * mobility_score)
                  
-        return score
\ No newline at end of file
+        return score
+
+    def evaluate_batch(self, games: Sequence[GameState]) -> List[float]:
+        if np is None:
+            return super().evaluate_batch(games)
+
+        scores = [0.0] * len(games)
+        shapes = {}
+        for i, game in enumerate(games):
+            shapes.setdefault((game.height, game.width), []).append(i)
+
+        for shape, indices in shapes.items():
+            boards = np.array([[[piece.value for piece in row] for row in games[i].get_board()] for i in indices],
+                              dtype=np.int8).reshape(len(indices), *shape)
+            players = np.array([games[i].get_current_player().value for i in indices], dtype=np.int8)[:, None, None]
+            mine = boards == players
+            theirs = boards == 1 - players
+
+            my_moves = _adjacent_pairs(mine, theirs)
+            opponent_moves = _adjacent_pairs(theirs, mine)
+            values = self.move_diff_weight * (my_moves - opponent_moves) + self.mobility_weight * my_moves
+            values = np.where(my_moves == 0, float('-inf'), values)
+
+            for i, value in zip(indices, values.tolist()):
+                scores[i] = value
+        return scores
@@ -0,0 +1,141 @@
+from typing import Dict, List, Optional, Tuple
+from general.enums import Piece
+from general.game import GameState
+from general.move import Move
+from clobber.clobber import Clobber
+from clobber.symmetry import canonical_form, canonicalize, transformed_shape
+from clobber import cgt
+
+LEFT = Piece.BLACK
+RIGHT = Piece.WHITE
+
+
+def find_components(board: List[List[Piece]]) -> List[List[Tuple[int, int]]]:
+    height = len(board)
+    width = len(board[0]) if board else 0
+    seen = set()
+    components = []
+
+    for y in range(height):
+        for x in range(width):
+            if board[y][x] == Piece.EMPTY or (x, y) in seen:
+                continue
+
+            cells = []
+            colours = set()
+            stack = [(x, y)]
+            seen.add((x, y))
+            while stack:
+                cx, cy = stack.pop()
+                cells.append((cx, cy))
+                colours.add(board[cy][cx])
+                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                    nx, ny = cx + dx, cy + dy
+                    if (0 <= nx < width and 0 <= ny < height and (nx, ny) not in seen
+                            and board[ny][nx] != Piece.EMPTY):
+                        seen.add((nx, ny))
+                        stack.append((nx, ny))
+
+            if len(colours) == 2:
+                components.append(cells)
+
+    return components
+
+
+def component_state(board: List[List[Piece]], cells: List[Tuple[int, int]]) -> Clobber:
+    min_x = min(x for x, _ in cells)
+    min_y = min(y for _, y in cells)
+    width = max(x for x, _ in cells) - min_x + 1
+    height = max(y for _, y in cells) - min_y + 1
+
+    sub = Clobber.__new__(Clobber)
+    sub.height = height
+    sub.width = width
+    sub.board = [[Piece.EMPTY] * width for _ in range(height)]
+    for x, y in cells:
+        sub.board[y - min_y][x - min_x] = board[y][x]
+    sub.current_player = LEFT
+    return sub
+
+
+class ClobberEndgameSolver:
+    def __init__(self, max_component_size: int = 10):
+        self.max_component_size = max_component_size
+        self.cache: Dict[Tuple[int, int, bytes], cgt.Game] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def can_solve(self, state: GameState) -> bool:
+        if not isinstance(state, Clobber):
+            return False
+        components = find_components(state.board)
+        return all(len(cells) <= self.max_component_size for cells in components)
+
+    def value(self, state: Clobber) -> cgt.Game:
+        return self._board_value(state.board)
+
+    def outcome(self, state: Clobber) -> str:
+        return cgt.outcome(self.value(state))
+
+    def is_win_for_mover(self, state: Clobber) -> bool:
+        value = self.value(state)
+        if state.current_player == LEFT:
+            return not cgt.le(value, cgt.ZERO)
+        return not cgt.le(cgt.ZERO, value)
+
+    def solve(self, state: Clobber) -> Optional[Move]:
+        mover = state.current_player
+        for move in state.get_legal_moves():
+            board = [row[:] for row in state.board]
+            fx, fy = move.from_pos
+            tx, ty = move.to_pos
+            board[ty][tx] = board[fy][fx]
+            board[fy][fx] = Piece.EMPTY
+
+            value = self._board_value(board)
+            if mover == LEFT and cgt.le(cgt.ZERO, value):
+                return move
+            if mover == RIGHT and cgt.le(value, cgt.ZERO):
+                return move
+        return None
+
+    def clear(self):
+        self.cache.clear()
+        cgt.clear_caches()
+
+    def _board_value(self, board: List[List[Piece]]) -> cgt.Game:
+        total = cgt.ZERO
+        for cells in find_components(board):
+            total = cgt.add(total, self.component_value(component_state(board, cells)))
+        return total
+
+    def component_value(self, component: Clobber) -> cgt.Game:
+        key, symmetry, swapped = canonical_form(component)
+        height, width = transformed_shape(component.height, component.width, symmetry)
+        cache_key = (height, width, key[:-1])
+
+        value = self.cache.get(cache_key)
+        if value is None:
+            self.cache_misses += 1
+            canonical, _, _ = canonicalize(component)
+            value = self._compute_value(canonical)
+            self.cache[cache_key] = value
+        else:
+            self.cache_hits += 1
+
+        return cgt.neg(value) if swapped else value
+
+    def _compute_value(self, component: Clobber) -> cgt.Game:
+        options = {}
+        for player in (LEFT, RIGHT):
+            component.current_player = player
+            options[player] = []
+            for move in component.get_legal_moves():
+                board = [row[:] for row in component.board]
+                fx, fy = move.from_pos
+                tx, ty = move.to_pos
+                board[ty][tx] = board[fy][fx]
+                board[fy][fx] = Piece.EMPTY
+                options[player].append(self._board_value(board))
+        component.current_player = LEFT
+        return cgt.canonical(options[LEFT], options[RIGHT])
@@ -0,0 +1,115 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+from clobber.clobber import DIRECTIONS, Clobber
+from general.enums import OPPOSITE, Piece
+from general.move import FLAG_CAPTURE, MOVE_MASK, Move
+
+SPARSE_MIN_AREA = 256
+
+
+class SparseClobber(Clobber):
+
+    @property
+    def board(self) -> List[List[Piece]]:
+        if self._board_view is None:
+            board = [[Piece.EMPTY] * self.width for _ in range(self.height)]
+            for color, cells in self.pieces.items():
+                for y, x in cells:
+                    board[y][x] = color
+            self._board_view = board
+        return self._board_view
+
+    @board.setter
+    def board(self, board: List[List[Piece]]):
+        self.pieces: Dict[Piece, Set[Tuple[int, int]]] = {Piece.WHITE: set(), Piece.BLACK: set()}
+        for y, row in enumerate(board):
+            for x, piece in enumerate(row):
+                if piece != Piece.EMPTY:
+                    self.pieces[piece].add((y, x))
+        self._board_view = None
+        self._legal_moves = None
+
+    @classmethod
+    def from_canonical(cls, canonical_form: str) -> 'SparseClobber':
+        board, player = cls.get_initial_state_canonical(canonical_form)
+        obj = cls.__new__(cls)
+        obj.height = len(board)
+        obj.width = len(board[0]) if board else 0
+        obj.board = board
+        obj.current_player = player
+        return obj
+
+    def __deepcopy__(self, memo):
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        obj.pieces = {color: set(cells) for color, cells in self.pieces.items()}
+        obj._board_view = None
+        return obj
+
+    def generate_move_codes(self) -> List[int]:
+        player = self.current_player
+        targets = self.pieces[OPPOSITE[player]]
+        codes = []
+
+        for y, x in sorted(self.pieces[player]):
+            origin = x << 27 | y << 19 | FLAG_CAPTURE
+            for dx, dy in DIRECTIONS:
+                if (y + dy, x + dx) in targets:
+                    codes.append(origin | (x + dx) << 11 | (y + dy) << 3)
+
+        return codes
+
+    def iter_move_codes(self, hash_move: Optional[int] = None, killers: Sequence[int] = ()) -> Iterator[int]:
+        if self._cached_moves() is not None:
+            yield from super().iter_move_codes(hash_move, killers)
+            return
+
+        player = self.current_player
+        mine, targets = self.pieces[player], self.pieces[OPPOSITE[player]]
+        tried = set()
+
+        for move in (hash_move, *killers):
+            if move is None:
+                continue
+            code = move & MOVE_MASK | FLAG_CAPTURE
+            fx, fy = code >> 27 & 0xFF, code >> 19 & 0xFF
+            tx, ty = code >> 11 & 0xFF, code >> 3 & 0xFF
+            if code not in tried and abs(fx - tx) + abs(fy - ty) == 1 and (fy, fx) in mine and (ty, tx) in targets:
+                tried.add(code)
+                yield code
+
+        for y, x in sorted(mine):
+            origin = x << 27 | y << 19 | FLAG_CAPTURE
+            for dx, dy in DIRECTIONS:
+                if (y + dy, x + dx) in targets:
+                    code = origin | (x + dx) << 11 | (y + dy) << 3
+                    if code not in tried:
+                        yield code
+
+    def make_move(self, move: Union[Move, int]):
+        if isinstance(move, int):
+            fx, fy = move >> 27 & 0xFF, move >> 19 & 0xFF
+            tx, ty = move >> 11 & 0xFF, move >> 3 & 0xFF
+        else:
+            fx, fy = move.from_pos
+            tx, ty = move.to_pos
+
+        color = Piece.WHITE if (fy, fx) in self.pieces[Piece.WHITE] else Piece.BLACK
+        self.pieces[color].remove((fy, fx))
+        self.pieces[OPPOSITE[color]].discard((ty, tx))
+        self.pieces[color].add((ty, tx))
+        self.current_player = OPPOSITE[self.current_player]
+        self._legal_moves = None
+        self._board_view = None
+
+
+def new_clobber(height: int, width: int) -> Clobber:
+    if height * width >= SPARSE_MIN_AREA:
+        return SparseClobber(height, width)
+    return Clobber(height, width)
+
+
+def clobber_from_canonical(canonical_form: str) -> Clobber:
+    rows = canonical_form.split(' ')[0].strip().split('/')
+    if len(rows) * len(rows[0]) >= SPARSE_MIN_AREA:
+        return SparseClobber.from_canonical(canonical_form)
+    return Clobber.from_canonical(canonical_form)
@@ -0,0 +1,132 @@
+from functools import lru_cache
+from operator import itemgetter
+from typing import Callable, Tuple
+from general.enums import Piece
+from general.move import Move
+from clobber.clobber import Clobber
+import hashlib
+
+IDENTITY = 0
+ROTATE_90 = 1
+ROTATE_180 = 2
+ROTATE_270 = 3
+FLIP_HORIZONTAL = 4
+FLIP_VERTICAL = 5
+TRANSPOSE = 6
+ANTI_TRANSPOSE = 7
+
+SYMMETRIES = (IDENTITY, ROTATE_90, ROTATE_180, ROTATE_270,
+              FLIP_HORIZONTAL, FLIP_VERTICAL, TRANSPOSE, ANTI_TRANSPOSE)
+
+_SWAPS_SHAPE = (ROTATE_90, ROTATE_270, TRANSPOSE, ANTI_TRANSPOSE)
+_INVERSE = {ROTATE_90: ROTATE_270, ROTATE_270: ROTATE_90}
+_VALUES = {piece: piece.value for piece in Piece}
+_SWAP_COLOURS = bytes.maketrans(bytes([Piece.WHITE.value, Piece.BLACK.value]),
+                                bytes([Piece.BLACK.value, Piece.WHITE.value]))
+
+
+def transformed_shape(height: int, width: int, symmetry: int) -> Tuple[int, int]:
+    if symmetry in _SWAPS_SHAPE:
+        return width, height
+    return height, width
+
+
+def inverse_symmetry(symmetry: int) -> int:
+    return _INVERSE.get(symmetry, symmetry)
+
+
+def transform_point(x: int, y: int, height: int, width: int, symmetry: int) -> Tuple[int, int]:
+    if symmetry == IDENTITY:
+        return x, y
+    if symmetry == ROTATE_90:
+        return height - 1 - y, x
+    if symmetry == ROTATE_180:
+        return width - 1 - x, height - 1 - y
+    if symmetry == ROTATE_270:
+        return y, width - 1 - x
+    if symmetry == FLIP_HORIZONTAL:
+        return width - 1 - x, y
+    if symmetry == FLIP_VERTICAL:
+        return x, height - 1 - y
+    if symmetry == TRANSPOSE:
+        return y, x
+    if symmetry == ANTI_TRANSPOSE:
+        return height - 1 - y, width - 1 - x
+    raise ValueError(f"Unknown symmetry: {symmetry}")
+
+
+def transform_move(move: Move, height: int, width: int, symmetry: int) -> Move:
+    return Move(transform_point(*move.from_pos, height, width, symmetry),
+                transform_point(*move.to_pos, height, width, symmetry))
+
+
+@lru_cache(maxsize=None)
+def canonical_symmetries(height: int, width: int) -> Tuple[int, ...]:
+    if height == width:
+        return SYMMETRIES
+    if height < width:
+        return tuple(s for s in SYMMETRIES if s not in _SWAPS_SHAPE)
+    return _SWAPS_SHAPE
+
+
+@lru_cache(maxsize=None)
+def _permutation(height: int, width: int, symmetry: int) -> Callable[[bytes], bytes]:
+    new_height, new_width = transformed_shape(height, width, symmetry)
+    perm = [0] * (height * width)
+    for y in range(height):
+        for x in range(width):
+            nx, ny = transform_point(x, y, height, width, symmetry)
+            perm[ny * new_width + nx] = y * width + x
+
+    if len(perm) < 2:
+        return lambda cells: cells
+    getter = itemgetter(*perm)
+    return lambda cells: bytes(getter(cells))
+
+
+def canonical_form(game: Clobber) -> Tuple[bytes, int, bool]:
+    values = bytes([_VALUES[piece] for row in game.board for piece in row])
+    swapped_values = values.translate(_SWAP_COLOURS)
+    player = bytes([_VALUES[game.current_player]])
+    swapped_player = bytes([_VALUES[~game.current_player]])
+
+    best = None
+    for symmetry in canonical_symmetries(game.height, game.width):
+        permute = _permutation(game.height, game.width, symmetry)
+        for swapped, cells, to_move in ((False, values, player), (True, swapped_values, swapped_player)):
+            key = permute(cells) + to_move
+            if best is None or key < best[0]:
+                best = (key, symmetry, swapped)
+    return best
+
+
+def canonicalize(game: Clobber) -> Tuple[Clobber, int, bool]:
+    key, symmetry, swapped = canonical_form(game)
+    height, width = transformed_shape(game.height, game.width, symmetry)
+
+    canonical = Clobber.__new__(Clobber)
+    canonical.height = height
+    canonical.width = width
+    canonical.board = [[Piece(v) for v in key[row * width:(row + 1) * width]] for row in range(height)]
+    canonical.current_player = Piece(key[-1])
+    return canonical, symmetry, swapped
+
+
+def canonical_string(game: Clobber) -> str:
+    return canonicalize(game)[0].to_canonical()
+
+
+def symmetry_hash(game: Clobber) -> int:
+    key, symmetry, _ = canonical_form(game)
+    height, width = transformed_shape(game.height, game.width, symmetry)
+    digest = hashlib.blake2b(bytes([height, width]) + key, digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def to_canonical_move(move: Move, game: Clobber, symmetry: int) -> Move:
+    return transform_move(move, game.height, game.width, symmetry)
+
+
+def from_canonical_move(move: Move, game: Clobber, symmetry: int) -> Move:
+    height, width = transformed_shape(game.height, game.width, symmetry)
+    return transform_move(move, height, width, inverse_symmetry(symmetry))
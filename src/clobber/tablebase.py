@@ -0,0 +1,212 @@
+from typing import Dict, List, Optional, Tuple
+from general.enums import Piece
+from clobber.clobber import Clobber
+from clobber.endgame import find_components
+from clobber.symmetry import SYMMETRIES, transform_point, transformed_shape
+import mmap
+import os
+import re
+import sys
+
+MAGIC = b'CLTB'
+VERSION = 1
+HEADER_SIZE = 8
+
+WHITE = Piece.WHITE.value
+BLACK = Piece.BLACK.value
+EMPTY = Piece.EMPTY.value
+
+DEFAULT_SHAPES = [(2, 2), (2, 3), (2, 4), (3, 3), (2, 5), (2, 6), (3, 4), (3, 5), (4, 4)]
+
+_FILE_PATTERN = re.compile(r'^clobber_(\d+)x(\d+)\.tb$')
+
+
+def table_filename(height: int, width: int) -> str:
+    return f"clobber_{height}x{width}.tb"
+
+
+class TablebaseGenerator:
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.cells = height * width
+        self.size = 3 ** self.cells
+        self.powers = [3 ** i for i in range(self.cells)]
+        self.neighbours = self._neighbours()
+        self.symmetries = self._symmetry_permutations()
+        self.results = bytearray(self.size)
+        self.solved = 0
+
+    def _neighbours(self) -> List[List[int]]:
+        neighbours = []
+        for y in range(self.height):
+            for x in range(self.width):
+                cell = []
+                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < self.width and 0 <= ny < self.height:
+                        cell.append(ny * self.width + nx)
+                neighbours.append(cell)
+        return neighbours
+
+    def _symmetry_permutations(self) -> List[List[int]]:
+        permutations = []
+        for symmetry in SYMMETRIES:
+            if transformed_shape(self.height, self.width, symmetry) != (self.height, self.width):
+                continue
+            perm = [0] * self.cells
+            for y in range(self.height):
+                for x in range(self.width):
+                    nx, ny = transform_point(x, y, self.height, self.width, symmetry)
+                    perm[ny * self.width + nx] = y * self.width + x
+            permutations.append(perm)
+        return permutations
+
+    def _digits(self, index: int) -> List[int]:
+        digits = []
+        for _ in range(self.cells):
+            index, digit = divmod(index, 3)
+            digits.append(digit)
+        return digits
+
+    def _solve(self, index: int) -> int:
+        result = self.results[index]
+        if result:
+            return result
+
+        digits = self._digits(index)
+        swapped = 0
+        for i, digit in enumerate(digits):
+            if digit == WHITE:
+                swapped += BLACK * self.powers[i]
+            elif digit == EMPTY:
+                swapped += EMPTY * self.powers[i]
+
+        result = 1
+        for i, digit in enumerate(digits):
+            if digit != BLACK:
+                continue
+            for j in self.neighbours[i]:
+                if digits[j] == WHITE:
+                    child = swapped + EMPTY * self.powers[i] - BLACK * self.powers[j]
+                    if self._solve(child) == 1:
+                        result = 2
+                        break
+            if result == 2:
+                break
+
+        for perm in self.symmetries:
+            image = 0
+            for k, source in enumerate(perm):
+                image += digits[source] * self.powers[k]
+            self.results[image] = result
+        self.solved += 1
+        return result
+
+    def generate(self) -> bytearray:
+        for index in range(self.size):
+            if not self.results[index]:
+                self._solve(index)
+
+        bitmap = bytearray((self.size + 7) // 8)
+        for index, result in enumerate(self.results):
+            if result == 2:
+                bitmap[index >> 3] |= 1 << (index & 7)
+        return bitmap
+
+    def write(self, directory: str) -> str:
+        bitmap = self.generate()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, table_filename(self.height, self.width))
+        with open(path, 'wb') as f:
+            f.write(MAGIC + bytes([VERSION, self.height, self.width, 0]))
+            f.write(bitmap)
+        return path
+
+
+class ClobberTablebase:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.shapes: List[Tuple[int, int]] = []
+        self._files = {}
+        self._maps: Dict[Tuple[int, int], mmap.mmap] = {}
+        self.probes = 0
+        self.hits = 0
+
+        for name in sorted(os.listdir(directory)):
+            match = _FILE_PATTERN.match(name)
+            if match:
+                self.shapes.append((int(match.group(1)), int(match.group(2))))
+        self.shapes.sort(key=lambda shape: shape[0] * shape[1])
+
+    def _table(self, shape: Tuple[int, int]) -> mmap.mmap:
+        table = self._maps.get(shape)
+        if table is None:
+            f = open(os.path.join(self.directory, table_filename(*shape)), 'rb')
+            table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if table[:4] != MAGIC or table[4] != VERSION or tuple(table[5:7]) != shape:
+                table.close()
+                f.close()
+                raise ValueError(f"Corrupted tablebase file for shape {shape}")
+            self._files[shape] = f
+            self._maps[shape] = table
+        return table
+
+    def probe(self, state: Clobber) -> Optional[bool]:
+        self.probes += 1
+        live = [cell for component in find_components(state.board) for cell in component]
+        if not live:
+            self.hits += 1
+            return False
+
+        min_x = min(x for x, _ in live)
+        min_y = min(y for _, y in live)
+        box_width = max(x for x, _ in live) - min_x + 1
+        box_height = max(y for _, y in live) - min_y + 1
+
+        for height, width in self.shapes:
+            if box_height <= height and box_width <= width:
+                transposed = False
+            elif box_width <= height and box_height <= width:
+                transposed = True
+            else:
+                continue
+
+            swap = state.current_player == Piece.WHITE
+            index = 3 ** (height * width) - 1
+            for x, y in live:
+                lx, ly = x - min_x, y - min_y
+                if transposed:
+                    lx, ly = ly, lx
+                value = state.board[y][x].value
+                if swap:
+                    value = BLACK if value == WHITE else WHITE
+                index += (value - EMPTY) * 3 ** (ly * width + lx)
+
+            table = self._table((height, width))
+            self.hits += 1
+            return bool(table[HEADER_SIZE + (index >> 3)] >> (index & 7) & 1)
+
+        return None
+
+    def close(self):
+        for table in self._maps.values():
+            table.close()
+        for f in self._files.values():
+            f.close()
+        self._maps.clear()
+        self._files.clear()
+
+
+if __name__ == '__main__':
+    import time
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else 'tablebase'
+    shapes = [tuple(int(v) for v in arg.split('x')) for arg in sys.argv[2:]] or DEFAULT_SHAPES
+
+    for height, width in shapes:
+        start = time.time()
+        generator = TablebaseGenerator(height, width)
+        path = generator.write(directory)
+        print(f"{height}x{width}: {generator.size} positions, {generator.solved} solved after symmetry "
+              f"reduction, {os.path.getsize(path)} bytes, {time.time() - start:.1f}s")
@@ -1,10 +1,15 @@
 from abc import ABC, abstractmethod
 from general.game import GameState
-from typing import Optional
+from typing import Optional, Tuple
 from general.move import Move
+from general.profiler import SearchStats
 
 
 class Agent(ABC):
     @abstractmethod
     def choose_move(self, state: GameState) -> Optional[Move]:
         pass
+
+    def choose_move_with_stats(self, state: GameState) -> Tuple[Optional[Move], Optional[SearchStats]]:
+        move = self.choose_move(state)
+        return move, getattr(self, 'last_stats', None)
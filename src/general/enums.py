@@ -1,5 +1,8 @@
 from enum import Enum
 
+# Przeciwnik dla kodow int (Piece.value) - plansza szachowa trzyma kody, nie Enum
+OPPONENT_CODE = (1, 0, 2)
+
 
 class Piece(Enum):
     WHITE = 0
@@ -16,11 +19,8 @@ class Piece(Enum):
             return '_'
 
     def __invert__(self):
+        return OPPOSITE[self]
 
-        if self == Piece.WHITE:
-            return Piece.BLACK
-
-        elif self == Piece.BLACK:
-            return Piece.WHITE
 
-        return self
+# Plansza Clobbera zostaje na wartosciach Piece: endgame, symmetry, tablebase i API czytaja ja bezposrednio
+OPPOSITE = {Piece.WHITE: Piece.BLACK, Piece.BLACK: Piece.WHITE, Piece.EMPTY: Piece.EMPTY}
@@ -1,10 +1,59 @@
 from abc import ABC, abstractmethod
-from typing import List
-from general.move import Move
+from typing import Dict, Iterator, List, Optional, Sequence
+from general.move import MOVE_MASK, Move
+from general import metrics
 
 
 class GameState(ABC):
 
+    def legal_move_codes(self) -> List[int]:
+        cached = self._cached_moves()
+        if cached is None:
+            codes = self.generate_move_codes()
+            cached = self._legal_moves = [self.get_current_player(), codes, None]
+            if metrics.enabled:
+                metrics.POSITIONS_GENERATED.inc()
+                metrics.MOVES_GENERATED.inc(amount=len(codes))
+        return cached[1]
+
+    def legal_move_index(self) -> Dict[int, Move]:
+        self.legal_move_codes()
+        cached = self._legal_moves
+        if cached[2] is None:
+            cached[2] = {code & MOVE_MASK: Move.from_packed(code) for code in cached[1]}
+        return cached[2]
+
+    def _cached_moves(self) -> Optional[list]:
+        cached = getattr(self, '_legal_moves', None)
+        if cached is not None and cached[0] == self.get_current_player():
+            return cached
+        return None
+
+    def generate_move_codes(self) -> List[int]:
+        return [move.packed for move in self.get_legal_moves()]
+
+    def iter_move_codes(self, hash_move: Optional[int] = None, killers: Sequence[int] = ()) -> Iterator[int]:
+        codes = self.legal_move_codes()
+        index = {code & MOVE_MASK: code for code in codes}
+        first = []
+        for move in (hash_move, *killers):
+            code = index.get(move & MOVE_MASK) if move is not None else None
+            if code is not None and code not in first:
+                first.append(code)
+                yield code
+        for code in codes:
+            if code not in first:
+                yield code
+
+    def is_drawn(self) -> bool:
+        return False
+
+    def find_legal_move(self, move: Move) -> Optional[Move]:
+        legal = self.legal_move_index().get(move.packed)
+        if legal is None or (legal.from_pos, legal.to_pos, legal.prom) != (move.from_pos, move.to_pos, move.prom):
+            return None
+        return legal
+
     @abstractmethod
     def get_legal_moves(self) -> List[Move]:
         pass
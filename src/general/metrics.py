@@ -0,0 +1,147 @@
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Sequence, Tuple
+import time
+
+enabled = False
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REGISTRY: List['Metric'] = []
+
+_NULL_TIMER = nullcontext()
+
+
+def set_enabled(flag: bool):
+    global enabled
+    enabled = flag
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        REGISTRY.append(self)
+
+    def samples(self) -> List[str]:
+        return []
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        if enabled:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+                for labels, value in self.values.items()]
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self.values: Dict[tuple, float] = {}
+        self.functions: Dict[tuple, Callable[[], float]] = {}
+
+    def set(self, value: float, *labels):
+        if enabled:
+            self.values[labels] = value
+
+    def set_function(self, function: Callable[[], float], *labels):
+        self.functions[labels] = function
+
+    def samples(self) -> List[str]:
+        values = dict(self.values)
+        for labels, function in self.functions.items():
+            values[labels] = function()
+        return [f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+                for labels, value in values.items()]
+
+
+class _Timer:
+    def __init__(self, histogram: 'Histogram', labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self.counts: Dict[tuple, List[int]] = {}
+        self.sums: Dict[tuple, float] = {}
+
+    def observe(self, value: float, *labels):
+        if not enabled:
+            return
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * len(self.buckets)
+            self.sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def time(self, *labels):
+        return _Timer(self, labels) if enabled else _NULL_TIMER
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, counts in self.counts.items():
+            total = 0
+            for bound, count in zip(self.buckets, counts):
+                total += count
+                le = _format_labels(self.labels, labels, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {total}")
+            suffix = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(self.sums[labels])}")
+            lines.append(f"{self.name}_count{suffix} {total}")
+        return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+POSITIONS_GENERATED = Counter('movegen_positions_total', 'Positions whose legal moves were generated outside engine workers')
+MOVES_GENERATED = Counter('movegen_moves_total', 'Legal moves generated outside engine workers')
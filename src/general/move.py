@@ -1,17 +1,113 @@
 from typing import Optional, Tuple
 
+PROMOTION_CODES = {None: 0, 'Q': 1, 'R': 2, 'B': 3, 'N': 4}
+PROMOTIONS = {code: prom for prom, code in PROMOTION_CODES.items()}
+UNKNOWN_PROMOTION = 7
+
+FLAG_CAPTURE = 1 << 35
+FLAG_EN_PASSANT = 1 << 36
+FLAG_CASTLE = 1 << 37
+FLAG_DOUBLE_PUSH = 1 << 38
+MOVE_MASK = (1 << 35) - 1
+MAX_COORDINATE = 0xFF
+
+
+def pack_move(from_pos: Tuple[int, int], to_pos: Tuple[int, int], prom: Optional[str] = None,
+              flags: int = 0) -> int:
+    return (from_pos[0] << 27 | from_pos[1] << 19 | to_pos[0] << 11 | to_pos[1] << 3
+            | PROMOTION_CODES.get(prom, UNKNOWN_PROMOTION) | flags)
+
+
+def move_from(packed: int) -> Tuple[int, int]:
+    return packed >> 27 & 0xFF, packed >> 19 & 0xFF
+
+
+def move_to(packed: int) -> Tuple[int, int]:
+    return packed >> 11 & 0xFF, packed >> 3 & 0xFF
+
+
+def move_promotion(packed: int) -> Optional[str]:
+    return PROMOTIONS.get(packed & 7)
+
+
+def move_flags(packed: int) -> int:
+    return packed & ~MOVE_MASK
+
+
+def unpack_move(packed: int) -> 'Move':
+    return Move.from_packed(packed)
+
+
+def square_name(file: int, rank: int, height: int = 8) -> str:
+    return chr(ord('a') + file) + str(height - rank)
+
+
+def parse_square(name: str, height: int = 8) -> Tuple[int, int]:
+    return ord(name[0]) - ord('a'), height - int(name[1:])
+
+
+def to_algebraic(packed: int, height: int = 8, row_major: bool = True) -> dict:
+    (from_a, from_b), (to_a, to_b) = move_from(packed), move_to(packed)
+    if row_major:
+        return {"from": square_name(from_b, from_a, height), "to": square_name(to_b, to_a, height),
+                "promotion": move_promotion(packed)}
+    return {"from": square_name(from_a, from_b, height), "to": square_name(to_a, to_b, height)}
+
+
+def from_algebraic(data: dict, height: int = 8, row_major: bool = True) -> Optional[int]:
+    from_name, to_name = data.get("from"), data.get("to")
+    if not from_name or not to_name:
+        return None
+    from_file, from_rank = parse_square(from_name, height)
+    to_file, to_rank = parse_square(to_name, height)
+    if not all(0 <= value < height for value in (from_rank, to_rank)) or \
+            not all(0 <= value < 26 for value in (from_file, to_file)):
+        return None
+    if row_major:
+        return pack_move((from_rank, from_file), (to_rank, to_file), data.get("promotion"))
+    return pack_move((from_file, from_rank), (to_file, to_rank))
+
+
+def to_uci(packed: int) -> str:
+    algebraic = to_algebraic(packed)
+    return algebraic["from"] + algebraic["to"] + (algebraic["promotion"] or '').lower()
+
+
+def from_uci(text: str) -> int:
+    return from_algebraic({"from": text[:2], "to": text[2:4], "promotion": text[4:].upper() or None})
+
 
 class Move:
+    __slots__ = ('from_pos', 'to_pos', 'prom', 'packed')
 
     def __init__(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int], prom: Optional[str] = None):
         self.from_pos = from_pos
         self.to_pos = to_pos
         self.prom = prom
+        self.packed = pack_move(from_pos, to_pos, prom)
+
+    @classmethod
+    def from_packed(cls, packed: int) -> 'Move':
+        move = cls.__new__(cls)
+        move.from_pos = (packed >> 27 & 0xFF, packed >> 19 & 0xFF)
+        move.to_pos = (packed >> 11 & 0xFF, packed >> 3 & 0xFF)
+        move.prom = PROMOTIONS.get(packed & 7)
+        move.packed = packed & MOVE_MASK
+        return move
 
     def __eq__(self, other):
         if not isinstance(other, Move):
             return NotImplemented
-        return (self.from_pos, self.to_pos, self.prom) == (other.from_pos, other.to_pos, other.prom)
+        return self.packed == other.packed and self.prom == other.prom
+
+    def __hash__(self):
+        return self.packed
+
+    def __getstate__(self):
+        return self.from_pos, self.to_pos, self.prom
+
+    def __setstate__(self, state):
+        self.__init__(*state)
 
     def __repr__(self):
         return f"Move {self.from_pos} -> {self.to_pos}"
@@ -0,0 +1,168 @@
+from typing import Callable, Dict, List, Optional, Sequence
+from general.game import GameState
+from general.strategy import Strategy
+import cProfile
+import copy
+import os
+import time
+
+
+class SearchStats:
+    def __init__(self):
+        self.phases: Dict[str, List[float]] = {}
+        self.nodes_per_depth: Dict[int, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.total_time = 0.0
+        self.profile_path: Optional[str] = None
+
+    def add(self, phase: str, elapsed: float):
+        entry = self.phases.get(phase)
+        if entry is None:
+            entry = self.phases[phase] = [0.0, 0]
+        entry[0] += elapsed
+        entry[1] += 1
+
+    def count_node(self, depth: int):
+        self.nodes_per_depth[depth] = self.nodes_per_depth.get(depth, 0) + 1
+
+    def timed(self, phase: str, function: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(phase, time.perf_counter() - started)
+        return wrapper
+
+    def branching_factor(self) -> float:
+        depths = [depth for depth, nodes in self.nodes_per_depth.items() if nodes]
+        if not depths or max(depths) == 0 or not self.nodes_per_depth.get(0):
+            return 0.0
+        deepest = max(depths)
+        return (self.nodes_per_depth[deepest] / self.nodes_per_depth[0]) ** (1 / deepest)
+
+    def as_dict(self) -> dict:
+        return {
+            "total_time": round(self.total_time, 6),
+            "phases": {phase: {"time": round(elapsed, 6), "calls": calls,
+                               "share": round(elapsed / self.total_time, 4) if self.total_time else 0.0}
+                       for phase, (elapsed, calls) in sorted(self.phases.items(), key=lambda item: -item[1][0])},
+            "nodes_per_depth": dict(sorted(self.nodes_per_depth.items())),
+            "branching_factor": round(self.branching_factor(), 3),
+            "counters": dict(self.counters),
+            "profile_path": self.profile_path
+        }
+
+    def __repr__(self):
+        return f"SearchStats({self.as_dict()})"
+
+
+class ProfiledState:
+    __slots__ = ('state', 'stats')
+
+    def __init__(self, state: GameState, stats: SearchStats):
+        object.__setattr__(self, 'state', state)
+        object.__setattr__(self, 'stats', stats)
+
+    # isinstance() sprawdza __class__, wiec opakowany stan dalej przechodzi testy typu gry
+    # (ClobberEndgameSolver.can_solve, state_key w dfpn) bez wiedzy tych modulow o profilerze
+    @property
+    def __class__(self):
+        return self.state.__class__
+
+    def __getattr__(self, name):
+        return getattr(self.state, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.state, name, value)
+
+    def __deepcopy__(self, memo):
+        started = time.perf_counter()
+        state = copy.deepcopy(self.state, memo)
+        self.stats.add("copy", time.perf_counter() - started)
+        return ProfiledState(state, self.stats)
+
+    def get_legal_moves(self):
+        started = time.perf_counter()
+        legal_moves = self.state.get_legal_moves()
+        self.stats.add("legal_moves", time.perf_counter() - started)
+        return legal_moves
+
+    def legal_move_codes(self):
+        started = time.perf_counter()
+        codes = self.state.legal_move_codes()
+        self.stats.add("legal_moves", time.perf_counter() - started)
+        return codes
+
+    def iter_move_codes(self, hash_move=None, killers=()):
+        codes = self.state.iter_move_codes(hash_move, killers)
+        elapsed = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                code = next(codes, None)
+                elapsed += time.perf_counter() - started
+                if code is None:
+                    return
+                yield code
+        finally:
+            self.stats.add("legal_moves", elapsed)
+
+    def is_terminal(self):
+        started = time.perf_counter()
+        terminal = self.state.is_terminal()
+        self.stats.add("is_terminal", time.perf_counter() - started)
+        return terminal
+
+    def is_drawn(self):
+        started = time.perf_counter()
+        drawn = self.state.is_drawn()
+        self.stats.add("is_terminal", time.perf_counter() - started)
+        return drawn
+
+    def make_move(self, move):
+        started = time.perf_counter()
+        self.state.make_move(move)
+        self.stats.add("make_move", time.perf_counter() - started)
+
+
+class ProfiledStrategy(Strategy):
+    def __init__(self, strategy: Strategy, stats: SearchStats):
+        self.strategy = strategy
+        self.stats = stats
+
+    def evaluate(self, game):
+        if isinstance(game, ProfiledState):
+            game = game.state
+        started = time.perf_counter()
+        value = self.strategy.evaluate(game)
+        self.stats.add("evaluate", time.perf_counter() - started)
+        return value
+
+
+def run_profiled(agent, stats: SearchStats, search: Callable, state: GameState, phases: Sequence[str] = (),
+                 dump: Optional[str] = None):
+    strategy = getattr(agent, 'strategy', None)
+    if strategy is not None:
+        agent.strategy = ProfiledStrategy(strategy, stats)
+    for phase in phases:
+        setattr(agent, phase, stats.timed(phase.strip('_'), getattr(agent, phase)))
+
+    profiler = cProfile.Profile() if dump is not None else None
+    started = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        return search(ProfiledState(state, stats))
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        stats.total_time = time.perf_counter() - started
+        for phase in phases:
+            delattr(agent, phase)
+        if strategy is not None:
+            agent.strategy = strategy
+        if profiler is not None:
+            os.makedirs(os.path.dirname(dump) or '.', exist_ok=True)
+            profiler.dump_stats(dump)
+            stats.profile_path = dump
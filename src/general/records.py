@@ -0,0 +1,96 @@
+from collections import namedtuple
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from general.move import Move, unpack_move
+import math
+import struct
+import zlib
+
+MAGIC = b'CLSP'
+VERSION = 3
+GAME_TYPES = ("clobber", "chess")
+
+FILE_HEADER = struct.Struct('<4sBB2x')
+CHUNK_HEADER = struct.Struct('<III')
+GAME_HEADER = struct.Struct('<bI')
+PLY = struct.Struct('<IQf')
+
+CHUNK_SIZE = 1 << 20
+COMPRESSION_LEVEL = 6
+
+Sample = namedtuple('Sample', ['game', 'ply', 'position', 'move', 'score', 'result'])
+GameRecord = Tuple[int, List[Tuple[str, int, float]]]
+
+
+class RecordWriter:
+    def __init__(self, f: BinaryIO, game_type: str, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.buffered_games = 0
+        self.buffered_positions = 0
+        self.games = 0
+        self.positions = 0
+        self.f.write(FILE_HEADER.pack(MAGIC, VERSION, GAME_TYPES.index(game_type)))
+
+    def write_game(self, result: int, plies: List[Tuple[str, int, float]]):
+        self.buffer += GAME_HEADER.pack(result, len(plies))
+        for position, move, score in plies:
+            encoded = position.encode()
+            self.buffer += PLY.pack(len(encoded), move, score)
+            self.buffer += encoded
+        self.buffered_games += 1
+        self.buffered_positions += len(plies)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffered_games:
+            return
+        payload = zlib.compress(bytes(self.buffer), COMPRESSION_LEVEL)
+        self.f.write(CHUNK_HEADER.pack(len(payload), self.buffered_games, self.buffered_positions))
+        self.f.write(payload)
+        self.games += self.buffered_games
+        self.positions += self.buffered_positions
+        self.buffer = bytearray()
+        self.buffered_games = 0
+        self.buffered_positions = 0
+
+    def close(self):
+        self.flush()
+        self.f.flush()
+
+
+def read_header(f: BinaryIO) -> str:
+    magic, version, game_type = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a self-play record file")
+    return GAME_TYPES[game_type]
+
+
+def read_games(path: str) -> Iterator[Tuple[int, List[Tuple[str, Move, Optional[float]]]]]:
+    with open(path, 'rb') as f:
+        read_header(f)
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return
+            size, games, _ = CHUNK_HEADER.unpack(header)
+            payload = zlib.decompress(f.read(size))
+            offset = 0
+            for _ in range(games):
+                result, count = GAME_HEADER.unpack_from(payload, offset)
+                offset += GAME_HEADER.size
+                plies = []
+                for _ in range(count):
+                    length, move, score = PLY.unpack_from(payload, offset)
+                    offset += PLY.size
+                    position = payload[offset:offset + length].decode()
+                    offset += length
+                    plies.append((position, unpack_move(move), None if math.isnan(score) else score))
+                yield result, plies
+
+
+def read_samples(path: str) -> Iterator[Sample]:
+    for game, (result, plies) in enumerate(read_games(path)):
+        for ply, (position, move, score) in enumerate(plies):
+            yield Sample(game, ply, position, move, score, result)
@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
+from typing import List, Sequence
 from general.game import GameState
 
 class Strategy(ABC):
 
     @abstractmethod
     def evaluate(self, game: GameState):
-        pass
\ No newline at end of file
+        pass
+
+    def evaluate_batch(self, games: Sequence[GameState]) -> List[float]:
+        return [self.evaluate(game) for game in games]
@@ -1,10 +1,15 @@
 from clobber.clobber import Clobber
 from clobber.clobber_strategy import NaiveStrategy
+from clobber.endgame import ClobberEndgameSolver
+from clobber.tablebase import ClobberTablebase
 from agents.mcts import MCTS
 from agents.minmax import MinMax
 from general.enums import Piece
+import logging
 import os
 
+TABLEBASE_DIR = 'tablebase'
+
 
 def print_board(board, current_player):
     print(f"Current Player: {'BLACK' if current_player == Piece.BLACK else 'WHITE'}")
@@ -27,8 +32,11 @@ def print_board(board, current_player):
 def main():
     game = Clobber(5, 5)
 
-    black_agent = MinMax(depth=3, strategy=NaiveStrategy(), player=Piece.WHITE)
-    white_agent = MCTS(player=Piece.BLACK, simulation_time=1.0)
+    endgame_solver = ClobberEndgameSolver(max_component_size=10)
+    tablebase = ClobberTablebase(TABLEBASE_DIR) if os.path.isdir(TABLEBASE_DIR) else None
+    black_agent = MinMax(depth=3, strategy=NaiveStrategy(), player=Piece.WHITE, endgame_solver=endgame_solver,
+                         tablebase=tablebase)
+    white_agent = MCTS(player=Piece.BLACK, simulation_time=1.0, endgame_solver=endgame_solver, tablebase=tablebase)
 
     agents = {
         Piece.WHITE: black_agent,
@@ -62,4 +70,7 @@ def main():
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO,
+                        filename='minmax.log',
+                        format='[%(levelname)s] %(message)s')
     main()
@@ -0,0 +1,188 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import List, Optional, Tuple
+from chess.chess_piece import EMPTY, PIECES
+from chess.chess_state import Chess
+from clobber.sparse import clobber_from_canonical, new_clobber
+from general.enums import Piece
+from general.game import GameState
+from general.move import MOVE_MASK, to_algebraic, to_uci
+import argparse
+import copy
+import os
+import random
+import time
+
+ZOBRIST_SEED = 20240229
+TABLE_SIZE = 1 << 20
+
+
+class Zobrist:
+    def __init__(self, squares: int, pieces: int = len(PIECES), seed: int = ZOBRIST_SEED):
+        rng = random.Random(seed)
+        self.pieces = [[rng.getrandbits(64) for _ in range(pieces)] for _ in range(squares)]
+        self.side = rng.getrandbits(64)
+        self.castling = [rng.getrandbits(64) for _ in range(4)]
+        self.enpassant = [rng.getrandbits(64) for _ in range(8)]
+
+    @classmethod
+    def for_state(cls, state: GameState) -> 'Zobrist':
+        board = state.board
+        return cls(len(board) * len(board[0]))
+
+    def key(self, state: GameState) -> int:
+        if isinstance(state, Chess):
+            cells, empty = chain.from_iterable(state.board), EMPTY
+        else:
+            cells, empty = (piece.value for row in state.board for piece in row), Piece.EMPTY.value
+
+        key = 0
+        for square, piece in enumerate(cells):
+            if piece != empty:
+                key ^= self.pieces[square][piece]
+        if state.current_player == Piece.BLACK:
+            key ^= self.side
+
+        if isinstance(state, Chess):
+            rights = (state.white_castle_king_side, state.white_castle_queen_side,
+                      state.black_castle_king_side, state.black_castle_queen_side)
+            for right, value in zip(rights, self.castling):
+                if right:
+                    key ^= value
+            if state.enpassant_square is not None:
+                key ^= self.enpassant[state.enpassant_square[1]]
+        return key
+
+
+class PerftTable:
+    def __init__(self, zobrist: Zobrist, capacity: int = TABLE_SIZE):
+        self.zobrist = zobrist
+        self.capacity = capacity
+        self.keys = [None] * capacity
+        self.depths = [0] * capacity
+        self.nodes = [0] * capacity
+        self.hits = 0
+        self.stored = 0
+
+    def lookup(self, key: int, depth: int) -> Optional[int]:
+        slot = key % self.capacity
+        if self.keys[slot] == key and self.depths[slot] == depth:
+            self.hits += 1
+            return self.nodes[slot]
+        return None
+
+    def store(self, key: int, depth: int, nodes: int):
+        slot = key % self.capacity
+        if self.keys[slot] is None:
+            self.stored += 1
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.nodes[slot] = nodes
+
+
+def perft(state: GameState, depth: int, table: Optional[PerftTable] = None) -> int:
+    if depth == 0:
+        return 1
+
+    codes = state.legal_move_codes()
+    if depth == 1:
+        return len(codes)
+
+    key = None
+    if table is not None:
+        key = table.zobrist.key(state)
+        nodes = table.lookup(key, depth)
+        if nodes is not None:
+            return nodes
+
+    nodes = 0
+    for code in codes:
+        child = copy.deepcopy(state)
+        child.make_move(code)
+        nodes += perft(child, depth - 1, table)
+
+    if table is not None:
+        table.store(key, depth, nodes)
+    return nodes
+
+
+_table = None
+
+
+def _init_worker(squares: int, table_size: int):
+    global _table
+    _table = PerftTable(Zobrist(squares), table_size) if table_size else None
+
+
+def _perft_child(state: GameState, code: int, depth: int) -> int:
+    child = copy.deepcopy(state)
+    child.make_move(code)
+    return perft(child, depth - 1, _table)
+
+
+def divide(state: GameState, depth: int, workers: Optional[int] = 1,
+           table_size: int = TABLE_SIZE) -> List[Tuple[int, int]]:
+    codes = state.legal_move_codes()
+    if depth <= 1:
+        return [(code, 1) for code in codes]
+
+    board = state.board
+    squares = len(board) * len(board[0])
+    if workers == 1:
+        _init_worker(squares, table_size)
+        return [(code, _perft_child(state, code, depth)) for code in codes]
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                             initargs=(squares, table_size)) as executor:
+        counts = executor.map(_perft_child, [state] * len(codes), codes, [depth] * len(codes))
+        return list(zip(codes, counts))
+
+
+def parallel_perft(state: GameState, depth: int, workers: Optional[int] = None, table_size: int = TABLE_SIZE) -> int:
+    if depth <= 1:
+        return perft(state, depth)
+    return sum(nodes for _, nodes in divide(state, depth, workers, table_size))
+
+
+def move_name(state: GameState, code: int) -> str:
+    if isinstance(state, Chess):
+        return to_uci(code)
+    algebraic = to_algebraic(code & MOVE_MASK, state.height, row_major=False)
+    return algebraic["from"] + algebraic["to"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move generator node counts (perft)")
+    parser.add_argument("depth", type=int)
+    parser.add_argument("--game", choices=("chess", "clobber"), default="chess")
+    parser.add_argument("--fen", default=Chess.DEFAULT_FEN, help="Chess position")
+    parser.add_argument("--position", help="Clobber position in canonical form")
+    parser.add_argument("--height", type=int, default=5)
+    parser.add_argument("--width", type=int, default=5)
+    parser.add_argument("--workers", type=int, help="Processes for root splitting (default: all cores)")
+    parser.add_argument("--hash-size", type=int, default=TABLE_SIZE, help="Perft table entries per process, 0 to disable")
+    parser.add_argument("--divide", action="store_true", help="Print the node count below every root move")
+    args = parser.parse_args()
+
+    if args.game == "chess":
+        state = Chess(args.fen)
+    elif args.position:
+        state = clobber_from_canonical(args.position)
+    else:
+        state = new_clobber(args.height, args.width)
+
+    started = time.perf_counter()
+    if args.divide:
+        counts = divide(state, args.depth, args.workers, args.hash_size)
+        for code, nodes in sorted(counts, key=lambda item: move_name(state, item[0])):
+            print(f"{move_name(state, code)}: {nodes}")
+        nodes = sum(count for _, count in counts)
+        print()
+    else:
+        nodes = parallel_perft(state, args.depth, args.workers, args.hash_size)
+    elapsed = time.perf_counter() - started
+    print(f"{nodes} nodes in {elapsed:.2f}s ({nodes / max(elapsed, 1e-9):.0f} nodes/s)")
+
+
+if __name__ == '__main__':
+    main()
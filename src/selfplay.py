@@ -0,0 +1,111 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Optional, Tuple
+from api.engine_pool import build_agent, encode_state
+from arena import MAX_PLIES, OPENING_PLIES, new_game, play_opening, winner
+from general.enums import Piece
+from general.move import pack_move
+from general.records import GAME_TYPES, GameRecord, RecordWriter, read_samples
+import argparse
+import json
+import math
+import os
+import random
+
+
+def play_selfplay_game(game_type: str, specs: Tuple[dict, dict], seed: int, height: int = 5, width: int = 5,
+                       opening_plies: int = OPENING_PLIES) -> GameRecord:
+    rng = random.Random(seed)
+    random.seed(seed)
+    state = new_game(game_type, height, width)
+    play_opening(state, opening_plies, rng)
+
+    to_move = state.get_current_player()
+    agents = {to_move: build_agent(game_type, specs[0], to_move, specs[0].get("think_time")),
+              ~to_move: build_agent(game_type, specs[1], ~to_move, specs[1].get("think_time"))}
+
+    plies = []
+    won = None
+    while not state.is_terminal() and len(plies) < MAX_PLIES:
+        color = state.get_current_player()
+        position = encode_state(game_type, state)
+        move = agents[color].choose_move(state)
+        if move is None:
+            won = ~color
+            break
+        score = getattr(agents[color], "last_score", None)
+        plies.append((position, pack_move(move.from_pos, move.to_pos, move.prom),
+                      score if score is not None and math.isfinite(score) else math.nan))
+        state.make_move(move)
+    else:
+        won = winner(state)
+
+    result = 0 if won is None else (1 if won == Piece.WHITE else -1)
+    return result, plies
+
+
+def generate(path: str, game_type: str, specs: Tuple[dict, dict], games: int, height: int = 5, width: int = 5,
+             workers: Optional[int] = None, seed: int = 0, opening_plies: int = OPENING_PLIES) -> RecordWriter:
+    workers = workers or os.cpu_count()
+    with open(path, 'wb') as f, ProcessPoolExecutor(max_workers=workers) as executor:
+        writer = RecordWriter(f, game_type)
+        seeds = iter(range(seed, seed + games))
+        pending = set()
+
+        def submit():
+            for game_seed in seeds:
+                pending.add(executor.submit(play_selfplay_game, game_type, specs, game_seed, height, width,
+                                            opening_plies))
+                return
+
+        for _ in range(workers * 2):
+            submit()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                writer.write_game(*future.result())
+                submit()
+
+        writer.close()
+    return writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play data generator writing compressed game records")
+    parser.add_argument("output")
+    parser.add_argument("agents", nargs="*", type=json.loads,
+                        help="One or two agent specs as JSON (default: MinMax depth 2 for both sides)")
+    parser.add_argument("--game", choices=GAME_TYPES, default="clobber")
+    parser.add_argument("--height", type=int, default=5)
+    parser.add_argument("--width", type=int, default=5)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--openings", type=int, default=OPENING_PLIES, help="Random opening plies")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--read", action="store_true", help="Summarise an existing record file instead")
+    args = parser.parse_args()
+
+    if args.read:
+        positions = 0
+        results = {1: 0, 0: 0, -1: 0}
+        for sample in read_samples(args.output):
+            positions += 1
+            if sample.ply == 0:
+                results[sample.result] += 1
+        print(f"{sum(results.values())} games, {positions} positions, "
+              f"white +{results[1]} ={results[0]} -{results[-1]}")
+        return
+
+    specs = args.agents or [{"engine": "minmax", "depth": 2}]
+    if len(specs) > 2:
+        parser.error("Give one or two agent specs")
+    specs = (specs[0], specs[-1])
+
+    writer = generate(args.output, args.game, specs, args.games, args.height, args.width, args.workers, args.seed,
+                      args.openings)
+    print(f"{writer.games} games, {writer.positions} positions, {os.path.getsize(args.output)} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,430 @@
+import asyncio
+import json
+import pytest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from api.broadcast import SpectatorQueue, broadcast
+from api.game_store import GameStore
+from api.loadtest import LoadStats, percentile
+from api import analysis, engine_pool, wire
+from api import metrics as api_metrics
+from api.room_bus import KEY_TTL, LocalRoomBus, create_room_bus, encode_command, read_reply
+from api.snapshots import SnapshotCache
+from clobber.clobber import Clobber
+from general import metrics
+from general.metrics import Counter, Gauge, Histogram
+
+
+def build(game):
+    return {"board": game.to_canonical(), "moves": len(game.get_legal_moves())}
+
+
+def test_snapshot_is_built_once_per_version():
+    cache = SnapshotCache(build)
+    game = Clobber(3, 3)
+
+    first = cache.get("g", game).encode(status="move made")
+    second = cache.get("g", game).encode(status="move made")
+    assert first is second
+    assert cache.builds == 1
+    assert json.loads(cache.get("g", game).encode(color="white"))["color"] == "white"
+
+    game.make_move(game.get_legal_moves()[0])
+    cache.invalidate("g")
+    assert json.loads(cache.get("g", game).encode())["board"] == game.to_canonical()
+    assert cache.builds == 2
+    assert cache.version("g") == 1
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    async def send_text(self, message: str):
+        await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_slow_spectator_is_coalesced_to_latest_state():
+    async def scenario():
+        socket = FakeSocket(delay=0.05)
+        spectator = SpectatorQueue(socket, max_size=2)
+        spectator.start()
+        for i in range(10):
+            spectator.offer(str(i))
+        await asyncio.sleep(0.3)
+        spectator.stop()
+        return socket, spectator
+
+    socket, spectator = asyncio.run(scenario())
+    assert socket.sent[-1] == "9"
+    assert len(socket.sent) < 10
+    assert spectator.coalesced > 0
+
+
+def test_spectator_lagging_too_long_is_dropped():
+    async def scenario():
+        socket = FakeSocket(delay=1.0)
+        spectator = SpectatorQueue(socket, max_size=1, max_coalesced=3)
+        spectator.start()
+        accepted = [spectator.offer(str(i)) for i in range(10)]
+        await asyncio.sleep(0)
+        return socket, spectator, accepted
+
+    socket, spectator, accepted = asyncio.run(scenario())
+    assert spectator.closed
+    assert socket.closed
+    assert accepted[-1] is False
+
+
+def test_spectator_catching_up_between_bursts_is_kept():
+    async def scenario():
+        socket = FakeSocket(delay=0.01)
+        spectator = SpectatorQueue(socket, max_size=1, max_coalesced=3)
+        spectator.start()
+        for burst in range(5):
+            for i in range(3):
+                spectator.offer(f"{burst}-{i}")
+            await asyncio.sleep(0.05)
+        spectator.stop()
+        return socket, spectator
+
+    socket, spectator = asyncio.run(scenario())
+    assert not socket.closed
+    assert spectator.coalesced > 3
+    assert spectator.lagged == 0
+    assert socket.sent[-1] == "4-2"
+
+
+def test_broadcast_sends_to_players_concurrently():
+    async def scenario():
+        players = [FakeSocket(delay=0.2), FakeSocket(delay=0.2), None]
+        watcher = FakeSocket()
+        spectator = SpectatorQueue(watcher)
+        spectator.start()
+        start = time.monotonic()
+        await broadcast(players, [spectator], "state")
+        elapsed = time.monotonic() - start
+        await asyncio.sleep(0)
+        spectator.stop()
+        return players, watcher, elapsed
+
+    players, watcher, elapsed = asyncio.run(scenario())
+    assert [p.sent for p in players[:2]] == [["state"], ["state"]]
+    assert watcher.sent == ["state"]
+    assert elapsed < 0.35
+
+
+def new_clobber():
+    return Clobber(4, 4)
+
+
+def test_idle_games_are_persisted_and_rehydrated(tmp_path):
+    store = GameStore("clobber", new_clobber, str(tmp_path / "games.sqlite3"), idle_ttl=10.0,
+                      on_evict=lambda game_id: {"ai": {"color": "white"}})
+    game = store.get_or_create("g")
+    move = game.get_legal_moves()[0]
+    game.make_move(move)
+    store.record_move("g", move)
+    position = game.to_canonical()
+
+    assert store.evict_idle(now=time.monotonic() + 60.0) == 1
+    assert store.metrics()["resident"] == 0
+    assert store.metrics()["persisted"] == 1
+
+    loaded = {}
+    store.on_load = lambda game_id, meta: loaded.update(meta)
+    restored = store.get("g")
+    assert restored.to_canonical() == position
+    assert store.moves["g"] == [[list(move.from_pos), list(move.to_pos), None]]
+    assert loaded == {"ai": {"color": "white"}}
+    assert store.metrics()["persisted"] == 0
+    assert store.get("missing") is None
+
+
+def test_least_recently_used_inactive_game_is_evicted(tmp_path):
+    store = GameStore("clobber", new_clobber, str(tmp_path / "games.sqlite3"), max_resident=2,
+                      is_active=lambda game_id: game_id == "a")
+    store.get_or_create("a")
+    store.get_or_create("b")
+    store.get_or_create("c")
+    assert list(store.games) == ["a", "c"]
+
+    store.get("b")
+    assert list(store.games) == ["a", "b"]
+    assert store.metrics()["evictions"] == 2
+    assert store.metrics()["rehydrations"] == 1
+
+
+def test_async_store_runs_sqlite_off_the_event_loop(tmp_path):
+    store = GameStore("clobber", new_clobber, str(tmp_path / "games.sqlite3"))
+    database_threads = set()
+    take_row = store._take_row
+
+    def recording_take_row(game_id):
+        database_threads.add(threading.get_ident())
+        return take_row(game_id)
+
+    store._take_row = recording_take_row
+
+    async def scenario():
+        game = await store.fetch_or_create("g")
+        game.make_move(game.get_legal_moves()[0])
+        store.evict("g")
+        restored = await store.fetch("g")
+        return game, restored, await store.fetch_metrics(), await store.fetch("missing")
+
+    game, restored, stats, missing = asyncio.run(scenario())
+    assert restored.to_canonical() == game.to_canonical()
+    assert stats["persisted"] == 0 and stats["rehydrations"] == 1
+    assert missing is None
+    assert threading.get_ident() not in database_threads
+    store.close()
+
+
+class StandInRedis:
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+        self.subscribers = {}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                command = await read_reply(reader)
+                name = command[0].decode().upper()
+                args = command[1:]
+                if name == 'GET':
+                    value = self.values.get(args[0])
+                    writer.write(b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value))
+                elif name == 'SET':
+                    if b'NX' in args[2:] and args[0] in self.values:
+                        writer.write(b'$-1\r\n')
+                    else:
+                        self.values[args[0]] = args[1]
+                        if b'EX' in args[2:]:
+                            self.expiry[args[0]] = int(args[args.index(b'EX') + 1])
+                        writer.write(b'+OK\r\n')
+                elif name == 'DEL':
+                    writer.write(b':%d\r\n' % sum(self.values.pop(key, None) is not None for key in args))
+                elif name == 'EXPIRE':
+                    if args[0] in self.values:
+                        self.expiry[args[0]] = int(args[1])
+                    writer.write(b':%d\r\n' % (args[0] in self.values))
+                elif name == 'PUBLISH':
+                    listeners = self.subscribers.get(args[0], set())
+                    for listener in listeners:
+                        listener.write(encode_command(b'message', args[0], args[1]))
+                    writer.write(b':%d\r\n' % len(listeners))
+                elif name == 'SUBSCRIBE':
+                    self.subscribers.setdefault(args[0], set()).add(writer)
+                    writer.write(encode_command(b'subscribe', args[0], 1))
+                elif name == 'UNSUBSCRIBE':
+                    self.subscribers.get(args[0], set()).discard(writer)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+
+
+def test_redis_room_bus_shares_state_and_messages():
+    async def scenario():
+        server = StandInRedis()
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+
+        first = create_room_bus(f"redis://127.0.0.1:{port}")
+        second = create_room_bus(f"redis://127.0.0.1:{port}")
+        await first.connect()
+        await second.connect()
+
+        received = []
+
+        async def handler(message):
+            received.append(message)
+
+        second.subscribe("g", handler)
+        await first.set("g:state", "1|{}")
+        claims = [await first.claim("g:seat:white", "a"), await second.claim("g:seat:white", "b")]
+        await first.release("g:seat:white")
+        reclaimed = await second.claim("g:seat:white", "b")
+
+        await asyncio.sleep(0.05)
+        await first.publish("g", "moved")
+        await asyncio.sleep(0.05)
+        state = await second.get("g:state")
+
+        server.expiry.clear()
+        await second.touch("g:seat:white", "g:missing")
+        touched = dict(server.expiry)
+        await first.set("g:ai", "{}")
+        await first.delete("g:state", "g:ai")
+        deleted = await second.get("g:state"), await second.get("g:ai")
+
+        await first.close()
+        await second.close()
+        listener.close()
+        return claims, reclaimed, received, state, touched, deleted
+
+    claims, reclaimed, received, state, touched, deleted = asyncio.run(scenario())
+    assert isinstance(create_room_bus(None), LocalRoomBus)
+    assert claims == [True, False]
+    assert reclaimed
+    assert received == ["moved"]
+    assert state == "1|{}"
+    assert touched == {b"rooms:g:seat:white": KEY_TTL}
+    assert deleted == (None, None)
+
+
+def test_local_room_bus_forgets_deleted_keys():
+    async def scenario():
+        bus = LocalRoomBus()
+        await bus.set("g:state", "1|{}")
+        await bus.set("g:ai", "{}")
+        await bus.claim("g:seat:black", "a")
+        await bus.delete("g:state", "g:ai")
+        return bus.values
+
+    assert asyncio.run(scenario()) == {"g:seat:black": "a"}
+
+
+def test_wire_frames_round_trip_and_shrink_updates():
+    game = Clobber(20, 20)
+    move = game.get_legal_moves()[0]
+    game.make_move(move)
+    legacy = json.dumps({
+        "board": [[piece.value for piece in row] for row in game.get_board()],
+        "legalMoves": [{"from": m.from_pos, "to": m.to_pos} for m in game.get_legal_moves()]
+    })
+
+    delta = wire.delta_message(1, [move.from_pos, move.to_pos, None], "white", "ongoing")
+    full = wire.full_message(1, game.to_canonical(), "white", "ongoing")
+    for encoding in ("json", "packed"):
+        assert wire.decode(wire.encode(delta, encoding)) == json.loads(json.dumps(delta))
+        assert wire.decode(wire.encode(full, encoding)) == full
+        assert len(wire.encode(delta, encoding)) * 100 < len(legacy)
+
+    cache = wire.FrameCache()
+    assert cache.get("g", delta, "packed") is cache.get("g", delta, "packed")
+    assert wire.negotiate(None, "packed") is None
+    assert wire.negotiate(2, "unknown") == "json"
+
+
+def test_broadcast_picks_frame_per_connection():
+    async def scenario():
+        legacy, compact = FakeSocket(), FakeSocket()
+        compact.send_bytes = compact.send_text
+        await broadcast([legacy, compact], [], lambda conn: b"\x02" if conn is compact else "{}")
+        return legacy, compact
+
+    legacy, compact = asyncio.run(scenario())
+    assert legacy.sent == ["{}"]
+    assert compact.sent == [b"\x02"]
+
+
+def test_metrics_render_prometheus_text():
+    histogram = Histogram('test_latency_seconds', 'Test latency', ('action',), buckets=(0.1, 1.0))
+    counter = Counter('test_messages_total', 'Test messages', ('action',))
+    gauge = Gauge('test_rooms', 'Test rooms')
+    metrics.set_enabled(True)
+    try:
+        histogram.observe(0.05, "make_move")
+        histogram.observe(0.5, "make_move")
+        counter.inc("make_move")
+        gauge.set_function(lambda: 3)
+        text = metrics.render()
+    finally:
+        metrics.set_enabled(False)
+
+    assert 'test_latency_seconds_bucket{action="make_move",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{action="make_move",le="+Inf"} 2' in text
+    assert 'test_latency_seconds_count{action="make_move"} 2' in text
+    assert 'test_messages_total{action="make_move"} 1' in text
+    assert 'test_rooms 3' in text
+
+    counter.inc("make_move")
+    with histogram.time("make_move"):
+        pass
+    assert counter.values[("make_move",)] == 1
+    assert sum(histogram.counts[("make_move",)]) == 2
+
+
+def test_api_metrics_are_enabled_by_the_app_not_on_import(monkeypatch):
+    assert not metrics.enabled
+
+    monkeypatch.setenv("API_METRICS", "1")
+    api_metrics.enable_from_env()
+    try:
+        assert metrics.enabled
+    finally:
+        metrics.set_enabled(False)
+
+
+def test_load_stats_summary_reports_percentiles():
+    stats = LoadStats()
+    stats.round_trips = [i / 1000 for i in range(1, 101)]
+    stats.moves = 100
+    summary = stats.summary(2.0)
+    assert summary["moves_per_s"] == 50.0
+    assert summary["rtt_p50_ms"] == 51.0
+    assert summary["rtt_p99_ms"] == 100.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_batch_analysis_streams_and_caches(monkeypatch):
+    calls = []
+
+    async def fake_search(game_type, position, spec, budget):
+        calls.append(position)
+        return {"best_move": None, "score": 0.0, "nodes": 1, "time": 0.0}
+
+    monkeypatch.setattr(analysis, "_search", fake_search)
+    monkeypatch.setattr(analysis, "cache", analysis.AnalysisCache())
+
+    async def collect(positions):
+        return [json.loads(line) async for line in
+                analysis.analyse_batch("clobber", positions, {"engine": "minmax"}, 1.0)]
+
+    first = asyncio.run(collect(["BW/WB B", "BW/WB B", "not a board"]))
+    second = asyncio.run(collect(["BW/WB B"]))
+
+    assert sorted(line["index"] for line in first) == [0, 1, 2]
+    assert [line for line in first if "error" in line][0]["index"] == 2
+    assert calls == ["BW/WB B"]
+    assert second[0]["cached"] is True
+    assert analysis.validate_request({"positions": ["x"], "budget": 0}, ("minmax",)) is not None
+    assert analysis.validate_request({"positions": ["x"]}, ("minmax",)) is None
+    assert analysis.validate_request({"positions": ["x"], "engine": {"depth": 50}}, ("minmax",)) is not None
+    assert analysis.validate_request({"positions": ["x"], "engine": {"depth": "3"}}, ("minmax",)) is not None
+    wide = "_" * 300 + " B"
+    assert analysis.validate_request({"positions": [wide]}, ("minmax",), "clobber") is not None
+    assert analysis.validate_request({"positions": ["BW/WB B"]}, ("minmax",), "clobber") is None
+    with pytest.raises(ValueError):
+        analysis.position_key("clobber", wide)
+
+
+def test_queued_analysis_does_not_spend_its_budget_waiting(monkeypatch):
+    def slow_analysis(game_type, position, spec, think_time):
+        time.sleep(0.2)
+        return {"best_move": None, "score": 0.0, "nodes": 1, "time": 0.2}
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(engine_pool, "POOL_SIZE", 1)
+    monkeypatch.setattr(engine_pool, "get_executor", lambda: pool)
+    monkeypatch.setattr(engine_pool, "analyse_position", slow_analysis)
+    monkeypatch.setattr(analysis, "DEADLINE_GRACE", 0.0)
+    monkeypatch.setattr(analysis, "cache", analysis.AnalysisCache())
+
+    async def collect():
+        return [json.loads(line) async for line in
+                analysis.analyse_batch("clobber", ["BW/WB B", "WB/BW B", "BB/WW B"], {"engine": "minmax"}, 0.3)]
+
+    lines = asyncio.run(collect())
+    pool.shutdown()
+    assert len(lines) == 3
+    assert not [line for line in lines if "error" in line]
@@ -0,0 +1,26 @@
+from arena import MatchStats, elo_to_score, play_game, score_to_elo, sprt_decision
+
+
+def test_elo_and_sprt_on_lopsided_match():
+    assert abs(score_to_elo(elo_to_score(120.0)) - 120.0) < 1e-6
+
+    stats = MatchStats()
+    for score in [1.0] * 60 + [0.0] * 10 + [0.5] * 10:
+        stats.add({"score": score, "think_time": [0.1, 0.1], "nodes": [10, 10], "moves": [1, 1]})
+    elo, low, high = stats.elo()
+    assert low < elo < high
+    assert elo > 100
+    assert sprt_decision(stats, (0.0, 50.0, 0.05, 0.05)) == "H1"
+
+    even = MatchStats()
+    for score in [1.0, 0.0] * 200:
+        even.add({"score": score, "think_time": [0.1, 0.1], "nodes": [10, 10], "moves": [1, 1]})
+    assert sprt_decision(even, (0.0, 50.0, 0.05, 0.05)) == "H0"
+
+
+def test_clobber_games_always_have_a_winner():
+    specs = ({"engine": "minmax", "depth": 1}, {"engine": "minmax", "depth": 2})
+    for seed in range(4):
+        result = play_game("clobber", specs, seed % 2, seed, 4, 4)
+        assert result["score"] in (0.0, 1.0)
+        assert sum(result["moves"]) >= result["plies"]
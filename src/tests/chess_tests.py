@@ -1,6 +1,11 @@
 import copy
 import pytest
 from chess.chess_state import Chess
+from chess.chess_strategy import AdaptiveChessStrategy
+from chess.tuning import extract_features, format_constants, initial_weights, load_constants
+from chess.chess_piece import ChessPiece
+from general.enums import Piece
+from general.move import FLAG_CAPTURE, Move, pack_move
 
 
 def get_number_of_possible_positions(fen_start: str, depth: int) -> int:
@@ -87,4 +92,73 @@ def test_talkchess_positions(depth, expected):
 ])
 def test_steven_edwards_positions(depth, expected):
     fen = 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10'
-    assert get_number_of_possible_positions(fen, depth) == expected
\ No newline at end of file
+    assert get_number_of_possible_positions(fen, depth) == expected
+
+@pytest.mark.parametrize("fen", [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+])
+def test_tuning_features_reproduce_evaluation(fen, tmp_path):
+    strategy = AdaptiveChessStrategy()
+    game = Chess(fen)
+    features = extract_features(strategy, game)
+    weights = initial_weights()
+    score = sum(w * x for w, x in zip(weights, features))
+    expected = strategy.evaluate(game)
+    assert score == pytest.approx(expected if game.current_player == Piece.WHITE else -expected)
+
+    path = tmp_path / "tuned.py"
+    path.write_text(format_constants(weights))
+    assert initial_weights(load_constants(str(path))) == weights
+
+
+def test_adaptive_batch_evaluation_matches_single_positions():
+    fens = [
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b KQkq - 0 1",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3",
+        "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1",
+    ]
+    strategy = AdaptiveChessStrategy()
+    games = [Chess(fen) for fen in fens]
+    expected = [strategy.evaluate(Chess(fen)) for fen in fens]
+    assert strategy.evaluate_batch(games) == pytest.approx(expected)
+
+
+def test_board_view_keeps_enum_pieces():
+    game = Chess()
+    game.make_move(game.find_legal_move(Move((6, 4), (4, 4))))
+    board = game.get_board()
+    assert board[4][4] == ChessPiece.WHITE_PAWN and board[6][4] == ChessPiece.EMPTY
+    assert board[0][4] == ChessPiece.BLACK_KING and board[0][4].color == Piece.BLACK
+    assert game.get_fen() == "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+    assert Chess(game.get_fen()).get_board() == board
+
+
+@pytest.mark.parametrize("fen", [
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+])
+def test_staged_moves_match_legal_moves(fen):
+    expected = Chess(fen).legal_move_codes()
+    quiet = next(code for code in expected if not code & FLAG_CAPTURE)
+    capture = next(code for code in expected if code & FLAG_CAPTURE)
+    illegal = pack_move((4, 4), (0, 0))
+
+    staged = list(Chess(fen).iter_move_codes(hash_move=quiet, killers=[illegal, capture, quiet]))
+    assert sorted(staged) == sorted(expected)
+    assert staged[0] == quiet
+    assert all(code & FLAG_CAPTURE for code in staged[1:staged.index(capture) + 1])
+
+
+def test_unknown_promotions_stay_distinct():
+    assert Move((1, 0), (0, 0), 'X') != Move((1, 0), (0, 0), 'Y')
+    assert Move((1, 0), (0, 0), 'X') != Move((1, 0), (0, 0))
+    assert Move((1, 0), (0, 0), 'Q') == Move.from_packed(pack_move((1, 0), (0, 0), 'Q'))
+
+    game = Chess("8/P6k/8/8/8/8/8/K7 w - - 0 1")
+    assert game.find_legal_move(Move((1, 0), (0, 0), 'X')) is None
+    assert game.find_legal_move(Move((1, 0), (0, 0), 'Q')) is not None
@@ -0,0 +1,284 @@
+import copy
+import random
+import pytest
+from clobber import cgt
+from clobber.clobber import Clobber
+from clobber.clobber_strategy import NaiveStrategy
+from clobber.endgame import ClobberEndgameSolver, find_components
+from clobber.sparse import SparseClobber, clobber_from_canonical, new_clobber
+from clobber.tablebase import ClobberTablebase, TablebaseGenerator
+from general.enums import Piece
+from general.move import MOVE_MASK, Move, from_algebraic, from_uci, to_algebraic, to_uci
+from clobber.symmetry import (SYMMETRIES, canonicalize, canonical_string, symmetry_hash,
+                              from_canonical_move, to_canonical_move, transform_move,
+                              transformed_shape, inverse_symmetry)
+
+
+def random_position(height: int, width: int, plies: int, seed: int) -> Clobber:
+    rng = random.Random(seed)
+    game = Clobber(height, width)
+    for _ in range(plies):
+        moves = game.get_legal_moves()
+        if not moves:
+            break
+        game.make_move(rng.choice(moves))
+    return game
+
+
+def point(x: int, y: int) -> Move:
+    return Move((x, y), (x, y))
+
+
+def test_canonical_round_trip():
+    game = random_position(4, 5, 6, seed=1)
+    assert Clobber.from_canonical(game.to_canonical()).board == game.board
+
+
+@pytest.mark.parametrize("height, width", [(5, 5), (4, 6), (6, 4)])
+def test_symmetric_positions_share_hash(height, width):
+    game = random_position(height, width, 5, seed=height * width)
+    expected = symmetry_hash(game)
+
+    for symmetry in SYMMETRIES:
+        new_height, new_width = transformed_shape(height, width, symmetry)
+        image = Clobber.from_canonical('/'.join(['_' * new_width] * new_height) + ' B')
+        image.current_player = game.current_player
+        for y in range(height):
+            for x in range(width):
+                move = transform_move(point(x, y), height, width, symmetry)
+                nx, ny = move.from_pos
+                image.board[ny][nx] = game.board[y][x]
+        assert symmetry_hash(image) == expected
+        assert canonical_string(image) == canonical_string(game)
+
+
+def test_colour_swap_shares_hash():
+    game = random_position(5, 5, 3, seed=7)
+    swapped = Clobber.from_canonical(game.to_canonical().translate(str.maketrans('WB', 'BW')))
+    assert symmetry_hash(swapped) == symmetry_hash(game)
+
+
+@pytest.mark.parametrize("height, width", [(5, 5), (4, 6), (6, 3)])
+def test_moves_remap_between_original_and_canonical(height, width):
+    game = random_position(height, width, 4, seed=3)
+    canonical, symmetry, _ = canonicalize(game)
+
+    mapped = [from_canonical_move(m, game, symmetry) for m in canonical.get_legal_moves()]
+    original = game.get_legal_moves()
+    assert sorted(map(repr, mapped)) == sorted(map(repr, original))
+    assert all(to_canonical_move(m, game, symmetry) in canonical.get_legal_moves() for m in original)
+
+
+def test_inverse_symmetry_restores_points():
+    for symmetry in SYMMETRIES:
+        height, width = transformed_shape(3, 4, symmetry)
+        move = transform_move(transform_move(point(1, 2), 3, 4, symmetry), height, width,
+                              inverse_symmetry(symmetry))
+        assert move.from_pos == (1, 2)
+
+
+def brute_force_win(game: Clobber) -> bool:
+    for move in game.get_legal_moves():
+        child = Clobber.from_canonical(game.to_canonical())
+        child.make_move(move)
+        if not brute_force_win(child):
+            return True
+    return False
+
+
+def test_components_split_on_empty_squares():
+    game = Clobber.from_canonical("BW_B/____/WB_W B")
+    components = find_components(game.board)
+    assert sorted(len(cells) for cells in components) == [2, 2]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_endgame_solver_matches_brute_force(seed):
+    game = random_position(3, 4, seed % 5 + 2, seed=seed)
+    solver = ClobberEndgameSolver(max_component_size=12)
+
+    expected = brute_force_win(game)
+    assert solver.is_win_for_mover(game) == expected
+
+    move = solver.solve(game)
+    assert (move is not None) == expected
+    if move is not None:
+        game.make_move(move)
+        assert not brute_force_win(game)
+
+
+def test_component_values_are_cached_across_symmetries():
+    solver = ClobberEndgameSolver()
+    solver.value(Clobber.from_canonical("BWB/W__ B"))
+    misses = solver.cache_misses
+    solver.value(Clobber.from_canonical("__W/BWB B"))
+    assert solver.cache_misses == misses
+
+
+def test_tablebase_matches_brute_force(tmp_path):
+    for height, width in [(2, 3), (3, 3)]:
+        TablebaseGenerator(height, width).write(str(tmp_path))
+    tablebase = ClobberTablebase(str(tmp_path))
+
+    for seed in range(20):
+        game = random_position(4, 5, seed % 12 + 6, seed=seed)
+        result = tablebase.probe(game)
+        if result is not None:
+            assert result == brute_force_win(game)
+    assert tablebase.hits > 0
+    tablebase.close()
+
+
+def test_tall_tablebase_matches_brute_force(tmp_path):
+    generator = TablebaseGenerator(3, 2)
+    assert len(generator.symmetries) == 4
+    generator.write(str(tmp_path))
+    tablebase = ClobberTablebase(str(tmp_path))
+
+    for seed in range(20):
+        game = random_position(3, 2, seed % 5 + 2, seed=seed)
+        assert tablebase.probe(game) == brute_force_win(game)
+    tablebase.close()
+
+
+def test_tablebase_misses_regions_larger_than_any_table(tmp_path):
+    TablebaseGenerator(2, 2).write(str(tmp_path))
+    tablebase = ClobberTablebase(str(tmp_path))
+    assert tablebase.probe(Clobber(3, 3)) is None
+    assert tablebase.probe(Clobber.from_canonical("B__/___/__W W")) is False
+    tablebase.close()
+
+
+def test_legal_move_index_matches_generated_moves():
+    game = Clobber(5, 6)
+    index = game.legal_move_index()
+    assert set(index.values()) == set(game.get_legal_moves())
+    assert game.legal_move_index() is index
+    assert game.find_legal_move(Move((1, 0), (0, 0))) is index[hash(Move((1, 0), (0, 0)))]
+    assert game.find_legal_move(Move((1, 0), (2, 1))) is None
+    assert hash(Move((1, 0), (0, 0))) == hash(Move((1, 0), (0, 0)))
+    legal = next(m for m in index.values() if m.from_pos[0] > 0)
+    alias = Move((legal.from_pos[0] - 1, legal.from_pos[1] + 256), legal.to_pos)
+    assert alias.packed & MOVE_MASK == legal.packed and game.find_legal_move(alias) is None
+
+    game.make_move(game.get_legal_moves()[0])
+    assert game.legal_move_index() is not index
+    assert set(game.legal_move_index().values()) == set(game.get_legal_moves())
+
+    game.current_player = ~game.current_player
+    assert all(game.board[m.from_pos[1]][m.from_pos[0]] == game.current_player for m in game.get_legal_moves())
+
+
+
+def test_packed_moves_drive_the_game_like_move_objects():
+    by_move, by_code = Clobber(4, 5), Clobber(4, 5)
+    for _ in range(6):
+        codes = by_code.legal_move_codes()
+        assert [Move.from_packed(code) for code in codes] == by_move.get_legal_moves()
+        by_move.make_move(by_move.get_legal_moves()[-1])
+        by_code.make_move(codes[-1])
+        assert by_move.board == by_code.board
+
+    move = Move((2, 3), (2, 2))
+    assert Move.from_packed(move.packed) == move
+    assert to_algebraic(move.packed, 4, row_major=False) == {"from": "c1", "to": "c2"}
+    assert from_algebraic({"from": "c1", "to": "c2"}, 4, row_major=False) == move.packed
+    assert from_algebraic({"from": "c9", "to": "c2"}, 4, row_major=False) is None
+    assert to_uci(from_uci("e7e8q")) == "e7e8q"
+
+
+def test_wide_boards_keep_moves_on_their_squares():
+    game = Clobber(2, 40)
+    rng = random.Random(5)
+    while not game.is_terminal():
+        moves = game.get_legal_moves()
+        assert len(moves) == sum(1 for y in range(2) for x in range(40) if game.board[y][x] == game.current_player
+                                 for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+                                 if 0 <= nx < 40 and 0 <= ny < 2 and game.board[ny][nx] == ~game.current_player)
+        for move in moves:
+            (fx, fy), (tx, ty) = move.from_pos, move.to_pos
+            assert abs(fx - tx) + abs(fy - ty) == 1 and game.board[fy][fx] == game.current_player
+            assert game.find_legal_move(Move(move.from_pos, move.to_pos)) == move
+        move = rng.choice(moves)
+        mover = game.current_player
+        game.make_move(move.packed)
+        assert game.board[move.to_pos[1]][move.to_pos[0]] == mover
+        assert game.board[move.from_pos[1]][move.from_pos[0]] == Piece.EMPTY
+
+    with pytest.raises(ValueError):
+        Clobber(2, 300)
+    with pytest.raises(ValueError):
+        Clobber.from_canonical("B" * 257 + " B")
+
+def test_naive_batch_evaluation_matches_single_positions():
+    random.seed(3)
+    strategy = NaiveStrategy()
+    games = [Clobber(4, 5), Clobber(3, 3), Clobber.from_canonical("B_W/___/W_B W")]
+    for _ in range(12):
+        game = copy.deepcopy(games[-1] if len(games) > 3 else games[0])
+        legal_moves = game.get_legal_moves()
+        if legal_moves:
+            game.make_move(random.choice(legal_moves))
+        games.append(game)
+
+    assert strategy.evaluate_batch(games) == [strategy.evaluate(game) for game in games]
+
+
+def test_streamed_moves_put_killers_first():
+    game = Clobber(5, 6)
+    game.make_move(game.get_legal_moves()[3])
+    expected = Clobber.from_canonical(game.to_canonical()).legal_move_codes()
+    killer = expected[-1]
+    streamed = list(Clobber.from_canonical(game.to_canonical()).iter_move_codes(killers=[killer, killer ^ 1 << 11]))
+    assert streamed[0] == killer
+    assert sorted(streamed) == sorted(expected)
+
+
+def test_sparse_clobber_matches_dense_board():
+    rng = random.Random(7)
+    dense = Clobber(16, 18)
+    sparse = new_clobber(16, 18)
+    assert isinstance(sparse, SparseClobber)
+    strategy = NaiveStrategy()
+
+    while not dense.is_terminal():
+        assert sparse.legal_move_codes() == dense.legal_move_codes()
+        assert list(sparse.iter_move_codes()) == dense.legal_move_codes()
+        assert sparse.get_board() == dense.get_board()
+        assert strategy.evaluate(sparse) == strategy.evaluate(dense)
+        move = rng.choice(dense.legal_move_codes())
+        before = copy.deepcopy(sparse)
+        dense.make_move(move)
+        sparse.make_move(move)
+        assert before.to_canonical() != sparse.to_canonical()
+
+    assert sparse.is_terminal()
+    restored = clobber_from_canonical(sparse.to_canonical())
+    assert isinstance(restored, SparseClobber) and restored.get_board() == dense.get_board()
+
+
+def test_sparse_clobber_on_wide_boards():
+    dense, sparse = Clobber(3, 40), SparseClobber(3, 40)
+    rng = random.Random(11)
+    while not dense.is_terminal():
+        assert sparse.legal_move_codes() == dense.legal_move_codes()
+        move = rng.choice(dense.legal_move_codes())
+        dense.make_move(move)
+        sparse.make_move(move)
+        assert sparse.get_board() == dense.get_board()
+
+    sparse.board = Clobber(3, 40).board
+    assert sparse.legal_move_codes() == Clobber(3, 40).legal_move_codes()
+    with pytest.raises(ValueError):
+        new_clobber(3, 300)
+    with pytest.raises(ValueError):
+        clobber_from_canonical("/".join(["BW"] * 257) + " B")
+
+
+def test_clearing_caches_keeps_games_interned():
+    up = cgt.canonical([cgt.ZERO], [cgt.STAR])
+    ClobberEndgameSolver().clear()
+    again = cgt.canonical([cgt.ZERO], [cgt.STAR])
+
+    assert again is up
+    assert cgt.canonical([up, again], []) is cgt.canonical([up], []) is not cgt.ZERO
@@ -0,0 +1,62 @@
+import pytest
+from agents.dfpn import DFPN, MAX_TABLE_SIZE, ProofTable
+from clobber.clobber import Clobber
+from clobber.endgame import ClobberEndgameSolver
+from general.enums import Piece
+
+
+@pytest.mark.parametrize("height, width, expected", [
+    (2, 3, 'loss'),
+    (3, 3, 'win'),
+    (3, 4, 'loss')
+])
+def test_solves_small_boards(height, width, expected):
+    game = Clobber(height, width)
+    agent = DFPN(game.current_player, table_size=1 << 12)
+    assert agent.solve(game) == expected
+    assert (agent.best_move is not None) == (expected == 'win')
+    assert agent.get_stats()['nodes'] > 0
+
+
+def test_returns_proven_move():
+    game = Clobber(3, 3)
+    agent = DFPN(game.current_player, endgame_solver=ClobberEndgameSolver())
+    move = agent.choose_move(game)
+
+    game.make_move(move)
+    assert DFPN(game.current_player).solve(game) == 'loss'
+
+
+def test_node_budget_leaves_result_unknown():
+    game = Clobber(4, 4)
+    agent = DFPN(game.current_player, max_nodes=50)
+    assert agent.solve(game) == 'unknown'
+    assert agent.best_move is None
+    assert agent.choose_move(game) in game.get_legal_moves()
+
+
+def test_table_replaces_cheapest_entry_when_bucket_is_full():
+    table = ProofTable(capacity=2)
+    table.store(0, 3, 4, work=10)
+    table.store(2, 5, 6, work=1)
+    table.store(4, 7, 8, work=5)
+
+    assert table.lookup(0) == (3, 4)
+    assert table.lookup(2) == (1, 1)
+    assert table.lookup(4) == (7, 8)
+    assert table.overwrites == 1
+
+
+def test_proven_move_does_not_depend_on_table_entries():
+    game = Clobber(3, 3)
+    agent = DFPN(game.current_player, table_size=32)
+    assert agent.solve(game) == 'win'
+    agent.table = ProofTable(capacity=32)
+
+    game.make_move(agent.best_move)
+    assert DFPN(game.current_player).solve(game) == 'loss'
+
+
+def test_table_is_sized_from_the_node_budget():
+    assert DFPN(Piece.WHITE, max_nodes=1000).table.capacity == 1024
+    assert DFPN(Piece.WHITE, max_nodes=10 ** 9).table.capacity == MAX_TABLE_SIZE
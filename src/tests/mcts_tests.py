@@ -0,0 +1,40 @@
+import pytest
+from agents.mcts import MCTS, NodePool
+from clobber.clobber import Clobber
+from general.enums import Piece
+
+
+def test_node_cap_is_never_exceeded():
+    agent = MCTS(Piece.BLACK, simulation_time=0.3, max_nodes=20)
+    move = agent.choose_move(Clobber(4, 4))
+
+    assert move in Clobber(4, 4).get_legal_moves()
+    assert agent.peak_nodes <= 20
+    assert agent.node_count <= 20
+    assert agent.pruned_nodes > 0
+
+
+def test_released_nodes_are_recycled():
+    pool = NodePool(max_nodes=3)
+    root = pool.acquire(Clobber(3, 3))
+    child = pool.acquire(Clobber(3, 3), parent=root)
+    root.children.append(child)
+
+    root.children.remove(child)
+    pool.release(child)
+    reused = pool.acquire(Clobber(3, 3), parent=root)
+
+    assert reused is child
+    assert pool.size == 2
+    assert pool.recycled == 1
+
+
+def test_pool_rejects_too_small_cap():
+    with pytest.raises(ValueError):
+        NodePool(max_nodes=1)
+
+
+def test_profiled_search_counts_simulations():
+    agent = MCTS(Piece.BLACK, simulation_time=0.1, profile=True)
+    _, stats = agent.choose_move_with_stats(Clobber(4, 4))
+    assert stats.phases["simulate"][1] == stats.counters["simulations"] == agent.simulations
@@ -0,0 +1,25 @@
+import time
+from agents.minmax import MinMax
+from clobber.clobber import Clobber
+from clobber.clobber_strategy import NaiveStrategy
+from general.enums import Piece
+
+
+def test_time_limit_stops_deep_search_with_a_legal_move():
+    game = Clobber(6, 6)
+    agent = MinMax(Piece.WHITE, 50, NaiveStrategy(), time_limit=0.3)
+
+    started = time.perf_counter()
+    move = agent.choose_move(game)
+    assert time.perf_counter() - started < 1.0
+    assert move in game.get_legal_moves()
+    assert 1 <= agent.completed_depth < 50
+
+
+def test_time_limit_matches_fixed_depth_when_search_finishes():
+    fixed = MinMax(Piece.WHITE, 2, NaiveStrategy())
+    timed = MinMax(Piece.WHITE, 2, NaiveStrategy(), time_limit=60.0)
+
+    assert timed.choose_move(Clobber(4, 4)) == fixed.choose_move(Clobber(4, 4))
+    assert timed.completed_depth == 2
+    assert timed.last_score == fixed.last_score
@@ -0,0 +1,49 @@
+import copy
+import pytest
+from chess.chess_state import Chess
+from clobber.clobber import Clobber
+from perft import PerftTable, Zobrist, divide, move_name, parallel_perft, perft
+
+
+def count_by_making_moves(state, depth):
+    if depth == 0:
+        return 1
+    nodes = 0
+    for move in state.get_legal_moves():
+        child = copy.deepcopy(state)
+        child.make_move(move)
+        nodes += count_by_making_moves(child, depth - 1)
+    return nodes
+
+
+@pytest.mark.parametrize("fen, depth, expected", [
+    ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", 3, 8902),
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", 2, 2039),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 4, 43238),
+])
+def test_hashed_chess_perft(fen, depth, expected):
+    state = Chess(fen)
+    table = PerftTable(Zobrist.for_state(state), 1 << 12)
+    assert perft(state, depth, table) == expected
+    assert perft(state, depth, table) == expected
+    assert table.hits > 0
+
+
+def test_clobber_perft_matches_naive_count():
+    state = Clobber(4, 5)
+    expected = count_by_making_moves(state, 4)
+    assert perft(state, 4) == expected
+    assert perft(state, 4, PerftTable(Zobrist.for_state(state))) == expected
+
+
+def test_divide_splits_root_moves_across_processes():
+    state = Chess("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1")
+    counts = divide(state, 3, workers=2, table_size=1 << 12)
+    assert len(counts) == 14
+    assert sum(nodes for _, nodes in counts) == 2812
+    assert "b4f4" in {move_name(state, code) for code, _ in counts}
+    for code, nodes in counts:
+        child = copy.deepcopy(state)
+        child.make_move(code)
+        assert perft(child, 2) == nodes
+    assert parallel_perft(state, 3, workers=2) == 2812
@@ -0,0 +1,29 @@
+from agents.minmax import MinMax
+from clobber.clobber import Clobber
+from clobber.clobber_strategy import NaiveStrategy
+from clobber.endgame import ClobberEndgameSolver
+from general.enums import Piece
+from general.profiler import ProfiledState, SearchStats
+
+
+def test_profiled_search_reports_phases_without_changing_the_move(tmp_path):
+    plain = MinMax(Piece.BLACK, 2, NaiveStrategy())
+    profiled = MinMax(Piece.BLACK, 2, NaiveStrategy(), profile_dir=str(tmp_path))
+
+    move, stats = profiled.choose_move_with_stats(Clobber(4, 4))
+    assert move == plain.choose_move(Clobber(4, 4))
+    assert plain.last_stats is None
+    assert sum(stats.nodes_per_depth.values()) == profiled.nodes_visited == plain.nodes_visited
+    assert stats.phases["evaluate"][1] == stats.nodes_per_depth[2]
+    assert stats.branching_factor() > 1
+    assert (tmp_path / "minmax-1.pstats").exists()
+
+
+def test_profiled_state_passes_game_type_checks():
+    stats = SearchStats()
+    state = ProfiledState(Clobber(2, 3), stats)
+
+    assert isinstance(state, Clobber)
+    assert ClobberEndgameSolver().can_solve(state)
+    state.make_move(state.get_legal_moves()[0])
+    assert stats.phases["legal_moves"][1] == 1 and stats.phases["make_move"][1] == 1
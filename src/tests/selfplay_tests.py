@@ -0,0 +1,42 @@
+from clobber.clobber import Clobber
+from general.records import RecordWriter, read_games, read_samples
+from selfplay import play_selfplay_game
+
+
+def test_records_round_trip_across_chunks(tmp_path):
+    path = str(tmp_path / "games.bin")
+    specs = ({"engine": "minmax", "depth": 1}, {"engine": "minmax", "depth": 2})
+    games = [play_selfplay_game("clobber", specs, seed, 4, 4) for seed in range(6)]
+
+    with open(path, 'wb') as f:
+        writer = RecordWriter(f, "clobber", chunk_size=256)
+        for result, plies in games:
+            writer.write_game(result, plies)
+        writer.close()
+    assert writer.games == 6
+
+    for (result, plies), (read_result, read_plies) in zip(games, read_games(path)):
+        assert read_result == result != 0
+        assert [position for position, _, _ in read_plies] == [position for position, _, _ in plies]
+        for position, move, _ in read_plies:
+            assert Clobber.from_canonical(position).find_legal_move(move) is not None
+
+    samples = list(read_samples(path))
+    assert len(samples) == sum(len(plies) for _, plies in games)
+    assert samples[-1].game == 5
+
+
+def test_records_keep_positions_longer_than_64k(tmp_path):
+    path = str(tmp_path / "large.bin")
+    game = Clobber(256, 256)
+    move = game.get_legal_moves()[0]
+    position = game.to_canonical()
+    assert len(position) > 65535
+
+    with open(path, 'wb') as f:
+        writer = RecordWriter(f, "clobber")
+        writer.write_game(1, [(position, move.packed, 0.5)])
+        writer.close()
+
+    [(result, [(read_position, read_move, score)])] = list(read_games(path))
+    assert (result, read_position, read_move, score) == (1, position, move, 0.5)